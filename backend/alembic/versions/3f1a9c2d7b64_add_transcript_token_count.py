@@ -0,0 +1,25 @@
+"""add transcript token count
+
+Revision ID: 3f1a9c2d7b64
+Revises: 984ee94d7893
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7b64'
+down_revision = '984ee94d7893'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Token count is filled in at ingest; existing rows are counted lazily on first digest
+    op.add_column('transcripts', sa.Column('token_count', sa.Integer(), nullable=True,
+                                           comment='Token count of content, computed locally once'))
+
+
+def downgrade():
+    op.drop_column('transcripts', 'token_count')
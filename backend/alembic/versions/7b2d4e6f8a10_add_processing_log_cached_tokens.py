@@ -0,0 +1,24 @@
+"""add processing log cached tokens
+
+Revision ID: 7b2d4e6f8a10
+Revises: 3f1a9c2d7b64
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7b2d4e6f8a10'
+down_revision = '3f1a9c2d7b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('processing_logs', sa.Column('cached_tokens', sa.Integer(), nullable=True,
+                                               comment='Input tokens served from the provider prompt cache'))
+
+
+def downgrade():
+    op.drop_column('processing_logs', 'cached_tokens')
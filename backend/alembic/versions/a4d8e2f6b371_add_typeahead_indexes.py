@@ -0,0 +1,52 @@
+"""add tag dictionary and typeahead trigram indexes
+
+Revision ID: a4d8e2f6b371
+Revises: f7a2c4e8d913
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a4d8e2f6b371'
+down_revision = 'f7a2c4e8d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_table('tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False, comment='Tag, trimmed and lowercased so spellings differing in case are one entry'),
+    sa.Column('video_count', sa.Integer(), nullable=False, comment='Number of videos carrying the tag'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_tags_id'), 'tags', ['id'], unique=False)
+    op.create_index('ix_tags_name_trgm', 'tags', ['name'], postgresql_using='gin',
+                    postgresql_ops={'name': 'gin_trgm_ops'})
+    # Existing video tags are added with scripts/rebuild_tag_dictionary.py
+
+    # Built CONCURRENTLY so writes to videos and channels continue meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index('ix_videos_title_trgm', 'videos', ['title'], postgresql_using='gin',
+                        postgresql_ops={'title': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_channels_name_trgm', 'channels', ['name'], postgresql_using='gin',
+                        postgresql_ops={'name': 'gin_trgm_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_channels_name_trgm', table_name='channels',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_title_trgm', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_index('ix_tags_name_trgm', table_name='tags')
+    op.drop_index(op.f('ix_tags_id'), table_name='tags')
+    op.drop_table('tags')
@@ -0,0 +1,25 @@
+"""add transcript minhash signature
+
+Revision ID: a9d3e5f7c182
+Revises: e4a6c8b2d051
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e5f7c182'
+down_revision = 'e4a6c8b2d051'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('transcripts', sa.Column('minhash_signature', sa.LargeBinary(), nullable=True,
+                                           comment='MinHash signature of content for near-duplicate detection'))
+    # Signatures of existing transcripts are computed with scripts/backfill_transcript_signatures.py
+
+
+def downgrade():
+    op.drop_column('transcripts', 'minhash_signature')
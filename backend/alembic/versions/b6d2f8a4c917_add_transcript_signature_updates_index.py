@@ -0,0 +1,29 @@
+"""add index for loading updated transcript signatures
+
+Revision ID: b6d2f8a4c917
+Revises: a4d8e2f6b371
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b6d2f8a4c917'
+down_revision = 'a4d8e2f6b371'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built CONCURRENTLY so transcript writes continue meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transcripts_signature_updated_at', 'transcripts', ['updated_at'],
+                        postgresql_where=sa.text('minhash_signature IS NOT NULL'),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_transcripts_signature_updated_at', table_name='transcripts',
+                      postgresql_concurrently=True, if_exists=True)
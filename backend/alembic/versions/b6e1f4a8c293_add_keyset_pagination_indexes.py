@@ -0,0 +1,65 @@
+"""add keyset pagination indexes
+
+Revision ID: b6e1f4a8c293
+Revises: a9d3e5f7c182
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1f4a8c293'
+down_revision = 'a9d3e5f7c182'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (sort key, id) for each sort order of the video listings, library-wide and per channel;
+    # nullable columns are indexed through the COALESCE the listings sort by.
+    # Built concurrently so the listings keep taking writes; if_not_exists lets a
+    # rerun skip indexes that were built (drop any left INVALID by a failed build first).
+    with op.get_context().autocommit_block():
+        op.create_index('ix_videos_created_at_id', 'videos', ['created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_upload_date_id', 'videos', [sa.text("coalesce(upload_date, '')"), 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_view_count_id', 'videos', [sa.text('coalesce(view_count, -1)'), 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_title_id', 'videos', ['title', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_channel_created_at_id', 'videos', ['channel_id', 'created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_channel_upload_date_id', 'videos',
+                        ['channel_id', sa.text("coalesce(upload_date, '')"), 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_channel_view_count_id', 'videos',
+                        ['channel_id', sa.text('coalesce(view_count, -1)'), 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_channel_title_id', 'videos', ['channel_id', 'title', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_digests_created_at_id', 'digests', ['created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_digests_created_at_id', table_name='digests',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_channel_title_id', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_channel_view_count_id', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_channel_upload_date_id', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_channel_created_at_id', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_title_id', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_view_count_id', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_upload_date_id', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_created_at_id', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,38 @@
+"""add library filter indexes
+
+Revision ID: c3f8a2d6e417
+Revises: b6e1f4a8c293
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3f8a2d6e417'
+down_revision = 'b6e1f4a8c293'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('videos', sa.Column('published_on', sa.Date(), nullable=True,
+                                      comment='Upload date as a date, kept in sync with upload_date for time range filters'))
+    op.execute("UPDATE videos SET published_on = to_date(upload_date, 'YYYYMMDD') WHERE upload_date ~ '^[0-9]{8}$'")
+    # The column and backfill commit first; the indexes are then built concurrently
+    # outside a transaction so the library keeps taking writes during the GIN build
+    with op.get_context().autocommit_block():
+        op.create_index('ix_videos_published_on', 'videos', ['published_on'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_categories', 'videos', ['categories'],
+                        postgresql_using='gin', postgresql_ops={'categories': 'jsonb_path_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_videos_categories', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_videos_published_on', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('videos', 'published_on')
@@ -0,0 +1,52 @@
+"""add digest prompt version and regeneration jobs
+
+Revision ID: c5e8a1d3f920
+Revises: 7b2d4e6f8a10
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a1d3f920'
+down_revision = '7b2d4e6f8a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('digests', sa.Column('prompt_version', sa.Integer(), nullable=True,
+                                       comment='Version of the digest prompt template used'))
+    op.create_index(op.f('ix_digests_prompt_version'), 'digests', ['prompt_version'], unique=False)
+    # Digests generated before versioning came from the first prompt template
+    op.execute("UPDATE digests SET prompt_version = 1 WHERE content <> ''")
+
+    op.create_table('regeneration_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('target_version', sa.Integer(), nullable=False, comment='Digests below this prompt version are regenerated'),
+    sa.Column('cost_cap_usd', sa.Float(), nullable=True, comment='Maximum spend for the job in USD'),
+    sa.Column('requests_per_minute', sa.Integer(), nullable=False, comment='Maximum generation requests per minute'),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'PAUSED', 'COMPLETED', name='regenerationstatus'), nullable=False, comment='Current job status'),
+    sa.Column('regenerated_count', sa.Integer(), nullable=False, comment='Digests regenerated so far'),
+    sa.Column('failed_count', sa.Integer(), nullable=False, comment='Digests that failed to regenerate'),
+    sa.Column('tokens_used', sa.Integer(), nullable=False, comment='Tokens consumed so far'),
+    sa.Column('spent_usd', sa.Float(), nullable=False, comment='Cost so far in USD'),
+    sa.Column('failed_digest_ids', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Digests skipped after failing, so resumes do not retry them'),
+    sa.Column('last_digest_id', sa.Integer(), nullable=True, comment='Most recently processed digest'),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True, comment='When the job first started'),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True, comment='When the job completed'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_regeneration_jobs_id'), 'regeneration_jobs', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_regeneration_jobs_id'), table_name='regeneration_jobs')
+    op.drop_table('regeneration_jobs')
+    sa.Enum(name='regenerationstatus').drop(op.get_bind(), checkfirst=True)
+    op.drop_index(op.f('ix_digests_prompt_version'), table_name='digests')
+    op.drop_column('digests', 'prompt_version')
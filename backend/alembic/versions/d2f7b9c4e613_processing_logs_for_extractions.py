@@ -0,0 +1,39 @@
+"""processing logs for extractions
+
+Revision ID: d2f7b9c4e613
+Revises: c5e8a1d3f920
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7b9c4e613'
+down_revision = 'c5e8a1d3f920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE requesttype ADD VALUE IF NOT EXISTS 'EXTRACT_METADATA'")
+        op.execute("ALTER TYPE requesttype ADD VALUE IF NOT EXISTS 'EXTRACT_TRANSCRIPT'")
+    op.alter_column('processing_logs', 'video_id', existing_type=sa.Integer(), nullable=True,
+                    comment='Associated video; empty for extractions before the video is stored',
+                    existing_comment='Associated video')
+    op.alter_column('processing_logs', 'llm_id', existing_type=sa.Integer(), nullable=True,
+                    comment='LLM model used; empty for non-LLM calls',
+                    existing_comment='LLM model used')
+
+
+def downgrade():
+    op.execute("DELETE FROM processing_logs WHERE video_id IS NULL OR llm_id IS NULL")
+    op.alter_column('processing_logs', 'llm_id', existing_type=sa.Integer(), nullable=False,
+                    comment='LLM model used',
+                    existing_comment='LLM model used; empty for non-LLM calls')
+    op.alter_column('processing_logs', 'video_id', existing_type=sa.Integer(), nullable=False,
+                    comment='Associated video',
+                    existing_comment='Associated video; empty for extractions before the video is stored')
+    # Postgres cannot drop enum values; the extraction request types stay defined
@@ -0,0 +1,41 @@
+"""add video latest digest id
+
+Revision ID: d8b4c1e9f352
+Revises: c3f8a2d6e417
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd8b4c1e9f352'
+down_revision = 'c3f8a2d6e417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently outside a transaction so digest writes are not blocked
+    with op.get_context().autocommit_block():
+        op.create_index('ix_digests_video_generated_at_id', 'digests', ['video_id', 'generated_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+    op.add_column('videos', sa.Column('latest_digest_id', sa.Integer(), nullable=True,
+                                      comment='Digest with the latest generated_at, maintained on digest writes'))
+    # From here on the application keeps the pointer current whenever it writes digests
+    op.execute("""
+        UPDATE videos SET latest_digest_id = latest.id
+        FROM (
+            SELECT DISTINCT ON (video_id) video_id, id
+            FROM digests
+            ORDER BY video_id, generated_at DESC, id DESC
+        ) AS latest
+        WHERE videos.id = latest.video_id
+    """)
+
+
+def downgrade():
+    op.drop_column('videos', 'latest_digest_id')
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_digests_video_generated_at_id', table_name='digests',
+                      postgresql_concurrently=True, if_exists=True)
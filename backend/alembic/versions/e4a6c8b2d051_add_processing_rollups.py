@@ -0,0 +1,50 @@
+"""add processing rollups
+
+Revision ID: e4a6c8b2d051
+Revises: d2f7b9c4e613
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e4a6c8b2d051'
+down_revision = 'd2f7b9c4e613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('processing_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.Enum('HOUR', 'DAY', name='rollupgranularity'), nullable=False, comment='Bucket size'),
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False, comment='Start of the time bucket (UTC)'),
+    sa.Column('llm_id', sa.Integer(), nullable=False, comment='LLM model used; 0 for non-LLM calls'),
+    sa.Column('request_type', postgresql.ENUM(name='requesttype', create_type=False), nullable=False, comment='Type of processing request'),
+    sa.Column('channel_id', sa.Integer(), nullable=False, comment='Channel of the video; 0 when unknown'),
+    sa.Column('request_count', sa.Integer(), nullable=False, comment='Number of logged requests'),
+    sa.Column('error_count', sa.Integer(), nullable=False, comment='Number of failed requests'),
+    sa.Column('tokens_used', sa.BigInteger(), nullable=False, comment='Tokens consumed'),
+    sa.Column('input_tokens', sa.BigInteger(), nullable=False, comment='Input tokens'),
+    sa.Column('output_tokens', sa.BigInteger(), nullable=False, comment='Output tokens'),
+    sa.Column('cached_tokens', sa.BigInteger(), nullable=False, comment='Input tokens served from the provider prompt cache'),
+    sa.Column('cost_estimate', sa.Float(), nullable=False, comment='Estimated cost in USD'),
+    sa.Column('duration_ms_total', sa.BigInteger(), nullable=False, comment='Sum of request durations in milliseconds'),
+    sa.Column('duration_sketch', postgresql.JSONB(astext_type=sa.Text()), nullable=True, comment='Mergeable latency sketch of request durations'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'bucket_start', 'llm_id', 'request_type', 'channel_id', name='uq_processing_rollup_bucket')
+    )
+    op.create_index(op.f('ix_processing_rollups_id'), 'processing_rollups', ['id'], unique=False)
+    op.create_index(op.f('ix_processing_rollups_bucket_start'), 'processing_rollups', ['bucket_start'], unique=False)
+    # Existing logs are folded in with scripts/rebuild_processing_rollups.py
+
+
+def downgrade():
+    op.drop_index(op.f('ix_processing_rollups_bucket_start'), table_name='processing_rollups')
+    op.drop_index(op.f('ix_processing_rollups_id'), table_name='processing_rollups')
+    op.drop_table('processing_rollups')
+    sa.Enum(name='rollupgranularity').drop(op.get_bind(), checkfirst=True)
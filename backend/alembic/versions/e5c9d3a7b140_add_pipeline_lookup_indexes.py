@@ -0,0 +1,40 @@
+"""add pipeline lookup indexes
+
+Revision ID: e5c9d3a7b140
+Revises: d8b4c1e9f352
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5c9d3a7b140'
+down_revision = 'd8b4c1e9f352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY does not block writes but cannot run inside a
+    # transaction. if_not_exists lets a rerun skip indexes that were built;
+    # an index left INVALID by a failed build must be dropped before rerunning.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transcripts_video_processed', 'transcripts', ['video_id'],
+                        postgresql_where=sa.text("status = 'PROCESSED'"),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_digests_video_type', 'digests', ['video_id', 'digest_type'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_videos_unfinished_status', 'videos', ['processing_status', 'created_at', 'id'],
+                        postgresql_where=sa.text("processing_status IN ('PENDING', 'PROCESSING', 'FAILED')"),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_videos_unfinished_status', table_name='videos',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_digests_video_type', table_name='digests',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transcripts_video_processed', table_name='transcripts',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,58 @@
+"""add full-text search vectors
+
+Revision ID: f7a2c4e8d913
+Revises: e5c9d3a7b140
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'f7a2c4e8d913'
+down_revision = 'e5c9d3a7b140'
+branch_labels = None
+depends_on = None
+
+# Must match the Computed expressions of the models
+SEARCH_VECTORS = {
+    'videos': (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+        "Full-text search vector of title and description, generated by the database on write"
+    ),
+    'transcripts': (
+        "to_tsvector('english', coalesce(substr(content, 1, 500000), ''))",
+        "Full-text search vector of content, generated by the database on write"
+    ),
+    'digests': (
+        "to_tsvector('english', content)",
+        "Full-text search vector of content, generated by the database on write"
+    )
+}
+
+
+def upgrade():
+    # Adding a stored generated column rewrites the table once, holding an
+    # exclusive lock while every row's vector is computed. From then on
+    # Postgres computes the vector of each row as it is written.
+    for table, (expression, comment) in SEARCH_VECTORS.items():
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(),
+                                       sa.Computed(expression, persisted=True),
+                                       nullable=True, comment=comment))
+
+    with op.get_context().autocommit_block():
+        for table in SEARCH_VECTORS:
+            op.create_index(f'ix_{table}_search_vector', table, ['search_vector'],
+                            postgresql_using='gin',
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for table in SEARCH_VECTORS:
+            op.drop_index(f'ix_{table}_search_vector', table_name=table,
+                          postgresql_concurrently=True, if_exists=True)
+    for table in SEARCH_VECTORS:
+        op.drop_column(table, 'search_vector')
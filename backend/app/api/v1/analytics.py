@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+from app.db.database import get_db
+from app.models.processing_log import RequestType
+from app.models.processing_rollup import RollupGranularity
+from app.services.processing_rollups import GROUP_BY_COLUMNS, default_range, query_rollups
+
+router = APIRouter()
+
+class ProcessingRollupResponse(BaseModel):
+    bucket_start: datetime
+    llm_id: Optional[int] = None
+    request_type: Optional[RequestType] = None
+    channel_id: Optional[int] = None
+    request_count: int
+    error_count: int
+    tokens_used: int
+    input_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    cost_estimate: float
+    avg_duration_ms: Optional[float] = None
+    p50_duration_ms: Optional[float] = None
+    p95_duration_ms: Optional[float] = None
+
+@router.get("/analytics/processing", response_model=List[ProcessingRollupResponse])
+async def get_processing_analytics(
+    granularity: RollupGranularity = RollupGranularity.HOUR,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    group_by: List[str] = Query(default=[], description="Dimensions to break down by: llm, request_type, channel"),
+    llm_id: Optional[int] = None,
+    request_type: Optional[RequestType] = None,
+    channel_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Get request counts, tokens, cost and p50/p95 latency per time bucket from the processing rollups"""
+    unknown = [dimension for dimension in group_by if dimension not in GROUP_BY_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by dimensions: {', '.join(unknown)}")
+    default_start, default_end = default_range(granularity)
+    try:
+        return query_rollups(db, granularity, start or default_start, end or default_end, group_by,
+                             llm_id=llm_id, request_type=request_type, channel_id=channel_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
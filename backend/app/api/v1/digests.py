@@ -1,11 +1,13 @@
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from typing import List, Optional, Dict, Any, Union
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import datetime
 import logging
 from pydantic import BaseModel, Field
 
-from app.db.database import get_db, SessionLocal
+from app.db.database import AsyncSession, get_async_db, get_db, WorkerSessionLocal
 from app.models.digest import Digest as DigestModel, DigestType
 from app.models.video import Video as VideoModel
 from app.models.user import User as UserModel
@@ -16,6 +18,24 @@ from app.services.summarizers import (
     SummaryFormat
 )
 from app.services.summarizer_factory import get_summarizer, map_digest_type_to_summary_format
+from app.services.digest_generation import (
+    GENERATING,
+    claim_digest,
+    load_generation_context,
+    prepare_transcript,
+    summarizer_arguments,
+    apply_summary_result,
+    record_generation_error,
+    record_processing_log
+)
+from app.services.digest_formats import derive_digest, derive_all_formats
+from app.services.digest_repair import repair_summary_result
+from app.services.digest_reuse import adapt_cloned_digest, reuse_duplicate_digest, reuse_offers
+from app.services.digest_stream import relay_digest_stream
+from app.services.list_projections import digest_list_options
+from app.services.pagination import DIGEST_SORT_KEYS, InvalidCursorError, fetch_page, page_headers, total_count
+from app.services.provider_registry import provider_registry
+from app.services.provider_router import provider_router, backend_name
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -31,6 +51,10 @@ class DigestCreate(DigestBase):
     llm_id: Optional[int] = None
     summary_format: str = SummaryFormat.ENHANCED.value  # Default to enhanced format
     provider: str = "openai"  # Add provider field with default value
+    stream: bool = False  # Client will generate via GET /digests/{id}/stream instead of a background task
+    all_formats: bool = False  # Also derive the other digest types from this one without further model calls
+    reuse_duplicates: bool = False  # Clone the digest of a near-identical video (reupload, mirror) if there is one
+    reuse_digest_id: Optional[int] = None  # Clone this digest of a near-duplicate video, as offered by /reusable-digests
 
 class DigestResponse(DigestBase):
     id: int
@@ -38,6 +62,7 @@ class DigestResponse(DigestBase):
     tokens_used: Optional[int] = None
     cost: Optional[float] = None
     model_version: Optional[str] = None
+    prompt_version: Optional[int] = None
     generated_at: Optional[datetime] = None
     last_updated: Optional[datetime] = None
     extra_data: Optional[Dict[str, Any]] = None
@@ -51,113 +76,207 @@ class DigestResponse(DigestBase):
     class Config:
         from_attributes = True
 
+class DigestListItem(DigestBase):
+    """Digest metadata for list endpoints, with a snippet of the content instead of all of it."""
+    id: int
+    snippet: Optional[str] = Field(None, validation_alias="content_snippet")
+    tokens_used: Optional[int] = None
+    cost: Optional[float] = None
+    model_version: Optional[str] = None
+    prompt_version: Optional[int] = None
+    generated_at: Optional[datetime] = None
+    last_updated: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+    user_id: int
+    digest_type: str
+    llm_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+class ReusableDigest(BaseModel):
+    id: int
+    digest_type: str
+
+class ReusableDigestOffer(BaseModel):
+    """Digests of a near-duplicate video that can be cloned, or adapted, instead of summarizing again."""
+    video_id: int
+    title: Optional[str] = None
+    similarity: float
+    action: str  # "clone" as-is, or "adapt" the listed sections to this video
+    sections_to_adapt: List[str]
+    digests: List[ReusableDigest]
+
+class DigestCostEstimate(BaseModel):
+    """Pre-flight token and cost estimate returned for dry-run digest requests."""
+    video_id: int
+    provider: str
+    summary_format: str
+    transcript_tokens: int
+    prompt_tokens: int
+    max_completion_tokens: int
+    prompt_cost_usd: float
+    max_cost_usd: float
+    dry_run: bool = True
+
+def estimate_digest_cost(db: Session, video: VideoModel, provider: str, digest_type: str) -> DigestCostEstimate:
+    """Estimate prompt tokens and cost for a digest without calling the provider."""
+    transcript = db.query(TranscriptModel).filter(
+        TranscriptModel.video_id == video.id,
+        TranscriptModel.status == "PROCESSED"
+    ).first()
+    if not transcript or not transcript.content:
+        raise HTTPException(status_code=400, detail="No processed transcript available for this video")
+
+    # Estimate from the same preprocessed text generation would send
+    transcript_text, transcript_tokens, _ = prepare_transcript(db, transcript)
+
+    summary_format = map_digest_type_to_summary_format(digest_type)
+    summarizer = get_summarizer(provider)
+    estimate = summarizer.estimate_usage(
+        transcript_text,
+        title=video.title,
+        description=video.description,
+        chapters=video.chapters,
+        format_type=summary_format,
+        transcript_tokens=transcript_tokens
+    )
+    return DigestCostEstimate(
+        video_id=video.id,
+        provider=provider,
+        summary_format=summary_format.value,
+        **estimate
+    )
+
 async def generate_digest_background(digest_id: int):
     """Background task for generating a digest."""
-    db = SessionLocal()
+    db = WorkerSessionLocal()
     try:
+        # Same claim as streaming and batches, so a concurrent stream attaches instead of paying twice
+        if not claim_digest(db, digest_id, GENERATING):
+            logger.info(f"Digest {digest_id} is already generated or being generated elsewhere")
+            return
         digest = db.query(DigestModel).filter(DigestModel.id == digest_id).first()
         if not digest:
             logger.error(f"Digest {digest_id} not found")
             return
             
-        video = db.query(VideoModel).filter(VideoModel.id == digest.video_id).first()
-        if not video:
-            logger.error(f"Video {digest.video_id} not found")
-            return
-            
-        # Get the transcript
-        transcript = db.query(TranscriptModel).filter(
-            TranscriptModel.video_id == video.id,
-            TranscriptModel.status == "PROCESSED"
-        ).first()
-        
-        if not transcript:
-            logger.error(f"No transcript available for video {video.id}")
-            digest.extra_data = {"error": "No transcript available"}
-            db.commit()
-            return
-            
+        started_at = None
         try:
-            # Get the default LLM if not specified
-            if not digest.llm_id:
-                default_llm = db.query(LLMModel).first()
-                if default_llm:
-                    digest.llm_id = default_llm.id
-                else:
-                    logger.error("No LLM models found in database")
-                    digest.extra_data = {"error": "No LLM models available"}
-                    db.commit()
-                    return
-            
-            # Get the provider from extra_data or use default
-            provider = "openai"  # Default provider
-            if digest.extra_data and "provider" in digest.extra_data:
-                provider = digest.extra_data["provider"].lower()
-            
-            # Get the summary format from the digest or use the default based on digest type
-            summary_format_str = digest.extra_data.get("summary_format") if digest.extra_data else None
-            
-            if summary_format_str:
-                try:
-                    summary_format = SummaryFormat(summary_format_str)
-                except ValueError:
-                    # Invalid format, fall back to mapping based on digest type
-                    summary_format = map_digest_type_to_summary_format(digest.digest_type)
-            else:
-                # No format specified, use the mapping based on digest type
-                summary_format = map_digest_type_to_summary_format(digest.digest_type)
+            context = load_generation_context(db, digest)
+            if context is None:
+                # Storing the reason also drops the claim
+                record_generation_error(digest, (digest.extra_data or {}).get("error", "Digest cannot be generated"))
+                db.commit()
+                return
                 
-            # Get the summarizer based on the provider
-            summarizer = get_summarizer(provider)
-            
-            # Generate the summary
-            logger.info(f"Generating digest for video {video.id} using provider: {provider}")
-            
-            # Extract the transcript content
-            transcript_content = transcript.content
+            # The router prefers the requested provider while it is healthy
+            provider = context["provider"]
             
             # Generate the summary
-            summary_result = summarizer.generate(transcript_content, summary_format)
+            logger.info(f"Generating digest for video {digest.video_id} using provider: {provider}")
+            started_at = datetime.utcnow()
+            summary_result, backend = provider_router.generate(preferred=provider, video_id=digest.video_id, digest_id=digest.id,
+                                                               **summarizer_arguments(context))
+            context["backend"] = backend_name(backend)
+            # Re-request only missing or truncated sections instead of the whole digest
+            summary_result = repair_summary_result(provider_registry.get_summarizer(*backend), summary_result, context)
             
             # Update the digest with the summary information
-            digest.content = summary_result["summary"]
-            digest.tokens_used = summary_result["usage"]["total_tokens"]
-            digest.cost = summary_result["usage"]["estimated_cost_usd"]
-            # Correctly save the actual model name from the result
-            digest.model_version = summary_result["usage"].get("model", "unknown")
-            digest.generated_at = datetime.utcnow()
-            # Merge usage data into extra_data, preserving existing keys if any
-            if not digest.extra_data:
-                digest.extra_data = {}
-            digest.extra_data.update(summary_result["usage"])
-            # Ensure summary_format and provider are also stored
-            digest.extra_data["summary_format"] = summary_format.value
-            digest.extra_data["provider"] = provider
+            apply_summary_result(digest, summary_result, context)
+            record_processing_log(digest, started_at, summary_result)
+            # Cut the other digest types from this one when all formats were requested
+            derive_all_formats(db, digest)
             
             db.commit()
-            logger.info(f"Digest {digest_id} for video {video.id} generated successfully")
+            logger.info(f"Digest {digest_id} for video {digest.video_id} generated successfully")
             
         except SummaryGenerationError as e:
             logger.error(f"Error generating summary: {str(e)}")
-            digest.extra_data = {"error": str(e)}
+            record_generation_error(digest, str(e), retry_after=getattr(e, "retry_after", None))
+            if started_at:
+                record_processing_log(digest, started_at, error=str(e))
             db.commit()
         except Exception as e:
             logger.error(f"Unexpected error in digest generation: {str(e)}", exc_info=True)
-            digest.extra_data = {"error": f"Unexpected error: {str(e)}"}
+            record_generation_error(digest, f"Unexpected error: {str(e)}")
             db.commit()
     finally:
         db.close()
 
-@router.get("/digests/", response_model=List[DigestResponse])
-async def list_digests(video_id: Optional[int] = None, db: Session = Depends(get_db)):
-    """Get all digests or filter by video_id if provided"""
+async def adapt_digest_background(digest_id: int):
+    """Background task rewriting the sections of a cloned digest that do not fit its video."""
+    db = WorkerSessionLocal()
     try:
-        query = db.query(DigestModel)
-        
-        if video_id is not None:
-            query = query.filter(DigestModel.video_id == video_id)
-            
-        return query.all()
+        digest = db.query(DigestModel).filter(DigestModel.id == digest_id).first()
+        if not digest:
+            logger.error(f"Digest {digest_id} not found")
+            return
+        try:
+            adapt_cloned_digest(db, digest)
+            db.commit()
+        except SummaryGenerationError as e:
+            # The cloned content stays; only the adaptation failed
+            logger.error(f"Error adapting cloned digest {digest_id}: {str(e)}")
+            db.rollback()
+        except Exception as e:
+            logger.error(f"Unexpected error adapting cloned digest {digest_id}: {str(e)}", exc_info=True)
+            db.rollback()
+    finally:
+        db.close()
+
+def reuse_near_duplicate(db: Session, digest_create: DigestCreate, digest: DigestModel, video: VideoModel, background_tasks: BackgroundTasks) -> bool:
+    """
+    Fill a digest from a near-duplicate video's digest when the request asks for reuse.
+
+    Returns:
+        True if a digest was cloned (and committed); adaptation of sections that
+        do not fit the video continues in the background
+    """
+    if not (digest_create.reuse_duplicates or digest_create.reuse_digest_id):
+        return False
+    sections = reuse_duplicate_digest(db, digest, video, digest_create.reuse_digest_id)
+    if sections is None:
+        if digest_create.reuse_digest_id:
+            raise HTTPException(status_code=400, detail="Digest cannot be reused: it is not from a near-duplicate video or lacks this digest type")
+        return False
+    db.commit()
+    db.refresh(digest)
+    if sections:
+        background_tasks.add_task(adapt_digest_background, digest.id)
+    return True
+
+@router.get("/digests/", response_model=List[DigestListItem])
+async def list_digests(
+    response: Response,
+    video_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    order: str = "desc",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get digests a page at a time, or only those of video_id if provided.
+
+    Pages are ordered by creation time; pass the X-Next-Cursor header of a
+    response as cursor to get the next page. Items carry a snippet of the
+    content; GET /digests/{id} returns all of it.
+    """
+    try:
+        criteria = [DigestModel.video_id == video_id] if video_id is not None else []
+        try:
+            digests, next_cursor = await fetch_page(
+                db, select(DigestModel).options(*digest_list_options()).where(*criteria),
+                DigestModel.id, DIGEST_SORT_KEYS, "created_at", order, limit, cursor
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total, estimated = await total_count(db, DigestModel.__table__, *criteria)
+        response.headers.update(page_headers(next_cursor, total, estimated))
+        return digests
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -172,6 +291,35 @@ async def get_digest(digest_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/digests/{digest_id}/stream")
+async def stream_digest(
+    digest_id: int,
+    offset: int = 0,
+    generate: bool = False,
+    last_event_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream a digest as Server-Sent Events.
+
+    Reconnecting clients resume from the Last-Event-ID header (or ?offset=),
+    which is the character offset of the last text received. An empty or
+    failed digest is generated (and billed) only with ?generate=true;
+    otherwise the stream ends with its stored error.
+    """
+    digest = db.query(DigestModel).filter(DigestModel.id == digest_id).first()
+    if digest is None:
+        raise HTTPException(status_code=404, detail="Digest not found")
+
+    if last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id)
+
+    return StreamingResponse(
+        relay_digest_stream(digest_id, max(offset, 0), generate=generate),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/videos/{video_id}/digests", response_model=List[DigestResponse])
 async def get_video_digests(video_id: int, db: Session = Depends(get_db)):
     """Get all digests for a specific video"""
@@ -188,6 +336,19 @@ async def get_video_digests(video_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/videos/{video_id}/reusable-digests", response_model=List[ReusableDigestOffer])
+async def get_reusable_digests(video_id: int, db: Session = Depends(get_db)):
+    """Get digests of videos with a near-identical transcript that can be reused for this video"""
+    try:
+        video = db.query(VideoModel).filter(VideoModel.id == video_id).first()
+        if video is None:
+            raise HTTPException(status_code=404, detail="Video not found")
+        return reuse_offers(db, video)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/users/{user_id}/digests", response_model=List[DigestResponse])
 async def get_user_digests(user_id: int, db: Session = Depends(get_db)):
     """Get all digests created by a specific user"""
@@ -204,18 +365,22 @@ async def get_user_digests(user_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/digests/", response_model=DigestResponse)
+@router.post("/digests/", response_model=Union[DigestResponse, DigestCostEstimate])
 async def create_digest(
     digest: DigestCreate,
     background_tasks: BackgroundTasks,
+    dry_run: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Create a new digest for a video"""
+    """Create a new digest for a video, or estimate its cost when dry_run is set"""
     try:
         # Check if video exists
         video = db.query(VideoModel).filter(VideoModel.id == digest.video_id).first()
         if video is None:
             raise HTTPException(status_code=404, detail="Video not found")
+
+        if dry_run:
+            return estimate_digest_cost(db, video, digest.provider, digest.digest_type)
         
         # Check if digest already exists for this video
         existing_digest = db.query(DigestModel).filter(
@@ -258,6 +423,21 @@ async def create_digest(
                 db.refresh(default_llm)
                 digest.llm_id = default_llm.id
         
+        # Reuse a near-duplicate video's digest or cut this type from the video's master digest
+        # instead of making a new model call
+        derived_digest = existing_digest or DigestModel(
+            video_id=digest.video_id,
+            user_id=digest.user_id,
+            digest_type=digest.digest_type,
+            llm_id=digest.llm_id
+        )
+        if reuse_near_duplicate(db, digest, derived_digest, video, background_tasks):
+            return derived_digest
+        if derive_digest(db, derived_digest):
+            db.commit()
+            db.refresh(derived_digest)
+            return derived_digest
+        
         # If we have an existing digest but it's empty, update it instead of creating a new one
         if existing_digest:
             logger.info(f"Updating existing empty digest for video ID: {digest.video_id}")
@@ -268,15 +448,21 @@ async def create_digest(
                     existing_digest.extra_data = {}
                 existing_digest.extra_data["provider"] = digest.provider
                 db.commit()
+            if digest.all_formats:
+                existing_digest.extra_data = {**(existing_digest.extra_data or {}), "all_formats": True}
+                db.commit()
                 
-            # Start background task to generate digest
-            background_tasks.add_task(generate_digest_background, existing_digest.id)
+            # Start background task to generate digest unless the client streams it
+            if not digest.stream:
+                background_tasks.add_task(generate_digest_background, existing_digest.id)
             return existing_digest
         
         # Prepare extra_data with provider if specified
         extra_data = None
         if digest.provider and digest.provider != "openai":
             extra_data = {"provider": digest.provider}
+        if digest.all_formats:
+            extra_data = {**(extra_data or {}), "all_formats": True}
             
         # Create new digest
         db_digest = DigestModel(
@@ -296,27 +482,34 @@ async def create_digest(
         db.commit()
         db.refresh(db_digest)
         
-        # Start background task to generate digest
-        background_tasks.add_task(generate_digest_background, db_digest.id)
+        # Start background task to generate digest unless the client streams it
+        if not digest.stream:
+            background_tasks.add_task(generate_digest_background, db_digest.id)
         
         return db_digest
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating digest: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/videos/{video_id}/digests", response_model=DigestResponse)
+@router.post("/videos/{video_id}/digests", response_model=Union[DigestResponse, DigestCostEstimate])
 async def create_video_digest(
     video_id: int,
     digest_create: DigestCreate,
     background_tasks: BackgroundTasks,
+    dry_run: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Create a new digest for a video"""
+    """Create a new digest for a video, or estimate its cost when dry_run is set"""
     try:
         # Validate video exists
         video = db.query(VideoModel).filter(VideoModel.id == video_id).first()
         if video is None:
             raise HTTPException(status_code=404, detail="Video not found")
+
+        if dry_run:
+            return estimate_digest_cost(db, video, digest_create.provider, digest_create.digest_type)
             
         # Check if transcript exists and is processed
         transcript = db.query(TranscriptModel).filter(
@@ -349,6 +542,21 @@ async def create_video_digest(
             if default_llm:
                 digest_create.llm_id = default_llm.id
                 
+        # Reuse a near-duplicate video's digest or cut this type from the video's master digest
+        # instead of making a new model call
+        derived_digest = existing_digest or DigestModel(
+            video_id=video_id,
+            user_id=digest_create.user_id,
+            digest_type=digest_create.digest_type,
+            llm_id=digest_create.llm_id
+        )
+        if reuse_near_duplicate(db, digest_create, derived_digest, video, background_tasks):
+            return derived_digest
+        if derive_digest(db, derived_digest):
+            db.commit()
+            db.refresh(derived_digest)
+            return derived_digest
+        
         # If we have an existing digest but it's empty, use it
         if existing_digest:
             logger.info(f"Updating existing empty digest for video ID: {video_id}")
@@ -359,15 +567,21 @@ async def create_video_digest(
                     existing_digest.extra_data = {}
                 existing_digest.extra_data["provider"] = digest_create.provider
                 db.commit()
+            if digest_create.all_formats:
+                existing_digest.extra_data = {**(existing_digest.extra_data or {}), "all_formats": True}
+                db.commit()
                 
-            # Start background task to generate digest
-            background_tasks.add_task(generate_digest_background, existing_digest.id)
+            # Start background task to generate digest unless the client streams it
+            if not digest_create.stream:
+                background_tasks.add_task(generate_digest_background, existing_digest.id)
             return existing_digest
             
         # Prepare extra_data with provider if specified
         extra_data = None
         if digest_create.provider and digest_create.provider != "openai":
             extra_data = {"provider": digest_create.provider}
+        if digest_create.all_formats:
+            extra_data = {**(extra_data or {}), "all_formats": True}
             
         # Create new digest
         digest = DigestModel(
@@ -387,10 +601,13 @@ async def create_video_digest(
         db.commit()
         db.refresh(digest)
         
-        # Start background task to generate digest
-        background_tasks.add_task(generate_digest_background, digest.id)
+        # Start background task to generate digest unless the client streams it
+        if not digest_create.stream:
+            background_tasks.add_task(generate_digest_background, digest.id)
         
         return digest
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating digest: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -7,6 +7,7 @@ from datetime import datetime
 from app.db.database import get_db
 from app.models.llm import LLM as LLMModel
 from app.models.processing_log import ProcessingLog as ProcessingLogModel
+from app.services.processing_rollups import apply_to_rollups
 
 router = APIRouter()
 
@@ -27,13 +28,14 @@ class LLMResponse(LLMBase):
         from_attributes = True
 
 class ProcessingLogBase(BaseModel):
-    video_id: int
-    llm_id: int
+    video_id: Optional[int] = None
+    llm_id: Optional[int] = None
     request_type: str
     tokens_used: int
     cost_estimate: float
     input_tokens: Optional[int] = None
     output_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
     duration_ms: Optional[int] = None
     started_at: datetime
     completed_at: Optional[datetime] = None
@@ -147,6 +149,7 @@ async def create_processing_log(log: ProcessingLogCreate, db: Session = Depends(
             cost_estimate=log.cost_estimate,
             input_tokens=log.input_tokens,
             output_tokens=log.output_tokens,
+            cached_tokens=log.cached_tokens,
             duration_ms=log.duration_ms,
             started_at=log.started_at,
             completed_at=log.completed_at,
@@ -156,6 +159,9 @@ async def create_processing_log(log: ProcessingLogCreate, db: Session = Depends(
         )
         
         db.add(db_log)
+        db.flush()
+        # Roll up the row as stored, with its column defaults and converted types
+        apply_to_rollups(db, [{column.key: getattr(db_log, column.key) for column in ProcessingLogModel.__table__.c}])
         db.commit()
         db.refresh(db_log)
         
@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from typing import Any, Dict
+
+from app.db.database import pool_metrics
+from app.services.processing_log_buffer import processing_log_buffer
+from app.services.provider_router import provider_router
+from app.services.summarizers.resilience import resilience_snapshot
+
+router = APIRouter()
+
+@router.get("/metrics/")
+async def get_metrics() -> Dict[str, Any]:
+    """Get in-process health: routing latency, circuit breakers, retry budget, processing log buffer and database pools"""
+    return {
+        "providers": provider_router.snapshot(),
+        **resilience_snapshot(),
+        "processing_logs": processing_log_buffer.snapshot(),
+        "db_pools": pool_metrics()
+    }
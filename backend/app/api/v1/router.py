@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import videos, channels, transcripts, digests, users, categories, llms
+from app.api.v1 import videos, channels, transcripts, digests, users, categories, llms, metrics, analytics, search, suggestions
 
 api_router = APIRouter()
 
@@ -11,3 +11,7 @@ api_router.include_router(digests.router, tags=["digests"])
 api_router.include_router(users.router, tags=["users"])
 api_router.include_router(categories.router, tags=["categories"])
 api_router.include_router(llms.router, tags=["llms"])
+api_router.include_router(metrics.router, tags=["metrics"])
+api_router.include_router(analytics.router, tags=["analytics"])
+api_router.include_router(search.router, tags=["search"])
+api_router.include_router(suggestions.router, tags=["suggestions"])
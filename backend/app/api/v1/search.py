@@ -0,0 +1,47 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+from pydantic import BaseModel
+
+from app.db.database import AsyncSession, get_async_db
+from app.services.search import search
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+class SearchHit(BaseModel):
+    """A matching video, transcript or digest with highlighted fragments of its text."""
+    source: str
+    id: int
+    video_id: int
+    youtube_id: str
+    title: str
+    rank: float
+    # Fragments of the matching text with matched words wrapped in <mark> tags;
+    # the text itself is not escaped
+    headline: Optional[str] = None
+
+@router.get("/search", response_model=List[SearchHit])
+async def search_library(
+    q: str = Query(..., min_length=1, max_length=200),
+    sources: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Search video titles and descriptions, transcripts and digests, best matches first.
+
+    q supports web search syntax: "quoted phrases", or, and -excluded words.
+    sources restricts the search to some of videos, transcripts and digests.
+    """
+    try:
+        try:
+            return await search(db, q, sources, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Search for '{q}' failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,41 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+from pydantic import BaseModel
+
+from app.db.database import AsyncSession, get_async_db
+from app.services.suggestions import suggest
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+class Suggestion(BaseModel):
+    """A suggested name with the ID of its video, channel or tag."""
+    id: int
+    label: str
+
+class SuggestResponse(BaseModel):
+    titles: List[Suggestion]
+    channels: List[Suggestion]
+    tags: List[Suggestion]
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest_names(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(5, ge=1, le=10),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Suggest video titles, channel names and tags as the user types.
+
+    Input of two characters matches the start of names, longer input any
+    part of them. At most limit suggestions of each kind are returned.
+    """
+    if len(q.strip()) < 2:
+        raise HTTPException(status_code=400, detail="Query must have at least 2 characters")
+    try:
+        return await suggest(db, q, limit)
+    except Exception as e:
+        logger.error(f"Suggestions for '{q}' failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -4,10 +4,13 @@ from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.db.database import get_db, SessionLocal
+from app.db.database import get_db, WorkerSessionLocal
 from app.models.transcript import Transcript as TranscriptModel
 from app.models.video import Video as VideoModel
 from app.services.transcript_service import TranscriptService, VideoTranscriptError
+from app.services.list_projections import transcript_list_options
+from app.services.tokenizer import count_tokens
+from app.services.transcript_similarity import transcript_index, transcript_signature
 
 import logging
 logger = logging.getLogger(__name__)
@@ -25,6 +28,7 @@ class TranscriptCreate(TranscriptBase):
 
 class TranscriptResponse(TranscriptBase):
     id: int
+    token_count: Optional[int] = None
     fetched_at: Optional[datetime] = None
     processed_at: Optional[datetime] = None
     error_log: Optional[Dict[str, Any]] = None
@@ -34,9 +38,24 @@ class TranscriptResponse(TranscriptBase):
     class Config:
         from_attributes = True
 
+class TranscriptListItem(BaseModel):
+    """Transcript status and size for list endpoints, without the transcript itself."""
+    id: int
+    video_id: int
+    source_url: Optional[str] = None
+    status: Optional[str] = None
+    token_count: Optional[int] = None
+    fetched_at: Optional[datetime] = None
+    processed_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 async def process_transcript_background(video_id: int, transcript_id: int):
     """Background task for processing a transcript."""
-    db = SessionLocal()
+    db = WorkerSessionLocal()
     try:
         video = db.query(VideoModel).filter(VideoModel.id == video_id).first()
         transcript = db.query(TranscriptModel).filter(TranscriptModel.id == transcript_id).first()
@@ -50,11 +69,14 @@ async def process_transcript_background(video_id: int, transcript_id: int):
             transcript_text, transcript_info = transcript_service.extract_transcript(video.url)
             
             transcript.content = transcript_text
+            transcript.token_count = count_tokens(transcript_text)
+            transcript.minhash_signature = transcript_signature(transcript_text)
             transcript.source_url = transcript_info.get('source')
             transcript.status = "processed"
             transcript.processed_at = datetime.utcnow()
             transcript.error_log = None
             db.commit()
+            transcript_index.add_transcript(transcript)
             
             logger.info(f"Successfully processed transcript {transcript_id} for video {video_id}")
             
@@ -69,11 +91,11 @@ async def process_transcript_background(video_id: int, transcript_id: int):
     finally:
         db.close()
 
-@router.get("/transcripts/", response_model=List[TranscriptResponse])
+@router.get("/transcripts/", response_model=List[TranscriptListItem])
 async def list_transcripts(db: Session = Depends(get_db)):
-    """Get all transcripts"""
+    """Get all transcripts, without their content (see GET /transcripts/{id})"""
     try:
-        return db.query(TranscriptModel).all()
+        return db.query(TranscriptModel).options(*transcript_list_options()).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -88,15 +110,15 @@ async def get_transcript(transcript_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/videos/{video_id}/transcripts", response_model=List[TranscriptResponse])
+@router.get("/videos/{video_id}/transcripts", response_model=List[TranscriptListItem])
 async def get_video_transcripts(video_id: int, db: Session = Depends(get_db)):
-    """Get all transcripts for a specific video"""
+    """Get all transcripts for a specific video, without their content"""
     try:
         video = db.query(VideoModel).filter(VideoModel.id == video_id).first()
         if video is None:
             raise HTTPException(status_code=404, detail="Video not found")
             
-        transcripts = db.query(TranscriptModel).filter(
+        transcripts = db.query(TranscriptModel).options(*transcript_list_options()).filter(
             TranscriptModel.video_id == video_id
         ).all()
         
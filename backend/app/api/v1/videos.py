@@ -1,12 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
 from pydantic import BaseModel, HttpUrl, validator, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
 import re
 
-from app.db.database import get_db, SessionLocal
+from app.db.database import AsyncSession, get_async_db, get_db, WorkerSessionLocal
 from app.models.video import Video as VideoModel, ProcessingStatus
 from app.models.channel import Channel as ChannelModel
 from app.models.transcript import Transcript as TranscriptModel, TranscriptStatus
@@ -19,7 +20,12 @@ from app.services.video_processor import (
     RateLimitError
 )
 from app.services.transcript_service import TranscriptService, VideoTranscriptError
+from app.services.list_projections import video_list_options
+from app.services.pagination import VIDEO_SORT_KEYS, InvalidCursorError, fetch_page, page_headers, total_count
+from app.services.transcript_similarity import transcript_index, transcript_signature
+from app.services.video_filters import SORT_BY, video_criteria
 from app.services.summarizers.openai_summarizer import OpenAISummarizer, SummaryGenerationError
+from app.services.tokenizer import count_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -86,10 +92,38 @@ class VideoResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class VideoListItem(BaseModel):
+    """Video as shown on a library card: snippets instead of full texts, and no chapters."""
+    id: int
+    youtube_id: str
+    title: str
+    url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    duration: int
+    view_count: Optional[int] = None
+    like_count: Optional[int] = None
+    description: Optional[str] = Field(None, validation_alias="description_snippet")
+    tags: Optional[List[str]] = None
+    categories: Optional[List[str]] = None
+    channel_id: int
+    channel: Optional[ChannelInfo] = None
+    summary: Optional[str] = Field(None, validation_alias="summary_snippet")
+    has_digest: bool = False
+    processed: bool = False
+    error_message: Optional[str] = None
+    processing_status: str = Field(..., description="Current processing status")
+    last_processed: Optional[datetime] = None
+    upload_date: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
 async def process_video_background(video_id: int):
     """Process video in the background."""
     # Create a new session for this background task
-    db = SessionLocal()
+    db = WorkerSessionLocal()
     try:
         # Get the video
         video = db.query(VideoModel).get(video_id)
@@ -125,6 +159,8 @@ async def process_video_background(video_id: int):
                     transcript = TranscriptModel(
                         video_id=video_id,
                         content=transcript_text,
+                        token_count=count_tokens(transcript_text),
+                        minhash_signature=transcript_signature(transcript_text),
                         source_url=meta.get('source', 'unknown'),
                         status=TranscriptStatus.PROCESSED,
                         fetched_at=datetime.utcnow(),
@@ -133,6 +169,7 @@ async def process_video_background(video_id: int):
                     db.add(transcript)
                     db.commit()
                     db.refresh(transcript)
+                    transcript_index.add_transcript(transcript)
                     
                     logger.info(f"[Background Task] Transcript saved for video ID: {video_id}")
                 except Exception as e:
@@ -371,132 +408,156 @@ async def process_video(
         logger.error(f"Error processing video: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/videos/", response_model=List[VideoResponse])
+def video_detail_options() -> List[Any]:
+    """Load options for a full video response: the channel, and the latest digest's content in the same query."""
+    return [
+        selectinload(VideoModel.channel),
+        joinedload(VideoModel.latest_digest).load_only(DigestModel.content)
+    ]
+
+def map_video_response(video: VideoModel) -> VideoModel:
+    """Map fields for API compatibility, with the latest digest's content as summary."""
+    video.url = video.webpage_url
+    video.thumbnail_url = video.thumbnail
+    if video.latest_digest is not None:
+        video.summary = video.latest_digest.content
+    return video
+
+async def fetch_video_response(db: AsyncSession, *criteria: Any) -> VideoModel:
+    """Load one video with its channel and latest summary, or raise a 404."""
+    result = await db.execute(select(VideoModel).options(*video_detail_options()).where(*criteria))
+    video = result.scalars().first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return map_video_response(video)
+
+def map_video_list_item(video: VideoModel) -> VideoModel:
+    """Map fields of a video loaded with video_list_options for VideoListItem."""
+    video.url = video.webpage_url
+    video.thumbnail_url = video.thumbnail
+    video.has_digest = video.latest_digest_id is not None
+    return video
+
+async def fetch_video_page(
+    db: AsyncSession,
+    response: Response,
+    criteria: List[Any],
+    sort: str,
+    order: Optional[str],
+    limit: int,
+    cursor: Optional[str]
+) -> List[VideoModel]:
+    """One keyset-paginated page of videos, with paging headers set on the response."""
+    statement = select(VideoModel).outerjoin(
+        DigestModel, DigestModel.id == VideoModel.latest_digest_id
+    ).options(*video_list_options()).where(*criteria)
+    try:
+        videos, next_cursor = await fetch_page(db, statement, VideoModel.id, VIDEO_SORT_KEYS, sort, order, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total, estimated = await total_count(db, VideoModel.__table__, *criteria)
+    response.headers.update(page_headers(next_cursor, total, estimated))
+    return videos
+
+def library_criteria(
+    time_range: Optional[str],
+    has_digest: Optional[bool],
+    category: Optional[str],
+    processing_status: Optional[str]
+) -> List[Any]:
+    try:
+        return video_criteria(time_range, has_digest, category, processing_status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def resolve_sort(sort: str, sort_by: Optional[str]) -> str:
+    """Sort key to use, where the library view's sort_by takes precedence over sort."""
+    if sort_by is None:
+        return sort
+    if sort_by not in SORT_BY:
+        raise HTTPException(status_code=400, detail=f"Unknown sort_by '{sort_by}', expected one of: {', '.join(SORT_BY)}")
+    return SORT_BY[sort_by]
+
+@router.get("/videos/", response_model=List[VideoListItem])
 async def list_videos(
-    skip: int = 0, 
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    sort: str = "created_at",
+    order: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    time_range: Optional[str] = None,
+    has_digest: Optional[bool] = None,
+    category: Optional[str] = None,
+    processing_status: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all videos with pagination"""
+    """
+    Get videos a page at a time, filtered and sorted in the database.
+
+    Sorts by sort (created_at, upload_date, view_count or title) or by the
+    library view's sort_by (date, views, title or relevance), in order or the
+    key's usual direction. Filters by upload time range (day, week, month,
+    year), whether a digest exists, category and processing status.
+
+    Pass the X-Next-Cursor header of a response as cursor to get the next page;
+    the header is absent on the last page. X-Total-Count is the total number of
+    matching videos, estimated on large unfiltered tables (X-Total-Count-Estimated).
+    """
     try:
-        videos = db.query(VideoModel).offset(skip).limit(limit).all()
-        
-        # Get all video IDs
-        video_ids = [video.id for video in videos]
-        
-        # Get the latest digest for each video
-        latest_digests = {}
-        if video_ids:
-            # Use a subquery to get the latest digest for each video_id
-            from sqlalchemy import func
-            
-            # Get the maximum generated_at timestamp for each video_id
-            latest_digest_times = db.query(
-                DigestModel.video_id,
-                func.max(DigestModel.generated_at).label('latest_time')
-            ).filter(DigestModel.video_id.in_(video_ids)).group_by(DigestModel.video_id).subquery()
-            
-            # Join with the digests table to get the actual digest records
-            latest_digest_query = db.query(DigestModel).join(
-                latest_digest_times,
-                (DigestModel.video_id == latest_digest_times.c.video_id) & 
-                (DigestModel.generated_at == latest_digest_times.c.latest_time)
-            )
-            
-            # Create a dictionary mapping video_id to digest
-            for digest in latest_digest_query:
-                latest_digests[digest.video_id] = digest
-        
-        # Map fields for API compatibility and add summaries
-        for video in videos:
-            video.url = video.webpage_url
-            video.thumbnail_url = video.thumbnail
-            
-            # Add summary from the latest digest if available
-            if video.id in latest_digests:
-                video.summary = latest_digests[video.id].content
-                
-        return videos
+        criteria = library_criteria(time_range, has_digest, category, processing_status)
+        videos = await fetch_video_page(db, response, criteria, resolve_sort(sort, sort_by), order, limit, cursor)
+        return [map_video_list_item(video) for video in videos]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/videos/{video_id}", response_model=VideoResponse)
-async def get_video(video_id: int, db: Session = Depends(get_db)):
+async def get_video(video_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific video"""
     try:
-        video = db.query(VideoModel).filter(VideoModel.id == video_id).first()
-        if not video:
-            raise HTTPException(status_code=404, detail="Video not found")
-        
-        # Map fields for API compatibility
-        video.url = video.webpage_url
-        video.thumbnail_url = video.thumbnail
-        
-        # Get the latest digest for this video and set the summary
-        latest_digest = db.query(DigestModel).filter(
-            DigestModel.video_id == video_id
-        ).order_by(DigestModel.generated_at.desc()).first()
-        
-        if latest_digest:
-            # Map content to summary for API compatibility
-            video.summary = latest_digest.content
-            
-        return video
+        return await fetch_video_response(db, VideoModel.id == video_id)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/videos/youtube/{youtube_id}", response_model=VideoResponse)
-async def get_video_by_youtube_id(youtube_id: str, db: Session = Depends(get_db)):
+async def get_video_by_youtube_id(youtube_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get a specific video by YouTube ID"""
     try:
-        video = db.query(VideoModel).filter(VideoModel.youtube_id == youtube_id).first()
-        if not video:
-            raise HTTPException(status_code=404, detail="Video not found")
-        
-        # Map fields for API compatibility
-        video.url = video.webpage_url
-        video.thumbnail_url = video.thumbnail
-        
-        # Get the latest digest for this video and set the summary
-        latest_digest = db.query(DigestModel).filter(
-            DigestModel.video_id == video.id
-        ).order_by(DigestModel.generated_at.desc()).first()
-        
-        if latest_digest:
-            # Map content to summary for API compatibility
-            video.summary = latest_digest.content
-            
-        return video
+        return await fetch_video_response(db, VideoModel.youtube_id == youtube_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/channels/{channel_id}/videos", response_model=List[VideoResponse])
+@router.get("/channels/{channel_id}/videos", response_model=List[VideoListItem])
 async def get_channel_videos(
     channel_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    sort: str = "created_at",
+    order: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    time_range: Optional[str] = None,
+    has_digest: Optional[bool] = None,
+    category: Optional[str] = None,
+    processing_status: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all videos for a specific channel"""
+    """Get the videos of a specific channel a page at a time, filtered and paginated like /videos/"""
     try:
         # Check if channel exists
-        channel = db.query(ChannelModel).filter(ChannelModel.id == channel_id).first()
+        channel = await db.get(ChannelModel, channel_id)
         if not channel:
             raise HTTPException(status_code=404, detail="Channel not found")
         
-        # Get videos for channel
-        videos = db.query(VideoModel).filter(
-            VideoModel.channel_id == channel_id
-        ).offset(skip).limit(limit).all()
-        
-        # Map fields for API compatibility
-        for video in videos:
-            video.url = video.webpage_url
-            video.thumbnail_url = video.thumbnail
-            
-        return videos
+        criteria = [VideoModel.channel_id == channel_id] + library_criteria(time_range, has_digest, category, processing_status)
+        videos = await fetch_video_page(db, response, criteria, resolve_sort(sort, sort_by), order, limit, cursor)
+        return [map_video_list_item(video) for video in videos]
     except HTTPException:
         raise
     except Exception as e:
@@ -530,6 +591,8 @@ async def generate_summary(
                 transcript = TranscriptModel(
                     video_id=video_id,
                     content=transcript_text,
+                    token_count=count_tokens(transcript_text),
+                    minhash_signature=transcript_signature(transcript_text),
                     source_url=meta.get('source', 'unknown'),
                     status=TranscriptStatus.PROCESSED,
                     fetched_at=datetime.utcnow(),
@@ -538,6 +601,7 @@ async def generate_summary(
                 db.add(transcript)
                 db.commit()
                 db.refresh(transcript)
+                transcript_index.add_transcript(transcript)
                 
                 # Update video status
                 video.processing_status = ProcessingStatus.SUMMARIZING
@@ -1,12 +1,90 @@
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.db.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_snapshot
+
+logger = logging.getLogger(__name__)
+
+try:
+    import asyncpg  # noqa: F401
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+    ASYNC_DB_AVAILABLE = True
+except ImportError:
+    ASYNC_DB_AVAILABLE = False
+    logger.warning("asyncpg or sqlalchemy[asyncio] not installed. Async read endpoints will run sync sessions in a thread pool.")
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+def build_engine(pool_size: int, max_overflow: int, statement_timeout_ms: int) -> Engine:
+    """
+    Create an engine with an instrumented connection pool.
+
+    Connections are checked with a ping before use and recycled after
+    DB_POOL_RECYCLE_SECONDS, so connections dropped by the server or a proxy
+    are replaced instead of failing a request. A statement timeout of 0 means none.
+    """
+    connect_args: Dict[str, Any] = {}
+    if statement_timeout_ms and SQLALCHEMY_DATABASE_URL.startswith("postgresql"):
+        connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+    return create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args
+    )
+
+# API requests and background work use separate pools, so a burst of
+# background tasks cannot take every connection from request handlers
+engine = build_engine(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS)
+worker_engine = build_engine(settings.WORKER_DB_POOL_SIZE, settings.WORKER_DB_MAX_OVERFLOW, settings.WORKER_DB_STATEMENT_TIMEOUT_MS)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
+
+def async_database_url(url: str) -> Optional[str]:
+    """The asyncpg form of a PostgreSQL URL, or None for other databases."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return None
+
+def build_async_engine(url: str, pool_size: int, max_overflow: int, statement_timeout_ms: int) -> "AsyncEngine":
+    """Create an asyncpg engine with the same pool settings as build_engine."""
+    server_settings: Dict[str, str] = {}
+    if statement_timeout_ms:
+        server_settings["statement_timeout"] = str(statement_timeout_ms)
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"server_settings": server_settings}
+    )
+
+# Hot read endpoints await their queries on their own asyncpg pool instead of
+# blocking the event loop; everything else keeps the sync sessions
+ASYNC_DATABASE_URL = async_database_url(SQLALCHEMY_DATABASE_URL)
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB_AVAILABLE and ASYNC_DATABASE_URL:
+    async_engine = build_async_engine(
+        ASYNC_DATABASE_URL, settings.ASYNC_DB_POOL_SIZE, settings.ASYNC_DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
 
 Base = declarative_base()
 
@@ -16,3 +94,63 @@ def get_db():
         yield db
     finally:
         db.close()
+
+class SyncSessionAdapter:
+    """
+    Awaitable front for a sync Session, used when the async stack is unavailable.
+
+    Offers the part of the AsyncSession interface the read endpoints use and
+    runs each call in the thread pool, so the event loop is still not blocked.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.session.execute, statement, *args, **kwargs)
+
+    async def scalar(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.session.scalar, statement, *args, **kwargs)
+
+    async def scalars(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.session.scalars, statement, *args, **kwargs)
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any) -> Any:
+        return await run_in_threadpool(self.session.get, entity, ident, **kwargs)
+
+    def get_bind(self) -> Any:
+        return self.session.get_bind()
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.session.close)
+
+if not ASYNC_DB_AVAILABLE:
+    # Lets endpoints annotate their session as AsyncSession either way
+    AsyncSession = SyncSessionAdapter
+
+async def get_async_db() -> AsyncIterator[Any]:
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SyncSessionAdapter(SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Connection pool usage and checkout waits for the metrics endpoint."""
+    metrics = {
+        "api": pool_snapshot(engine.pool),
+        "worker": pool_snapshot(worker_engine.pool)
+    }
+    if async_engine is not None:
+        metrics["api_async"] = pool_snapshot(async_engine.pool)
+    return metrics
+
+async def dispose_engines() -> None:
+    engine.dispose()
+    worker_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -0,0 +1,93 @@
+"""
+Connection pool instrumentation.
+
+InstrumentedQueuePool times how long each checkout waits for a connection and
+counts checkouts that time out, so pool exhaustion shows up in /metrics before
+requests start failing with "QueuePool limit ... reached".
+"""
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+class PoolStats:
+    """Rolling window of checkout wait times plus checkout and timeout counters."""
+
+    def __init__(self, window: int = 1000):
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self._waits.append(seconds)
+
+    def wait_percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            waits = sorted(self._waits)
+        if not waits:
+            return None
+        return waits[min(len(waits) - 1, int(fraction * len(waits)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95 = self.wait_percentile(0.50), self.wait_percentile(0.95)
+        with self._lock:
+            max_wait = max(self._waits) if self._waits else None
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+                "wait_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+                "wait_max_ms": round(max_wait * 1000, 2) if max_wait is not None else None
+            }
+
+class _CheckoutTiming:
+    """Mixin for QueuePool subclasses recording checkout wait times in their stats."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> Any:
+        # Keep the stats across engine.dispose()
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+class InstrumentedQueuePool(_CheckoutTiming, QueuePool):
+    """QueuePool that records checkout wait times."""
+
+class InstrumentedAsyncQueuePool(_CheckoutTiming, AsyncAdaptedQueuePool):
+    """Pool of async engines that records checkout wait times."""
+
+def pool_snapshot(pool: Any) -> Dict[str, Any]:
+    """Current size and usage of a pool, with its wait statistics when instrumented."""
+    snapshot: Dict[str, Any] = {}
+    if isinstance(pool, QueuePool):
+        snapshot.update({
+            "size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0)
+        })
+    if isinstance(pool, _CheckoutTiming):
+        snapshot.update(pool.stats.snapshot())
+    return snapshot
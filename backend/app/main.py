@@ -2,6 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import api_router
 from app.core.config import settings
+from app.db.database import dispose_engines
+from app.services.provider_registry import provider_registry
+from app.services.provider_router import provider_router
+from app.services.processing_log_buffer import processing_log_buffer
 import logging
 import sys
 
@@ -30,6 +34,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated"],
 )
 
 # Include routers
@@ -47,3 +52,12 @@ async def root():
 async def startup_event():
     logger.info("Starting up YouTube Digest API")
     logger.info(f"OpenAI API key present: {bool(settings.OPENAI_API_KEY)}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Shutting down YouTube Digest API")
+    provider_router.shutdown()
+    provider_registry.shutdown()
+    # Write buffered processing logs before the process exits
+    processing_log_buffer.shutdown()
+    await dispose_engines()
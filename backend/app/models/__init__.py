@@ -7,8 +7,11 @@ from .transcript import Transcript, TranscriptStatus
 from .llm import LLM
 from .digest import Digest
 from .processing_log import ProcessingLog
+from .processing_rollup import ProcessingRollup, RollupGranularity
 from .user_digest import UserDigest
 from .digest_interaction import DigestInteraction, ActionType
+from .regeneration_job import RegenerationJob, RegenerationStatus
+from .tag import Tag
 
 __all__ = [
     'Base',
@@ -23,7 +26,12 @@ __all__ = [
     'LLM',
     'Digest',
     'ProcessingLog',
+    'ProcessingRollup',
+    'RollupGranularity',
     'UserDigest',
     'DigestInteraction',
     'ActionType',
+    'RegenerationJob',
+    'RegenerationStatus',
+    'Tag',
 ]
@@ -1,9 +1,17 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
-from sqlalchemy import Column, DateTime
+from sqlalchemy import DDL, Column, DateTime, event
 
 Base = declarative_base()
 
+# Text search configuration of the search_vector columns; search queries must
+# be parsed with the same one so their lexemes are stemmed alike
+SEARCH_CONFIG = "english"
+
+# Trigram indexes (gin_trgm_ops) need the pg_trgm extension; migrations create it too
+event.listen(Base.metadata, "before_create",
+             DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
 class TimestampMixin:
     """Mixin to add created_at and updated_at timestamps to models."""
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, Text, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -46,3 +46,6 @@ class Channel(Base, TimestampMixin):
     def __repr__(self):
         """String representation of the channel."""
         return f"<Channel(id={self.id}, name='{self.name}', youtube_id='{self.youtube_channel_id}')>"
+
+# Typeahead matches names by substring (services.suggestions)
+Index("ix_channels_name_trgm", Channel.name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, Text, DateTime, ForeignKey, Float, Index, Enum as SQLEnum, event, inspect, select, update
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, query_expression, relationship
+from sqlalchemy.orm.util import identity_key
 from enum import Enum
+from typing import Iterable, Set
 
-from .base import Base, TimestampMixin
+from .base import Base, SEARCH_CONFIG, TimestampMixin
+from .video import Video
 
 class DigestType(str, Enum):
     """Types of digests that can be generated."""
@@ -19,6 +23,8 @@ class Digest(Base, TimestampMixin):
     generated using various LLM models.
     """
     __tablename__ = "digests"
+    # search_vector stays out of the mapper so loads and inserts never carry it
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
 
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -37,6 +43,8 @@ class Digest(Base, TimestampMixin):
     # Digest content
     content = Column(Text, nullable=False,
                    comment="The actual digest text content")
+    search_vector = Column(TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True),
+                           comment="Full-text search vector of content, generated by the database on write")
     digest_type = Column(SQLEnum(DigestType), nullable=False,
                         comment="Type of digest generated")
     
@@ -47,6 +55,8 @@ class Digest(Base, TimestampMixin):
                  comment="Cost of generation in USD")
     model_version = Column(String(50), nullable=False,
                           comment="Specific version of LLM used")
+    prompt_version = Column(Integer, nullable=True, index=True,
+                           comment="Version of the digest prompt template used")
     
     # Timestamps
     generated_at = Column(DateTime(timezone=True), nullable=False,
@@ -66,6 +76,9 @@ class Digest(Base, TimestampMixin):
                               cascade="all, delete-orphan")
     digest_interactions = relationship("DigestInteraction", back_populates="digest",
                                      cascade="all, delete-orphan")
+
+    # Filled only by list queries (services.list_projections), which skip the full content
+    content_snippet = query_expression()
     
     def __repr__(self):
         """String representation of the digest."""
@@ -75,3 +88,59 @@ class Digest(Base, TimestampMixin):
     def token_cost(self) -> float:
         """Calculate the cost per token."""
         return self.cost / self.tokens_used if self.tokens_used > 0 else 0
+
+# Keyset pagination index for digest listings
+Index("ix_digests_created_at_id", Digest.created_at, Digest.id)
+# A video's digest of a given type, when creating or deriving digests
+Index("ix_digests_video_type", Digest.video_id, Digest.digest_type)
+# A video's digests newest first, also for maintaining Video.latest_digest_id
+Index("ix_digests_video_generated_at_id", Digest.video_id, Digest.generated_at, Digest.id)
+# Full-text search (services.search)
+Index("ix_digests_search_vector", Digest.search_vector, postgresql_using="gin")
+
+def refresh_latest_digests(connection: Connection, video_ids: Iterable[int]) -> None:
+    """Point videos.latest_digest_id at each video's digest with the latest generated_at."""
+    video_ids = sorted(video_ids)
+    videos, digests = Video.__table__, Digest.__table__
+    latest = select(digests.c.id).where(digests.c.video_id == videos.c.id).order_by(
+        digests.c.generated_at.desc(), digests.c.id.desc()
+    ).limit(1).scalar_subquery()
+    # Lock the videos first: the UPDATE then runs with a snapshot that includes
+    # digests committed meanwhile by another writer of the same videos
+    connection.execute(select(videos.c.id).where(videos.c.id.in_(video_ids)).with_for_update())
+    connection.execute(
+        update(videos).where(videos.c.id.in_(video_ids))
+        # Keep updated_at: the video itself did not change
+        .values(latest_digest_id=latest, updated_at=videos.c.updated_at)
+    )
+
+def _videos_with_changed_digests(session: Session) -> Set[int]:
+    video_ids: Set[int] = set()
+    for digest in list(session.new) + list(session.deleted):
+        if isinstance(digest, Digest):
+            video_ids.add(digest.video_id)
+    for digest in session.dirty:
+        if not isinstance(digest, Digest):
+            continue
+        state = inspect(digest)
+        moved = state.attrs.video_id.history
+        if moved.has_changes() or state.attrs.generated_at.history.has_changes():
+            video_ids.add(digest.video_id)
+            video_ids.update(moved.deleted)
+    video_ids.discard(None)
+    return video_ids
+
+@event.listens_for(Session, "after_flush")
+def _maintain_latest_digest(session: Session, flush_context) -> None:
+    # Runs inside the flush's transaction, so the pointer commits or rolls back with the digests
+    video_ids = _videos_with_changed_digests(session)
+    if video_ids:
+        refresh_latest_digests(session.connection(), video_ids)
+        session.info.setdefault("latest_digest_videos", set()).update(video_ids)
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expire_latest_digest(session: Session, flush_context) -> None:
+    for video_id in session.info.pop("latest_digest_videos", ()):
+        video = session.identity_map.get(identity_key(Video, video_id))
+        if video is not None:
+            session.expire(video, ["latest_digest_id", "latest_digest"])
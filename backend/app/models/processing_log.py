@@ -11,6 +11,8 @@ class RequestType(str, Enum):
     ANALYZE_SENTIMENT = "analyze_sentiment"
     GENERATE_CHAPTERS = "generate_chapters"
     EXTRACT_HIGHLIGHTS = "extract_highlights"
+    EXTRACT_METADATA = "extract_metadata"      # yt-dlp video info extraction
+    EXTRACT_TRANSCRIPT = "extract_transcript"  # yt-dlp subtitle extraction
     CUSTOM = "custom"
 
 class ProcessingLog(Base, TimestampMixin):
@@ -25,11 +27,11 @@ class ProcessingLog(Base, TimestampMixin):
     
     # Foreign keys
     video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), 
-                     nullable=False, index=True,
-                     comment="Associated video")
+                     nullable=True, index=True,
+                     comment="Associated video; empty for extractions before the video is stored")
     llm_id = Column(Integer, ForeignKey("llms.id"), 
-                   nullable=False, index=True,
-                   comment="LLM model used")
+                   nullable=True, index=True,
+                   comment="LLM model used; empty for non-LLM calls")
     
     # Processing information
     request_type = Column(SQLEnum(RequestType), nullable=False,
@@ -44,6 +46,8 @@ class ProcessingLog(Base, TimestampMixin):
                          comment="Number of input tokens")
     output_tokens = Column(Integer, nullable=True,
                          comment="Number of output tokens")
+    cached_tokens = Column(Integer, nullable=True,
+                          comment="Input tokens served from the provider prompt cache")
     duration_ms = Column(Integer, nullable=True,
                         comment="Processing duration in milliseconds")
     
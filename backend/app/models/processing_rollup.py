@@ -0,0 +1,61 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, DateTime, UniqueConstraint, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
+from enum import Enum
+
+from .base import Base, TimestampMixin
+from .processing_log import RequestType
+
+class RollupGranularity(str, Enum):
+    """Time bucket sizes of processing rollups."""
+    HOUR = "hour"
+    DAY = "day"
+
+class ProcessingRollup(Base, TimestampMixin):
+    """
+    Processing log totals per time bucket, LLM, request type and channel.
+    Maintained incrementally as logs are written, so analytics read buckets instead of log rows.
+    """
+    __tablename__ = "processing_rollups"
+    __table_args__ = (
+        UniqueConstraint('granularity', 'bucket_start', 'llm_id', 'request_type', 'channel_id',
+                         name='uq_processing_rollup_bucket'),
+    )
+
+    # Primary key
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Dimensions; 0 stands for "none" so the unique constraint covers every bucket
+    granularity = Column(SQLEnum(RollupGranularity), nullable=False,
+                        comment="Bucket size")
+    bucket_start = Column(DateTime(timezone=True), nullable=False, index=True,
+                         comment="Start of the time bucket (UTC)")
+    llm_id = Column(Integer, nullable=False, default=0,
+                   comment="LLM model used; 0 for non-LLM calls")
+    request_type = Column(SQLEnum(RequestType), nullable=False,
+                         comment="Type of processing request")
+    channel_id = Column(Integer, nullable=False, default=0,
+                       comment="Channel of the video; 0 when unknown")
+
+    # Totals
+    request_count = Column(Integer, nullable=False, default=0,
+                          comment="Number of logged requests")
+    error_count = Column(Integer, nullable=False, default=0,
+                        comment="Number of failed requests")
+    tokens_used = Column(BigInteger, nullable=False, default=0,
+                        comment="Tokens consumed")
+    input_tokens = Column(BigInteger, nullable=False, default=0,
+                         comment="Input tokens")
+    output_tokens = Column(BigInteger, nullable=False, default=0,
+                          comment="Output tokens")
+    cached_tokens = Column(BigInteger, nullable=False, default=0,
+                          comment="Input tokens served from the provider prompt cache")
+    cost_estimate = Column(Float, nullable=False, default=0.0,
+                          comment="Estimated cost in USD")
+    duration_ms_total = Column(BigInteger, nullable=False, default=0,
+                              comment="Sum of request durations in milliseconds")
+    duration_sketch = Column(JSONB, nullable=True,
+                            comment="Mergeable latency sketch of request durations")
+
+    def __repr__(self):
+        """String representation of the processing rollup."""
+        return f"<ProcessingRollup({self.granularity} {self.bucket_start}, type='{self.request_type}', count={self.request_count})>"
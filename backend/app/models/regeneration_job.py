@@ -0,0 +1,60 @@
+from sqlalchemy import Column, Integer, Float, DateTime, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
+from enum import Enum
+
+from .base import Base, TimestampMixin
+
+class RegenerationStatus(str, Enum):
+    """Lifecycle of a digest regeneration job."""
+    PENDING = "pending"
+    RUNNING = "running"
+    PAUSED = "paused"        # Stopped at its cost cap or interrupted; can be resumed
+    COMPLETED = "completed"  # No digests below the target version remain
+
+class RegenerationJob(Base, TimestampMixin):
+    """
+    Bulk regeneration of digests made with an older prompt version.
+    Progress is stored here so an interrupted or capped job can be resumed.
+    """
+    __tablename__ = "regeneration_jobs"
+
+    # Primary key
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Job parameters
+    target_version = Column(Integer, nullable=False,
+                           comment="Digests below this prompt version are regenerated")
+    cost_cap_usd = Column(Float, nullable=True,
+                         comment="Maximum spend for the job in USD")
+    requests_per_minute = Column(Integer, nullable=False,
+                                comment="Maximum generation requests per minute")
+
+    # Progress
+    status = Column(SQLEnum(RegenerationStatus), nullable=False, default=RegenerationStatus.PENDING,
+                   comment="Current job status")
+    regenerated_count = Column(Integer, nullable=False, default=0,
+                              comment="Digests regenerated so far")
+    failed_count = Column(Integer, nullable=False, default=0,
+                         comment="Digests that failed to regenerate")
+    tokens_used = Column(Integer, nullable=False, default=0,
+                        comment="Tokens consumed so far")
+    spent_usd = Column(Float, nullable=False, default=0.0,
+                      comment="Cost so far in USD")
+    failed_digest_ids = Column(JSONB, nullable=True,
+                              comment="Digests skipped after failing, so resumes do not retry them")
+    last_digest_id = Column(Integer, nullable=True,
+                           comment="Most recently processed digest")
+
+    # Timestamps
+    started_at = Column(DateTime(timezone=True), nullable=True,
+                       comment="When the job first started")
+    finished_at = Column(DateTime(timezone=True), nullable=True,
+                        comment="When the job completed")
+
+    def __repr__(self):
+        """String representation of the regeneration job."""
+        return f"<RegenerationJob(id={self.id}, target_version={self.target_version}, status='{self.status}')>"
+
+    def budget_allows(self, cost_usd: float) -> bool:
+        """Check if spending cost_usd more stays within the cost cap."""
+        return self.cost_cap_usd is None or (self.spent_usd or 0.0) + cost_usd <= self.cost_cap_usd
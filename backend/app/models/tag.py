@@ -0,0 +1,108 @@
+from sqlalchemy import Column, Integer, String, Index, event, func, inspect, delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+from collections import Counter
+from typing import Any, Dict, Mapping, Optional, Set
+
+from .base import Base, TimestampMixin
+from .video import Video
+
+# Videos read at a time when rebuilding the dictionary
+REBUILD_CHUNK_SIZE = 5000
+
+class Tag(Base, TimestampMixin):
+    """
+    Deduplicated dictionary of the tags found in videos.tags, for typeahead suggestions.
+    Maintained incrementally on every flush that writes video tags (see below).
+    """
+    __tablename__ = "tags"
+
+    # Primary key
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Tag information
+    name = Column(String(100), unique=True, nullable=False,
+                  comment="Tag, trimmed and lowercased so spellings differing in case are one entry")
+    video_count = Column(Integer, nullable=False, default=0,
+                         comment="Number of videos carrying the tag")
+
+    def __repr__(self):
+        """String representation of the tag."""
+        return f"<Tag(id={self.id}, name='{self.name}', video_count={self.video_count})>"
+
+# Typeahead matches names by substring (services.suggestions)
+Index("ix_tags_name_trgm", Tag.name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+
+def normalize_tag(tag: Any) -> Optional[str]:
+    """Dictionary entry of a tag, or None for empty and non-string tags."""
+    if not isinstance(tag, str):
+        return None
+    name = tag.strip().lower()[:100]
+    return name or None
+
+def tag_names(tags: Any) -> Set[str]:
+    """Distinct dictionary entries of a video's tags."""
+    if not isinstance(tags, list):
+        return set()
+    return {name for name in map(normalize_tag, tags) if name}
+
+def apply_tag_counts(connection: Connection, deltas: Mapping[str, int]) -> None:
+    """Add each delta to its tag's video count, creating tags not in the dictionary yet."""
+    rows = [{"name": name, "video_count": delta} for name, delta in sorted(deltas.items()) if delta]
+    if not rows:
+        return
+    insert = sqlite_insert if connection.dialect.name == "sqlite" else pg_insert
+    statement = insert(Tag.__table__).values(rows)
+    # Rows are sorted by name so concurrent writers lock tags in the same order
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[Tag.name],
+        set_={"video_count": Tag.__table__.c.video_count + statement.excluded.video_count, "updated_at": func.now()}
+    ))
+
+def rebuild_tag_dictionary(db: Session) -> int:
+    """
+    Recompute the tag dictionary from videos.tags. Commits once done.
+
+    Used to backfill videos written before the dictionary existed, and to
+    correct counts of videos deleted without the ORM (bulk or cascading deletes).
+
+    Returns:
+        Number of tags in the dictionary
+    """
+    counts: Counter = Counter()
+    videos = db.execute(select(Video.tags).where(Video.tags.isnot(None)).execution_options(yield_per=REBUILD_CHUNK_SIZE))
+    for (tags,) in videos:
+        counts.update(tag_names(tags))
+    db.execute(delete(Tag))
+    apply_tag_counts(db.connection(), counts)
+    db.commit()
+    return len(counts)
+
+def _tag_deltas(session: Session) -> Dict[str, int]:
+    deltas: Counter = Counter()
+    for video in session.new:
+        if isinstance(video, Video):
+            deltas.update(tag_names(video.tags))
+    for video in session.deleted:
+        if isinstance(video, Video):
+            tags = inspect(video).attrs.tags.loaded_value
+            deltas.subtract(tag_names(tags if tags is not NO_VALUE else None))
+    for video in session.dirty:
+        if not isinstance(video, Video):
+            continue
+        history = inspect(video).attrs.tags.history
+        if history.has_changes():
+            # Video.tags has active history, so the old value is loaded before being replaced
+            deltas.update(tag_names(history.added[0] if history.added else None))
+            deltas.subtract(tag_names(history.deleted[0] if history.deleted else None))
+    return {name: delta for name, delta in deltas.items() if delta}
+
+@event.listens_for(Session, "after_flush")
+def _maintain_tag_dictionary(session: Session, flush_context) -> None:
+    # Runs inside the flush's transaction, so counts commit or roll back with the videos
+    deltas = _tag_deltas(session)
+    if deltas:
+        apply_tag_counts(session.connection(), deltas)
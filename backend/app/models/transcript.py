@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Computed, Integer, String, Text, DateTime, ForeignKey, Index, LargeBinary, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import relationship
 from enum import Enum
 
-from .base import Base, TimestampMixin
+from .base import Base, SEARCH_CONFIG, TimestampMixin
+
+# Characters of a transcript that are indexed for search. A tsvector holds at
+# most 1 MB, which very long transcripts could exceed; this covers about ten
+# hours of speech.
+SEARCH_INDEXED_CHARS = 500000
 
 class TranscriptStatus(str, Enum):
     """Status of transcript processing."""
@@ -17,6 +22,8 @@ class Transcript(Base, TimestampMixin):
     Each video can have multiple transcripts from different sources.
     """
     __tablename__ = "transcripts"
+    # search_vector stays out of the mapper so loads and inserts never carry it
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
 
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -31,6 +38,14 @@ class Transcript(Base, TimestampMixin):
                        comment="URL where transcript was obtained")
     content = Column(Text, nullable=True,
                     comment="Full transcript text content")
+    search_vector = Column(TSVECTOR, Computed(
+        f"to_tsvector('{SEARCH_CONFIG}', coalesce(substr(content, 1, {SEARCH_INDEXED_CHARS}), ''))",
+        persisted=True
+    ), comment="Full-text search vector of content, generated by the database on write")
+    token_count = Column(Integer, nullable=True,
+                        comment="Token count of content, computed locally once")
+    minhash_signature = Column(LargeBinary, nullable=True,
+                              comment="MinHash signature of content for near-duplicate detection")
     status = Column(SQLEnum(TranscriptStatus), nullable=False, 
                    default=TranscriptStatus.PENDING,
                    comment="Current processing status")
@@ -61,3 +76,14 @@ class Transcript(Base, TimestampMixin):
     def has_failed(self) -> bool:
         """Check if transcript processing failed."""
         return self.status == TranscriptStatus.FAILED
+
+# Summarization and reuse look up a video's processed transcript
+Index("ix_transcripts_video_processed", Transcript.video_id,
+      postgresql_where=Transcript.status == TranscriptStatus.PROCESSED)
+
+# The similarity index loads signatures written since its last refresh (services.transcript_similarity)
+Index("ix_transcripts_signature_updated_at", Transcript.updated_at,
+      postgresql_where=Transcript.minhash_signature.isnot(None))
+
+# Full-text search (services.search)
+Index("ix_transcripts_search_vector", Transcript.search_vector, postgresql_using="gin")
@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, BigInteger, ForeignKey, Enum as SQLEnum
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, String, Text, Date, DateTime, Boolean, BigInteger, ForeignKey, Index, Enum as SQLEnum, func
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import column_property, query_expression, relationship, validates
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional
 
-from .base import Base, TimestampMixin
+from .base import Base, SEARCH_CONFIG, TimestampMixin
 
 class ProcessingStatus(str, Enum):
     PENDING = "PENDING"
@@ -12,12 +13,21 @@ class ProcessingStatus(str, Enum):
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
+def parse_upload_date(value: Optional[str]) -> Optional[date]:
+    """Date of a yt-dlp upload_date (YYYYMMDD), or None if missing or malformed."""
+    try:
+        return datetime.strptime(value, "%Y%m%d").date()
+    except (TypeError, ValueError):
+        return None
+
 class Video(Base, TimestampMixin):
     """
     Central table storing video metadata extracted via yt-dlp.
     Contains core video information and relationships to other entities.
     """
     __tablename__ = "videos"
+    # search_vector stays out of the mapper so loads and inserts never carry it
+    __mapper_args__ = {"exclude_properties": ["search_vector"]}
 
     # Primary key and identifiers
     id = Column(Integer, primary_key=True, index=True)
@@ -27,8 +37,16 @@ class Video(Base, TimestampMixin):
     # Basic metadata
     title = Column(String(255), nullable=False, comment="Video title")
     description = Column(Text, nullable=True, comment="Video description text")
+    # Title matches weigh more than description matches in search ranking
+    search_vector = Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+        persisted=True
+    ), comment="Full-text search vector of title and description, generated by the database on write")
     duration = Column(Integer, nullable=True, comment="Duration in seconds")
     upload_date = Column(String(8), nullable=True, comment="Upload date in YYYYMMDD format")
+    published_on = Column(Date, nullable=True, index=True,
+                          comment="Upload date as a date, kept in sync with upload_date for time range filters")
     
     # URLs and media
     webpage_url = Column(String(100), nullable=False, comment="YouTube video URL")
@@ -39,12 +57,18 @@ class Video(Base, TimestampMixin):
     like_count = Column(Integer, nullable=True, comment="Current like count from YouTube")
     
     # Rich content (stored as JSONB for flexibility)
-    tags = Column(JSONB, nullable=True, comment="Array of video tags")
+    # Active history loads the previous tags before they are replaced, so the
+    # tag dictionary can take them out of its counts (see models.tag)
+    tags = column_property(Column(JSONB, nullable=True, comment="Array of video tags"), active_history=True)
     categories = Column(JSONB, nullable=True, comment="Array of video categories")
     chapters = Column(JSONB, nullable=True, comment="Array of video chapters")
     
     # AI-generated content
     summary = Column(Text, nullable=True, comment="AI-generated summary")
+    # No foreign key: videos and digests would reference each other. The
+    # pointer is recomputed on every flush that writes digests (see models.digest).
+    latest_digest_id = Column(Integer, nullable=True,
+                              comment="Digest with the latest generated_at, maintained on digest writes")
     sentiment_score = Column(Integer, nullable=True, comment="Sentiment analysis score")
     
     # Processing metadata
@@ -69,11 +93,22 @@ class Video(Base, TimestampMixin):
                              cascade="all, delete-orphan")
     digests = relationship("Digest", back_populates="video",
                           cascade="all, delete-orphan")
+    latest_digest = relationship("Digest", primaryjoin="foreign(Video.latest_digest_id) == Digest.id",
+                                 viewonly=True)
+
+    # Filled only by list queries (services.list_projections), which skip the full texts
+    summary_snippet = query_expression()
+    description_snippet = query_expression()
     processing_logs = relationship("ProcessingLog", back_populates="video",
                                  cascade="all, delete-orphan")
     digest_interactions = relationship("DigestInteraction", back_populates="video",
                                      cascade="all, delete-orphan")
 
+    @validates("upload_date")
+    def _sync_published_on(self, key: str, value: Optional[str]) -> Optional[str]:
+        self.published_on = parse_upload_date(value)
+        return value
+
     @property
     def is_processing(self) -> bool:
         """Check if video is currently being processed."""
@@ -88,3 +123,29 @@ class Video(Base, TimestampMixin):
     def has_failed(self) -> bool:
         """Check if video processing has failed."""
         return self.processing_status == ProcessingStatus.FAILED
+
+# Keyset pagination indexes: (sort key, id) for the whole library and per channel.
+# Nullable sort columns are indexed through the same COALESCE the listings sort by.
+Index("ix_videos_created_at_id", Video.created_at, Video.id)
+Index("ix_videos_upload_date_id", func.coalesce(Video.upload_date, ""), Video.id)
+Index("ix_videos_view_count_id", func.coalesce(Video.view_count, -1), Video.id)
+Index("ix_videos_title_id", Video.title, Video.id)
+Index("ix_videos_channel_created_at_id", Video.channel_id, Video.created_at, Video.id)
+Index("ix_videos_channel_upload_date_id", Video.channel_id, func.coalesce(Video.upload_date, ""), Video.id)
+Index("ix_videos_channel_view_count_id", Video.channel_id, func.coalesce(Video.view_count, -1), Video.id)
+Index("ix_videos_channel_title_id", Video.channel_id, Video.title, Video.id)
+
+# Scans for unfinished videos (reprocessing) skip the bulk of completed ones
+Index("ix_videos_unfinished_status", Video.processing_status, Video.created_at, Video.id,
+      postgresql_where=Video.processing_status.in_([
+          ProcessingStatus.PENDING, ProcessingStatus.PROCESSING, ProcessingStatus.FAILED
+      ]))
+
+# Category filters use jsonb containment (categories @> '["Music"]')
+Index("ix_videos_categories", Video.categories, postgresql_using="gin", postgresql_ops={"categories": "jsonb_path_ops"})
+
+# Full-text search (services.search)
+Index("ix_videos_search_vector", Video.search_vector, postgresql_using="gin")
+
+# Typeahead matches titles by substring (services.suggestions)
+Index("ix_videos_title_trgm", Video.title, postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"})
@@ -0,0 +1,457 @@
+"""
+Bulk digest generation through the provider batch API.
+
+Backfills trade latency for throughput and price: pending digests are packed
+into JSONL batch files, submitted, polled until the provider finishes, and the
+results are written back to their Digest rows. Batch backends are pluggable so
+tests and local runs can use LocalBatchBackend instead of the provider.
+
+A digest is claimed before it is submitted, and only digests nobody else is
+generating can be claimed, so a backfill never pays for a digest twice. Each
+claim counts as an attempt; digests that failed BATCH_MAX_ATTEMPTS times keep
+their error and are no longer picked up.
+"""
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db.database import WorkerSessionLocal
+from app.models.digest import Digest as DigestModel, DigestType
+from app.models.llm import LLM as LLMModel
+from app.models.transcript import Transcript as TranscriptModel, TranscriptStatus
+from app.models.video import Video as VideoModel
+from app.services.digest_generation import (
+    load_generation_context,
+    summarizer_arguments,
+    apply_summary_result,
+    record_generation_error,
+    record_processing_log
+)
+from app.services.digest_formats import derive_all_formats
+from app.services.digest_repair import repair_summary_result
+from app.services.provider_registry import provider_registry
+from app.services.summarizers import OpenAISummarizer, SummaryGenerationError
+from app.services.tokenizer import count_tokens
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+CUSTOM_ID_PREFIX = "digest-"
+
+# Terminal batch statuses reported by the provider
+COMPLETED = "completed"
+FAILED_STATUSES = {"failed", "expired", "cancelled"}
+
+class BatchBackend(ABC):
+    """Submits JSONL batch jobs and returns their per-request results."""
+
+    @abstractmethod
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        """Submit batch request lines and return the batch id."""
+        pass
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Return the provider status of a batch."""
+        pass
+
+    @abstractmethod
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """
+        Return result lines of a completed batch.
+
+        Each line has a custom_id and either response.body (a chat completion)
+        or error.
+        """
+        pass
+
+class OpenAIBatchBackend(BatchBackend):
+    """Batch jobs through the OpenAI Files and Batches APIs."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        payload = "\n".join(json.dumps(line) for line in requests).encode("utf-8")
+        batch_file = self.client.files.create(file=("digests.jsonl", payload), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata={"purpose": "digest-backfill"}
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        # Successful requests land in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = self.client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in content.splitlines() if line.strip())
+        return lines
+
+def _local_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Canned chat completion used by LocalBatchBackend when no responder is given."""
+    prompt_tokens = sum(count_tokens(message["content"]) for message in body["messages"])
+    summary = "Local batch summary."
+    completion_tokens = count_tokens(summary)
+    return {
+        "id": "chatcmpl-local",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body["model"],
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": summary}
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+class LocalBatchBackend(BatchBackend):
+    """In-process stand-in that completes each batch immediately with a responder function."""
+
+    def __init__(self, responder: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.responder = responder or _local_completion
+        self.batches: Dict[str, List[Dict[str, Any]]] = {}
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch_id = f"batch_local_{len(self.batches) + 1}"
+        results = []
+        for line in requests:
+            try:
+                body = self.responder(line["body"])
+                results.append({"custom_id": line["custom_id"], "response": {"status_code": 200, "body": body}, "error": None})
+            except Exception as e:
+                results.append({"custom_id": line["custom_id"], "response": None, "error": {"message": str(e)}})
+        self.batches[batch_id] = results
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return COMPLETED if batch_id in self.batches else "failed"
+
+    def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        return self.batches.get(batch_id, [])
+
+def build_batch_line(summarizer: OpenAISummarizer, digest_id: int, context: Dict[str, Any]) -> Dict[str, Any]:
+    """Build one JSONL request line for a digest."""
+    return {
+        "custom_id": f"{CUSTOM_ID_PREFIX}{digest_id}",
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": summarizer.build_request_body(**summarizer_arguments(context))
+    }
+
+def parse_batch_result(summarizer: OpenAISummarizer, line: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn one batch result line into a generate()-style result, raising on per-request errors."""
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code", 200) != 200:
+        error = line.get("error") or (response.get("body") or {}).get("error") or {}
+        raise SummaryGenerationError(f"Batch request failed: {error.get('message', 'unknown error')}")
+    return summarizer.result_from_completion(response["body"], batch=True)
+
+def digest_id_from_custom_id(custom_id: str) -> Optional[int]:
+    if not custom_id.startswith(CUSTOM_ID_PREFIX):
+        return None
+    try:
+        return int(custom_id[len(CUSTOM_ID_PREFIX):])
+    except ValueError:
+        return None
+
+def _is_placeholder(transcript: str) -> bool:
+    """Placeholder transcripts get a local summary, so they never go to the provider."""
+    return not transcript or not transcript.strip() or transcript.startswith("[")
+
+def claim_digests(digests: Sequence[DigestModel]) -> None:
+    """Mark digests as taken by a backfill run and count the attempt; the caller commits."""
+    claimed_at = datetime.utcnow().isoformat()
+    for digest in digests:
+        extra_data = dict(digest.extra_data or {})
+        extra_data.pop("error", None)
+        extra_data["batch_id"] = None
+        extra_data["batch_claimed_at"] = claimed_at
+        extra_data["batch_attempts"] = extra_data.get("batch_attempts", 0) + 1
+        digest.extra_data = extra_data
+
+def release_digests(digests: Sequence[DigestModel]) -> None:
+    """Give back claimed digests that were not submitted, without counting the attempt; the caller commits."""
+    for digest in digests:
+        extra_data = dict(digest.extra_data or {})
+        if "batch_id" in extra_data and extra_data["batch_id"] is None:
+            extra_data.pop("batch_id")
+            extra_data.pop("batch_claimed_at", None)
+            extra_data["batch_attempts"] = max(extra_data.get("batch_attempts", 1) - 1, 0)
+            digest.extra_data = extra_data
+
+class BatchDigestRunner:
+    """Packs pending digests into batches, polls them and stores the results."""
+
+    def __init__(
+        self,
+        backend: BatchBackend,
+        summarizer: Optional[OpenAISummarizer] = None,
+        session_factory: Callable[[], Session] = WorkerSessionLocal,
+        max_requests: Optional[int] = None
+    ):
+        self.backend = backend
+        self.summarizer = summarizer or provider_registry.get_summarizer("openai")
+        self.session_factory = session_factory
+        self.max_requests = max_requests or settings.BATCH_MAX_REQUESTS
+
+    def pending_query(self, db: Session, limit: Optional[int] = None) -> Query:
+        """
+        Empty digests nobody is generating, locked until the claim commits.
+
+        Skipped are digests in a submitted batch or claimed by another run,
+        digests a stream is writing (unless its checkpoints stopped), digests
+        younger than BATCH_CLAIM_AFTER_MINUTES whose background task may still
+        be running, digests for other providers, and digests that failed
+        BATCH_MAX_ATTEMPTS times. Digests created by a backfill have no task
+        of their own and are picked up at once.
+        """
+        extra_data = DigestModel.extra_data
+        stale = (datetime.utcnow() - timedelta(minutes=settings.BATCH_CLAIM_AFTER_MINUTES)).isoformat()
+        query = db.query(DigestModel).filter(
+            DigestModel.content == "",
+            or_(
+                DigestModel.created_at < func.now() - timedelta(minutes=settings.BATCH_CLAIM_AFTER_MINUTES),
+                extra_data["backfill"].as_boolean()
+            ),
+            or_(extra_data.is_(None), and_(
+                # A claim without a batch id is left over from a run that died before submitting
+                or_(~extra_data.has_key("batch_id"),
+                    and_(extra_data["batch_id"].astext.is_(None), extra_data["batch_claimed_at"].astext < stale)),
+                or_(~extra_data.has_key("stream"), extra_data[("stream", "checkpoint_at")].astext < stale),
+                or_(~extra_data.has_key("provider"), func.lower(extra_data["provider"].astext) == "openai"),
+                func.coalesce(extra_data["batch_attempts"].as_integer(), 0) < settings.BATCH_MAX_ATTEMPTS
+            ))
+        ).order_by(DigestModel.id).with_for_update(skip_locked=True)
+        if limit:
+            query = query.limit(limit)
+        return query
+
+    def pending_digests(self, db: Session, limit: Optional[int] = None) -> List[DigestModel]:
+        """Claim pending digests for this run and return them."""
+        digests = self.pending_query(db, limit).all()
+        claim_digests(digests)
+        db.commit()
+        return digests
+
+    def in_flight_batches(self) -> List[str]:
+        """Ids of batches submitted earlier whose digests are still empty."""
+        db = self.session_factory()
+        try:
+            batch_id = DigestModel.extra_data["batch_id"].astext
+            rows = db.query(batch_id).filter(DigestModel.content == "", batch_id.isnot(None)).distinct().all()
+            return [row[0] for row in rows]
+        finally:
+            db.close()
+
+    def submit_pending(self, limit: Optional[int] = None) -> List[str]:
+        """
+        Submit batches for pending digests.
+
+        Args:
+            limit: Maximum number of digests to pick up
+
+        Returns:
+            The ids of the submitted batches
+        """
+        db = self.session_factory()
+        try:
+            lines: List[Dict[str, Any]] = []
+            digests: List[DigestModel] = []
+            for digest in self.pending_digests(db, limit):
+                context = load_generation_context(db, digest)
+                if context is None:
+                    continue
+                if context["provider"] != "openai":
+                    logger.info(f"Skipping digest {digest.id}: provider {context['provider']} has no batch mode")
+                    release_digests([digest])
+                    db.commit()
+                    continue
+                if _is_placeholder(context["transcript_text"]):
+                    # Placeholder summaries are produced locally and cost nothing
+                    try:
+                        apply_summary_result(digest, self.summarizer.generate(**summarizer_arguments(context)), context)
+                    except SummaryGenerationError as e:
+                        record_generation_error(digest, str(e))
+                    db.commit()
+                    continue
+                lines.append(build_batch_line(self.summarizer, digest.id, context))
+                digests.append(digest)
+
+            batch_ids = []
+            for start in range(0, len(lines), self.max_requests):
+                try:
+                    batch_id = self.backend.submit(lines[start:start + self.max_requests])
+                except Exception:
+                    # Nothing was submitted for the rest, so another run may take them
+                    release_digests(digests[start:])
+                    db.commit()
+                    raise
+                submitted_at = datetime.utcnow().isoformat()
+                for digest in digests[start:start + self.max_requests]:
+                    extra_data = dict(digest.extra_data or {})
+                    extra_data["batch_id"] = batch_id
+                    extra_data["batch_submitted_at"] = submitted_at
+                    digest.extra_data = extra_data
+                db.commit()
+                batch_ids.append(batch_id)
+                logger.info(f"Submitted batch {batch_id} with {len(lines[start:start + self.max_requests])} digests")
+            return batch_ids
+        finally:
+            db.close()
+
+    def collect(self, batch_id: str) -> Optional[Dict[str, int]]:
+        """
+        Store the results of a batch if it has finished.
+
+        Returns:
+            Counts of stored and failed digests, or None while the batch is still running
+        """
+        status = self.backend.status(batch_id)
+        if status != COMPLETED and status not in FAILED_STATUSES:
+            return None
+
+        db = self.session_factory()
+        try:
+            digests = {
+                digest.id: digest
+                for digest in db.query(DigestModel).filter(DigestModel.extra_data["batch_id"].astext == batch_id).all()
+            }
+            counts = {"stored": 0, "failed": 0}
+            if status == COMPLETED:
+                for line in self.backend.results(batch_id):
+                    digest = digests.pop(digest_id_from_custom_id(line.get("custom_id", "")), None)
+                    if digest is None:
+                        continue
+                    try:
+                        context = load_generation_context(db, digest)
+                        if context is None:
+                            counts["failed"] += 1
+                            continue
+                        submitted_at = datetime.fromisoformat((digest.extra_data or {}).get("batch_submitted_at") or datetime.utcnow().isoformat())
+                        summary_result = parse_batch_result(self.summarizer, line)
+                        summary_result = repair_summary_result(self.summarizer, summary_result, context)
+                        apply_summary_result(digest, summary_result, context)
+                        record_processing_log(digest, submitted_at, summary_result)
+                        derive_all_formats(db, digest)
+                        counts["stored"] += 1
+                    except SummaryGenerationError as e:
+                        logger.error(f"Batch result for digest {digest.id} failed: {str(e)}")
+                        record_generation_error(digest, str(e))
+                        counts["failed"] += 1
+                    db.commit()
+
+            # Digests without a result line, or the whole batch when it failed
+            for digest in digests.values():
+                record_generation_error(digest, f"Batch {batch_id} ended with status {status} and no result")
+                counts["failed"] += 1
+            db.commit()
+            logger.info(f"Collected batch {batch_id}: {counts['stored']} stored, {counts['failed']} failed")
+            return counts
+        finally:
+            db.close()
+
+    def create_missing_digests(
+        self,
+        video_ids: Optional[Sequence[int]] = None,
+        channel_id: Optional[int] = None,
+        digest_type: DigestType = DigestType.SUMMARY,
+        limit: Optional[int] = None,
+        user_id: int = 1
+    ) -> int:
+        """
+        Create empty digests for archived videos that have a processed transcript but no digest of digest_type.
+
+        Args:
+            video_ids: Only these videos
+            channel_id: Only videos of this channel
+            digest_type: Type of digest to create
+            limit: Maximum number of digests to create
+            user_id: User the digests are created for
+
+        Returns:
+            Number of digests created; the next submit picks them up
+        """
+        db = self.session_factory()
+        try:
+            llm = db.query(LLMModel).first()
+            if llm is None:
+                logger.error("No LLM models found in database")
+                return 0
+            statement = select(VideoModel.id).where(
+                exists().where(
+                    TranscriptModel.video_id == VideoModel.id,
+                    TranscriptModel.status == TranscriptStatus.PROCESSED
+                ),
+                ~exists().where(DigestModel.video_id == VideoModel.id, DigestModel.digest_type == digest_type)
+            ).order_by(VideoModel.id)
+            if video_ids:
+                statement = statement.where(VideoModel.id.in_(video_ids))
+            if channel_id is not None:
+                statement = statement.where(VideoModel.channel_id == channel_id)
+            if limit:
+                statement = statement.limit(limit)
+            missing = db.execute(statement).scalars().all()
+            db.add_all([
+                DigestModel(
+                    video_id=video_id,
+                    user_id=user_id,
+                    digest_type=digest_type,
+                    llm_id=llm.id,
+                    content="",
+                    tokens_used=0,
+                    cost=0.0,
+                    model_version="pending",
+                    generated_at=datetime.utcnow(),
+                    extra_data={"provider": "openai", "backfill": True}
+                )
+                for video_id in missing
+            ])
+            db.commit()
+            logger.info(f"Created {len(missing)} empty {digest_type.value} digests for backfill")
+            return len(missing)
+        finally:
+            db.close()
+
+    def run(self, limit: Optional[int] = None, poll_seconds: Optional[float] = None) -> Dict[str, int]:
+        """
+        Submit pending digests and poll every batch until all have been collected.
+
+        Batches left in flight by an earlier run are collected as well.
+        """
+        poll_seconds = settings.BATCH_POLL_SECONDS if poll_seconds is None else poll_seconds
+        remaining = self.in_flight_batches()
+        remaining += [batch_id for batch_id in self.submit_pending(limit) if batch_id not in remaining]
+        totals = {"batches": len(remaining), "stored": 0, "failed": 0}
+        while remaining:
+            still_running = []
+            for batch_id in remaining:
+                counts = self.collect(batch_id)
+                if counts is None:
+                    still_running.append(batch_id)
+                    continue
+                totals["stored"] += counts["stored"]
+                totals["failed"] += counts["failed"]
+            remaining = still_running
+            if remaining:
+                time.sleep(poll_seconds)
+        return totals
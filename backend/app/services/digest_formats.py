@@ -0,0 +1,153 @@
+"""
+Digest formats derived from the structured master digest.
+
+The master digest prompt already produces every section the other digest types
+show, so once a video has a master digest the remaining types are cut from its
+Markdown sections locally instead of sending the transcript to the model again.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.digest import Digest as DigestModel, DigestType
+from app.services.summarizers import SummaryFormat
+
+logger = logging.getLogger(__name__)
+
+# Sections of the master digest each derived type keeps, in order; None keeps the whole digest
+DERIVED_FORMATS: Dict[DigestType, Tuple[SummaryFormat, Optional[List[str]]]] = {
+    DigestType.SUMMARY: (SummaryFormat.STANDARD, ["Concise Summary", "Target Audience & Value", "Key Takeaways"]),
+    DigestType.HIGHLIGHTS: (SummaryFormat.CONCISE, ["Concise Summary", "Video Highlights"]),
+    DigestType.CHAPTERS: (SummaryFormat.ENHANCED, ["Chapter Breakdown", "Segment Breakdown"]),
+    DigestType.DETAILED: (SummaryFormat.DETAILED, None),
+}
+
+# A master digest needs at least this many recognised sections to be cut up
+MIN_MASTER_SECTIONS = 2
+
+_HEADING_RE = re.compile(r"^## +(.+?)\s*$", re.MULTILINE)
+
+def section_key(heading: str) -> str:
+    """Normalise a heading so "Video Highlights ✨" matches "Video Highlights"."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w&\s]", "", heading)).strip().lower()
+
+def parse_sections(markdown: str) -> Dict[str, str]:
+    """
+    Split a master digest into its level-two sections.
+
+    Returns:
+        Mapping of normalised heading to the section text, heading line included
+    """
+    matches = list(_HEADING_RE.finditer(markdown or ""))
+    sections = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(markdown)
+        sections.setdefault(section_key(match.group(1)), markdown[match.start():end].strip())
+    return sections
+
+def derive_content(master_content: str, digest_type: DigestType) -> Optional[str]:
+    """
+    Build the content of a digest type from a master digest.
+
+    Returns:
+        The derived Markdown, or None if the master lacks the sections the type needs
+    """
+    sections = parse_sections(master_content)
+    if len(sections) < MIN_MASTER_SECTIONS:
+        return None
+    _, headings = DERIVED_FORMATS[DigestType(digest_type)]
+    if headings is None:
+        return master_content.strip()
+    keys = [section_key(heading) for heading in headings]
+    # The one-line summary alone is not worth a digest of its own
+    if not any(key in sections for key in keys if key != section_key("Concise Summary")):
+        return None
+    return "\n\n".join(sections[key] for key in keys if key in sections)
+
+def find_master_digest(db: Session, video_id: int) -> Optional[DigestModel]:
+    """Most recent generated (not derived) digest of a video that can be cut into sections."""
+    candidates = db.query(DigestModel).filter(
+        DigestModel.video_id == video_id,
+        DigestModel.content != ""
+    ).order_by(DigestModel.generated_at.desc()).all()
+    for digest in candidates:
+        extra_data = digest.extra_data or {}
+        if "derived_from" in extra_data or "error" in extra_data:
+            continue
+        if len(parse_sections(digest.content)) >= MIN_MASTER_SECTIONS:
+            return digest
+    return None
+
+def apply_derived_content(digest: DigestModel, master: DigestModel) -> bool:
+    """
+    Fill a digest from a master digest; the caller commits.
+
+    Returns:
+        True if the master had the sections needed for the digest's type
+    """
+    content = derive_content(master.content, digest.digest_type)
+    if content is None:
+        return False
+    summary_format, _ = DERIVED_FORMATS[DigestType(digest.digest_type)]
+    digest.content = content
+    digest.tokens_used = 0
+    digest.cost = 0.0
+    digest.model_version = master.model_version
+    digest.prompt_version = master.prompt_version
+    digest.llm_id = digest.llm_id or master.llm_id
+    digest.generated_at = datetime.utcnow()
+    digest.extra_data = {
+        "derived_from": master.id,
+        "summary_format": summary_format.value,
+        "provider": (master.extra_data or {}).get("provider", "openai")
+    }
+    return True
+
+def derive_digest(db: Session, digest: DigestModel) -> bool:
+    """Fill an empty digest from the video's master digest, if one exists; the caller commits."""
+    master = find_master_digest(db, digest.video_id)
+    if master is None or master.id == digest.id:
+        return False
+    if not apply_derived_content(digest, master):
+        return False
+    if digest.id is None:
+        db.add(digest)
+    logger.info(f"Derived {digest.digest_type} digest for video {digest.video_id} from digest {master.id}")
+    return True
+
+def derive_all_formats(db: Session, master: DigestModel) -> List[DigestModel]:
+    """
+    Create the missing digest types of a video from a freshly generated master digest.
+
+    Only runs when the master was requested with all_formats. Types that
+    already have content are left alone; the caller commits.
+    """
+    if not (master.extra_data or {}).get("all_formats") or not master.content:
+        return []
+    existing = {
+        digest.digest_type: digest
+        for digest in db.query(DigestModel).filter(DigestModel.video_id == master.video_id).all()
+    }
+    derived = []
+    for digest_type in DERIVED_FORMATS:
+        if digest_type == master.digest_type:
+            continue
+        digest = existing.get(digest_type)
+        if digest is not None and digest.content:
+            continue
+        if digest is None:
+            digest = DigestModel(
+                video_id=master.video_id,
+                user_id=master.user_id,
+                llm_id=master.llm_id,
+                digest_type=digest_type
+            )
+        if apply_derived_content(digest, master):
+            db.add(digest)
+            derived.append(digest)
+    if derived:
+        logger.info(f"Derived {len(derived)} digest formats for video {master.video_id} from digest {master.id}")
+    return derived
@@ -0,0 +1,263 @@
+"""
+Shared steps of digest generation.
+
+Used by the background task, the streaming endpoint and bulk jobs so that every
+path resolves its inputs and stores its results the same way.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import and_, case, cast, func, literal, or_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.digest import Digest as DigestModel
+from app.models.llm import LLM as LLMModel
+from app.models.processing_log import RequestType
+from app.models.transcript import Transcript as TranscriptModel
+from app.models.video import Video as VideoModel
+from app.services.summarizers import SummaryFormat, SummarizerInterface
+from app.services.summarizer_factory import map_digest_type_to_summary_format
+from app.services.tokenizer import count_tokens
+from app.services.digest_repair import generation_usage
+from app.services.processing_log_buffer import processing_log_buffer
+from app.services.transcript_preprocessor import preprocess_transcript
+
+logger = logging.getLogger(__name__)
+
+def record_generation_error(digest: DigestModel, message: str, retry_after: Optional[float] = None) -> None:
+    """
+    Store an error on the digest, keeping the provider and format it was requested with.
+
+    retry_after is set when the provider's circuit is open, so callers know
+    when a new attempt can succeed.
+    """
+    previous = digest.extra_data or {}
+    # Batch attempts are kept so backfills stop retrying digests that keep failing
+    kept = ("provider", "summary_format", "all_formats", "backfill", "batch_attempts")
+    extra_data = {key: previous[key] for key in kept if key in previous}
+    extra_data["error"] = message
+    if retry_after is not None:
+        extra_data["retry_after"] = round(retry_after, 1)
+    digest.extra_data = extra_data
+
+# Values of extra_data["stream"]["status"] while a worker holds the claim
+STREAMING = "streaming"
+GENERATING = "generating"
+
+def claim_digest(db: Session, digest_id: int, status: str = GENERATING) -> bool:
+    """
+    Mark an empty digest as being generated in one UPDATE, so only one worker pays for it.
+
+    The claim is the extra_data["stream"] marker; storing a result or an error
+    drops it. It fails while another worker's claim is fresh (checkpointed
+    within DIGEST_STREAM_STALE_SECONDS for streams, started within
+    DIGEST_GENERATION_STALE_SECONDS for background generations) or the
+    digest is part of a batch. Commits.
+
+    Returns:
+        True if this caller now holds the claim
+    """
+    now = datetime.utcnow()
+    stream_stale = (now - timedelta(seconds=settings.DIGEST_STREAM_STALE_SECONDS)).isoformat()
+    generation_stale = (now - timedelta(seconds=settings.DIGEST_GENERATION_STALE_SECONDS)).isoformat()
+    marker = {"stream": {"status": status, "offset": 0, "checkpoint_at": now.isoformat()}}
+    extra_data = func.coalesce(DigestModel.extra_data, cast({}, JSONB))
+    stale_before = case(
+        (DigestModel.extra_data[("stream", "status")].astext == GENERATING, generation_stale),
+        else_=stream_stale
+    )
+    claimed = db.query(DigestModel).filter(
+        DigestModel.id == digest_id,
+        DigestModel.content == "",
+        or_(
+            DigestModel.extra_data.is_(None),
+            and_(
+                ~DigestModel.extra_data.has_key("batch_id"),
+                or_(
+                    ~DigestModel.extra_data.has_key("stream"),
+                    DigestModel.extra_data[("stream", "checkpoint_at")].astext < stale_before
+                )
+            )
+        )
+    ).update(
+        # Errors and partial text of earlier attempts are dropped with the claim
+        {DigestModel.extra_data: extra_data
+            .op("-")(literal("error"))
+            .op("-")(literal("retry_after"))
+            .op("-")(literal("partial_content"))
+            .op("||")(cast(marker, JSONB))},
+        synchronize_session=False
+    )
+    db.commit()
+    return claimed == 1
+
+def claim_is_fresh(stream_info: Dict[str, Any]) -> bool:
+    """Whether a stored claim marker still belongs to a live worker."""
+    checkpoint_at = stream_info.get("checkpoint_at")
+    if stream_info.get("status") not in (STREAMING, GENERATING) or not checkpoint_at:
+        return False
+    stale_seconds = (settings.DIGEST_GENERATION_STALE_SECONDS if stream_info["status"] == GENERATING
+                     else settings.DIGEST_STREAM_STALE_SECONDS)
+    return (datetime.utcnow() - datetime.fromisoformat(checkpoint_at)).total_seconds() < stale_seconds
+
+def load_generation_context(db: Session, digest: DigestModel) -> Optional[Dict[str, Any]]:
+    """
+    Resolve everything needed to generate a digest.
+
+    Args:
+        db: Database session
+        digest: The digest row being generated
+
+    Returns:
+        Dictionary with the digest, video, transcript, provider and summary_format,
+        or None if generation cannot proceed (the reason is recorded on the digest)
+    """
+    video = db.query(VideoModel).filter(VideoModel.id == digest.video_id).first()
+    if not video:
+        logger.error(f"Video {digest.video_id} not found")
+        return None
+
+    # Get the transcript
+    transcript = db.query(TranscriptModel).filter(
+        TranscriptModel.video_id == video.id,
+        TranscriptModel.status == "PROCESSED"
+    ).first()
+
+    if not transcript:
+        logger.error(f"No transcript available for video {video.id}")
+        record_generation_error(digest, "No transcript available")
+        db.commit()
+        return None
+
+    # Get the default LLM if not specified
+    if not digest.llm_id:
+        default_llm = db.query(LLMModel).first()
+        if default_llm:
+            digest.llm_id = default_llm.id
+        else:
+            logger.error("No LLM models found in database")
+            record_generation_error(digest, "No LLM models available")
+            db.commit()
+            return None
+
+    # Get the provider from extra_data or use default
+    provider = "openai"  # Default provider
+    if digest.extra_data and "provider" in digest.extra_data:
+        provider = digest.extra_data["provider"].lower()
+
+    # Get the summary format from the digest or use the default based on digest type
+    summary_format_str = digest.extra_data.get("summary_format") if digest.extra_data else None
+
+    if summary_format_str:
+        try:
+            summary_format = SummaryFormat(summary_format_str)
+        except ValueError:
+            # Invalid format, fall back to mapping based on digest type
+            summary_format = map_digest_type_to_summary_format(digest.digest_type)
+    else:
+        # No format specified, use the mapping based on digest type
+        summary_format = map_digest_type_to_summary_format(digest.digest_type)
+
+    transcript_text, transcript_tokens, preprocessing = prepare_transcript(db, transcript)
+
+    return {
+        "digest": digest,
+        "video": video,
+        "transcript": transcript,
+        "transcript_text": transcript_text,
+        "transcript_tokens": transcript_tokens,
+        "preprocessing": preprocessing,
+        "provider": provider,
+        "summary_format": summary_format
+    }
+
+def prepare_transcript(db: Session, transcript: TranscriptModel) -> Tuple[str, int, Dict[str, int]]:
+    """
+    Clean a stored transcript for summarization.
+
+    Returns:
+        The cleaned text, its token count, and a report of the tokens saved
+    """
+    # Token count of the raw transcript is computed once and stored
+    if transcript.token_count is None:
+        transcript.token_count = count_tokens(transcript.content)
+        db.commit()
+
+    text, stats = preprocess_transcript(transcript.content)
+    tokens = count_tokens(text) if text != transcript.content else transcript.token_count
+    preprocessing = {
+        "raw_tokens": transcript.token_count,
+        "tokens": tokens,
+        "saved_tokens": transcript.token_count - tokens,
+        **stats
+    }
+    return text, tokens, preprocessing
+
+def summarizer_arguments(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword arguments for SummarizerInterface.generate() and generate_stream()."""
+    video = context["video"]
+    return {
+        "transcript": context["transcript_text"],
+        "title": video.title,
+        "description": video.description,
+        "chapters": video.chapters,
+        "format_type": context["summary_format"],
+        "transcript_tokens": context["transcript_tokens"]
+    }
+
+def apply_summary_result(digest: DigestModel, summary_result: Dict[str, Any], context: Dict[str, Any]) -> None:
+    """Store a summarizer result on the digest; the caller commits."""
+    usage = summary_result["usage"]
+    digest.content = summary_result["summary"]
+    digest.tokens_used = usage["total_tokens"]
+    digest.cost = usage["estimated_cost_usd"]
+    # Correctly save the actual model name from the result
+    digest.model_version = usage.get("model", "unknown")
+    digest.prompt_version = SummarizerInterface.PROMPT_VERSION
+    digest.generated_at = datetime.utcnow()
+    # Merge usage data into a new extra_data dict so the JSONB change is detected,
+    # dropping transient streaming and error keys from earlier attempts
+    extra_data = {
+        key: value for key, value in (digest.extra_data or {}).items()
+        if key not in ("error", "partial_content", "stream")
+    }
+    extra_data.update(usage)
+    # Ensure summary_format and provider are also stored
+    extra_data["summary_format"] = context["summary_format"].value
+    extra_data["provider"] = context["provider"]
+    # Backend that actually served the request when the router picked one
+    if context.get("backend"):
+        extra_data["backend"] = context["backend"]
+    # Report how many prompt tokens transcript preprocessing saved
+    extra_data["preprocessing"] = context["preprocessing"]
+    digest.extra_data = extra_data
+
+def record_processing_log(
+    digest: DigestModel,
+    started_at: datetime,
+    summary_result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None
+) -> None:
+    """
+    Queue a ProcessingLog row for one generation call; it is written in the background.
+
+    A section repair folded into the result was logged as its own call, so
+    its share of the usage is left out of this row.
+    """
+    usage = summary_result["usage"] if summary_result else {}
+    processing_log_buffer.record(
+        RequestType.SUMMARIZE,
+        started_at,
+        video_id=digest.video_id,
+        llm_id=digest.llm_id,
+        usage=generation_usage(usage),
+        error=error,
+        request_params={"digest_id": digest.id, "summary_format": (digest.extra_data or {}).get("summary_format")},
+        response_metadata={
+            "model": usage.get("model"),
+            "batch": usage.get("batch", False),
+            "repaired_sections": (usage.get("repair") or {}).get("sections")
+        } if usage else None
+    )
@@ -0,0 +1,244 @@
+"""
+Selective regeneration of digests after a prompt template change.
+
+Every generated digest is stamped with the prompt version it was made with.
+A regeneration job brings digests below a target version up to date, most
+recently viewed first, under a cost cap and a request rate limit. Progress is
+stored on the job row and on the digests themselves, so a job stopped by its
+cap or interrupted can be resumed where it left off.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import WorkerSessionLocal
+from app.models.digest import Digest as DigestModel
+from app.models.digest_interaction import DigestInteraction as DigestInteractionModel
+from app.models.regeneration_job import RegenerationJob, RegenerationStatus
+from app.services.digest_formats import apply_derived_content
+from app.services.digest_repair import repair_summary_result
+from app.services.digest_generation import (
+    load_generation_context,
+    summarizer_arguments,
+    apply_summary_result,
+    record_processing_log
+)
+from app.services.provider_registry import provider_registry
+from app.services.provider_router import provider_router, backend_name
+from app.services.summarizers import SummarizerInterface, SummaryGenerationError, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Digests loaded from the database per round
+PAGE_SIZE = 50
+
+def estimate_cost(context: Dict[str, Any]) -> float:
+    """Upper bound of the cost of regenerating one digest."""
+    summarizer = provider_registry.get_summarizer(context["provider"])
+    return summarizer.estimate_usage(**summarizer_arguments(context))["max_cost_usd"]
+
+def generate_summary(context: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Generate through the router, returning the result and the backend that served it."""
+    digest = context["digest"]
+    summary_result, backend = provider_router.generate(preferred=context["provider"], video_id=digest.video_id, digest_id=digest.id,
+                                                       **summarizer_arguments(context))
+    summary_result = repair_summary_result(provider_registry.get_summarizer(*backend), summary_result, context)
+    return summary_result, backend_name(backend)
+
+class DigestRegenerationRunner:
+    """Regenerates outdated digests for a RegenerationJob."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = WorkerSessionLocal,
+        generate: Callable[[Dict[str, Any]], Tuple[Dict[str, Any], str]] = generate_summary,
+        estimate: Callable[[Dict[str, Any]], float] = estimate_cost,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.session_factory = session_factory
+        self.generate = generate
+        self.estimate = estimate
+        self.sleep = sleep
+        self.clock = clock
+        self._last_request: Optional[float] = None
+
+    def create_job(
+        self,
+        target_version: int = SummarizerInterface.PROMPT_VERSION,
+        cost_cap_usd: Optional[float] = None,
+        requests_per_minute: Optional[int] = None
+    ) -> int:
+        """Create a job and return its id."""
+        db = self.session_factory()
+        try:
+            job = RegenerationJob(
+                target_version=target_version,
+                cost_cap_usd=settings.REGENERATION_COST_CAP_USD if cost_cap_usd is None else cost_cap_usd,
+                requests_per_minute=requests_per_minute or settings.REGENERATION_REQUESTS_PER_MINUTE,
+                status=RegenerationStatus.PENDING,
+                regenerated_count=0,
+                failed_count=0,
+                tokens_used=0,
+                spent_usd=0.0
+            )
+            db.add(job)
+            db.commit()
+            return job.id
+        finally:
+            db.close()
+
+    def outdated_digests(self, db: Session, job: RegenerationJob, limit: int = PAGE_SIZE) -> List[DigestModel]:
+        """
+        Generated digests below the job's target version, in priority order.
+
+        Most recently viewed digests come first, then never-viewed ones from
+        the newest. Derived digests are skipped; they are re-cut from their
+        master digest once it is regenerated.
+        """
+        last_viewed = db.query(
+            DigestInteractionModel.digest_id,
+            func.max(DigestInteractionModel.action_at).label("last_viewed")
+        ).group_by(DigestInteractionModel.digest_id).subquery()
+
+        query = db.query(DigestModel).outerjoin(
+            last_viewed, last_viewed.c.digest_id == DigestModel.id
+        ).filter(
+            DigestModel.content != "",
+            or_(DigestModel.prompt_version.is_(None), DigestModel.prompt_version < job.target_version),
+            or_(DigestModel.extra_data.is_(None), ~DigestModel.extra_data.has_key("derived_from"))
+        )
+        if job.failed_digest_ids:
+            query = query.filter(DigestModel.id.notin_(job.failed_digest_ids))
+        return query.order_by(
+            last_viewed.c.last_viewed.desc().nullslast(),
+            DigestModel.generated_at.desc(),
+            DigestModel.id.desc()
+        ).limit(limit).all()
+
+    def _pace(self, requests_per_minute: int) -> None:
+        """Sleep so requests are at least 60 / requests_per_minute seconds apart."""
+        interval = 60.0 / max(1, requests_per_minute)
+        if self._last_request is not None:
+            wait = self._last_request + interval - self.clock()
+            if wait > 0:
+                self.sleep(wait)
+        self._last_request = self.clock()
+
+    def regenerate_digest(self, db: Session, job: RegenerationJob, digest: DigestModel) -> bool:
+        """
+        Regenerate one digest and re-cut the digests derived from it; the caller commits.
+
+        Returns:
+            False if the job has to stop (cost cap reached or provider circuit open),
+            True otherwise, including when this digest failed
+        """
+        job.last_digest_id = digest.id
+        context = load_generation_context(db, digest)
+        if context is None:
+            job.failed_digest_ids = (job.failed_digest_ids or []) + [digest.id]
+            job.failed_count += 1
+            return True
+
+        if not job.budget_allows(self.estimate(context)):
+            logger.info(f"Regeneration job {job.id} reached its cost cap of ${job.cost_cap_usd:.2f}")
+            return False
+
+        self._pace(job.requests_per_minute)
+        started_at = datetime.utcnow()
+        try:
+            summary_result, context["backend"] = self.generate(context)
+        except CircuitOpenError as e:
+            # Every further request would fail fast too; resume once the provider recovers
+            logger.warning(f"Pausing regeneration job {job.id}: {str(e)}")
+            return False
+        except SummaryGenerationError as e:
+            # The previous content stays in place; the digest is retried by a later job
+            logger.error(f"Regenerating digest {digest.id} failed: {str(e)}")
+            record_processing_log(digest, started_at, error=str(e))
+            job.failed_digest_ids = (job.failed_digest_ids or []) + [digest.id]
+            job.failed_count += 1
+            return True
+
+        apply_summary_result(digest, summary_result, context)
+        record_processing_log(digest, started_at, summary_result)
+        usage = summary_result["usage"]
+        job.tokens_used += usage.get("total_tokens", 0)
+        job.spent_usd += usage.get("estimated_cost_usd", 0.0)
+        job.regenerated_count += 1
+
+        derived = db.query(DigestModel).filter(
+            DigestModel.video_id == digest.video_id,
+            DigestModel.extra_data["derived_from"].astext == str(digest.id)
+        ).all()
+        for sibling in derived:
+            apply_derived_content(sibling, digest)
+        return True
+
+    def run(self, job_id: int, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run or resume a job until no outdated digests remain, the cost cap is reached or limit digests were processed.
+
+        Returns:
+            The job's status and progress counters
+        """
+        db = self.session_factory()
+        try:
+            job = db.query(RegenerationJob).filter(RegenerationJob.id == job_id).first()
+            if job is None:
+                raise ValueError(f"Regeneration job {job_id} not found")
+            if job.status == RegenerationStatus.COMPLETED:
+                return self.progress(job)
+
+            job.status = RegenerationStatus.RUNNING
+            job.started_at = job.started_at or datetime.utcnow()
+            db.commit()
+
+            processed = 0
+            try:
+                while limit is None or processed < limit:
+                    page_size = PAGE_SIZE if limit is None else min(PAGE_SIZE, limit - processed)
+                    digests = self.outdated_digests(db, job, page_size)
+                    if not digests:
+                        job.status = RegenerationStatus.COMPLETED
+                        job.finished_at = datetime.utcnow()
+                        break
+                    for digest in digests:
+                        if not self.regenerate_digest(db, job, digest):
+                            job.status = RegenerationStatus.PAUSED
+                            break
+                        # Commit per digest so an interrupted job loses at most one result
+                        db.commit()
+                        processed += 1
+                    if job.status == RegenerationStatus.PAUSED:
+                        break
+                else:
+                    job.status = RegenerationStatus.PAUSED
+            finally:
+                if job.status == RegenerationStatus.RUNNING:
+                    job.status = RegenerationStatus.PAUSED
+                db.commit()
+
+            logger.info(f"Regeneration job {job.id} {job.status.value}: {job.regenerated_count} regenerated, "
+                        f"{job.failed_count} failed, ${job.spent_usd:.4f} spent")
+            return self.progress(job)
+        finally:
+            db.close()
+
+    @staticmethod
+    def progress(job: RegenerationJob) -> Dict[str, Any]:
+        return {
+            "job_id": job.id,
+            "status": job.status.value,
+            "target_version": job.target_version,
+            "regenerated": job.regenerated_count,
+            "failed": job.failed_count,
+            "tokens_used": job.tokens_used,
+            "spent_usd": job.spent_usd,
+            "cost_cap_usd": job.cost_cap_usd
+        }
@@ -0,0 +1,174 @@
+"""
+Section-level validation and repair of generated digests.
+
+A digest is checked against the heading structure of MASTER_DIGEST_PROMPT.
+When required sections are missing, a chapter is left out of the chapter
+breakdown, or the completion was cut off at its token limit, only the affected
+sections are re-requested with a small prompt and merged back in, instead of
+regenerating the whole digest.
+"""
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.models.processing_log import RequestType
+from app.services.digest_formats import MIN_MASTER_SECTIONS, parse_sections, section_key
+from app.services.extractive_selector import select_sentences
+from app.services.processing_log_buffer import processing_log_buffer
+from app.services.summarizers import SummarizerInterface, SummaryGenerationError
+
+logger = logging.getLogger(__name__)
+
+# Level-two headings of the master digest, in the order the prompt lays them out
+MASTER_SECTIONS = [
+    "Concise Summary",
+    "Target Audience & Value",
+    "Key Takeaways",
+    "Chapter Breakdown",
+    "Segment Breakdown",
+    "Video Highlights",
+]
+# Sections every digest must have; the chapter breakdown is required only for videos with chapters
+REQUIRED_SECTIONS = ["Concise Summary", "Target Audience & Value", "Key Takeaways", "Video Highlights"]
+CHAPTER_SECTION = "Chapter Breakdown"
+
+# Usage counters a repair call adds to the result it repairs
+_USAGE_TOTALS = ("prompt_tokens", "cached_tokens", "completion_tokens", "total_tokens", "estimated_cost_usd")
+
+_CANONICAL_ORDER = {section_key(heading): i for i, heading in enumerate(MASTER_SECTIONS)}
+_HEADING_RE = re.compile(r"^## ", re.MULTILINE)
+
+def validate_digest(content: str, chapters: Optional[List[Dict[str, Any]]] = None, finish_reason: Optional[str] = None) -> List[str]:
+    """
+    Find the sections of a digest that need to be written again.
+
+    Args:
+        content: The generated digest
+        chapters: The video's chapters, if it has any
+        finish_reason: Provider finish reason; "length" marks a truncated completion
+
+    Returns:
+        Headings of the missing, incomplete or truncated sections in master order
+    """
+    sections = parse_sections(content)
+    required = REQUIRED_SECTIONS + ([CHAPTER_SECTION] if chapters else [])
+    needed = {section_key(heading) for heading in required if section_key(heading) not in sections}
+
+    # Each chapter title should appear in the chapter breakdown
+    chapter_key = section_key(CHAPTER_SECTION)
+    if chapters and chapter_key in sections:
+        breakdown = section_key(sections[chapter_key])
+        missing = [chapter for chapter in chapters if section_key(chapter.get("title", "")) not in breakdown]
+        if missing:
+            logger.info(f"Chapter breakdown is missing {len(missing)} of {len(chapters)} chapters")
+            needed.add(chapter_key)
+
+    # A completion cut off at the token limit leaves its last section unfinished
+    if finish_reason == "length" and sections:
+        needed.add(list(sections)[-1])
+
+    # Sections outside the master layout are named by their heading as written
+    return [heading for heading in MASTER_SECTIONS if section_key(heading) in needed] + [
+        sections[key].splitlines()[0][3:].strip() for key in sections if key in needed and key not in _CANONICAL_ORDER
+    ]
+
+def merge_sections(content: str, repaired: str) -> str:
+    """
+    Replace or insert the sections of repaired in content, keeping master order.
+
+    Text before the first heading is kept; sections unknown to the master
+    layout stay after the known ones in their original order.
+    """
+    match = _HEADING_RE.search(content)
+    preamble = content[:match.start()].strip() if match else content.strip()
+    sections = parse_sections(content)
+    sections.update(parse_sections(repaired))
+    ordered = sorted(sections.items(), key=lambda item: _CANONICAL_ORDER.get(item[0], len(_CANONICAL_ORDER)))
+    return "\n\n".join(([preamble] if preamble else []) + [text for _, text in ordered])
+
+def _combined_usage(usage: Dict[str, Any], repair_usage: Dict[str, Any], sections: List[str]) -> Dict[str, Any]:
+    """Add the repair call's tokens and cost to the original usage."""
+    combined = dict(usage)
+    for key in _USAGE_TOTALS:
+        combined[key] = usage.get(key, 0) + repair_usage.get(key, 0)
+    combined["repair"] = {"sections": sections, **{key: repair_usage.get(key, 0) for key in _USAGE_TOTALS}}
+    return combined
+
+def generation_usage(usage: Dict[str, Any]) -> Dict[str, Any]:
+    """Usage of the generation call alone, without the section repair added to it."""
+    repair = usage.get("repair")
+    if not repair:
+        return usage
+    own = dict(usage)
+    for key in _USAGE_TOTALS:
+        own[key] = usage.get(key, 0) - repair.get(key, 0)
+    return own
+
+def _record_repair_log(context: Dict[str, Any], started_at: datetime, sections: List[str], usage: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+    """Queue the ProcessingLog row of one section repair call."""
+    digest = context.get("digest")
+    processing_log_buffer.record(
+        RequestType.SUMMARIZE,
+        started_at,
+        video_id=digest.video_id if digest is not None else None,
+        llm_id=digest.llm_id if digest is not None else None,
+        usage=usage,
+        error=error,
+        request_params={"digest_id": digest.id if digest is not None else None, "repair_sections": sections},
+        response_metadata={"model": usage.get("model")} if usage else None
+    )
+
+def repair_summary_result(summarizer: SummarizerInterface, summary_result: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a summarizer result and re-request only the sections that need it.
+
+    Results that are not structured digests at all (mock or placeholder
+    summaries) are returned unchanged. A failed repair keeps the original result.
+
+    Args:
+        summarizer: Summarizer to request the sections from
+        summary_result: Result of generate() or generate_stream()
+        context: Generation context from load_generation_context()
+
+    Returns:
+        The result with repaired sections merged in and the repair's usage added
+    """
+    content = summary_result.get("summary") or ""
+    if not settings.DIGEST_REPAIR_ENABLED or len(parse_sections(content)) < MIN_MASTER_SECTIONS:
+        return summary_result
+
+    sections = validate_digest(content, context["video"].chapters, summary_result.get("finish_reason"))
+    if not sections:
+        return summary_result
+    return repair_sections(summarizer, summary_result, context, sections)
+
+def repair_sections(summarizer: SummarizerInterface, summary_result: Dict[str, Any], context: Dict[str, Any], sections: List[str]) -> Dict[str, Any]:
+    """
+    Re-request the given sections of a summarizer result and merge them in.
+
+    Returns:
+        The result with the sections replaced and the repair's usage added,
+        or the original result if the repair fails
+    """
+    content = summary_result.get("summary") or ""
+    video = context["video"]
+    logger.info(f"Repairing digest sections: {', '.join(sections)}")
+    # The model already summarized the whole video; a short excerpt is enough to fill gaps
+    excerpt = select_sentences(context["transcript_text"], settings.DIGEST_REPAIR_TRANSCRIPT_TOKENS)
+    started_at = datetime.utcnow()
+    try:
+        repair = summarizer.generate_sections(sections, content, excerpt, video.title, video.description, video.chapters)
+    except SummaryGenerationError as e:
+        logger.warning(f"Digest section repair failed, keeping the original digest: {str(e)}")
+        _record_repair_log(context, started_at, sections, error=str(e))
+        return summary_result
+    # Each summarizer call gets its own log row; record_processing_log leaves this share out
+    _record_repair_log(context, started_at, sections, repair["usage"])
+
+    repaired = {key: value for key, value in summary_result.items() if key not in ("summary", "usage", "finish_reason")}
+    repaired["summary"] = merge_sections(content, repair["summary"])
+    repaired["usage"] = _combined_usage(summary_result["usage"], repair["usage"], sections)
+    repaired["finish_reason"] = repair.get("finish_reason")
+    return repaired
@@ -0,0 +1,191 @@
+"""
+Reuse of digests across near-duplicate videos.
+
+When a video's transcript is near-identical to one that already has digests
+(a reupload, a mirror, a re-edit of the same talk), its digest is cloned
+instead of summarising the transcript again. Sections that do not fit the new
+video, such as a chapter breakdown written for different chapters, are
+adapted by re-requesting only those sections.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.digest import Digest as DigestModel, DigestType
+from app.models.transcript import Transcript as TranscriptModel, TranscriptStatus
+from app.models.video import Video as VideoModel
+from app.services.digest_formats import DERIVED_FORMATS, derive_content, parse_sections, section_key
+from app.services.digest_generation import load_generation_context
+from app.services.digest_repair import repair_sections, validate_digest
+from app.services.provider_registry import provider_registry
+from app.services.transcript_similarity import transcript_index
+
+logger = logging.getLogger(__name__)
+
+def near_duplicate_digests(db: Session, video: VideoModel) -> List[Tuple[float, VideoModel, List[DigestModel]]]:
+    """
+    Digests of videos whose transcript is a near-duplicate of this video's.
+
+    Returns:
+        (similarity, video, digests) for each near-duplicate video with generated digests, most similar first
+    """
+    transcript = db.query(TranscriptModel).filter(
+        TranscriptModel.video_id == video.id,
+        TranscriptModel.status == TranscriptStatus.PROCESSED
+    ).first()
+    if transcript is None or transcript.minhash_signature is None:
+        return []
+
+    similarity_by_video: Dict[int, float] = {}
+    for video_id, _, similarity in transcript_index.find_near_duplicates(db, transcript):
+        similarity_by_video.setdefault(video_id, similarity)
+    if not similarity_by_video:
+        return []
+
+    digests_by_video: Dict[int, List[DigestModel]] = {}
+    for digest in db.query(DigestModel).filter(
+        DigestModel.video_id.in_(similarity_by_video),
+        DigestModel.content != ""
+    ).all():
+        if "error" not in (digest.extra_data or {}):
+            digests_by_video.setdefault(digest.video_id, []).append(digest)
+    videos = {
+        duplicate.id: duplicate
+        for duplicate in db.query(VideoModel).filter(VideoModel.id.in_(digests_by_video)).all()
+    }
+    return sorted(
+        [(similarity_by_video[video_id], videos[video_id], digests) for video_id, digests in digests_by_video.items() if video_id in videos],
+        key=lambda match: -match[0]
+    )
+
+def sections_to_adapt(content: str, video: VideoModel) -> List[str]:
+    """
+    Sections of a cloned digest that do not fit the new video.
+
+    Checked like a generated digest, but only sections the clone has count:
+    a digest type cut down to a few sections is not missing the others.
+    """
+    sections = parse_sections(content)
+    return [heading for heading in validate_digest(content, video.chapters) if section_key(heading) in sections]
+
+def _cloned_content(source: DigestModel, digest_type: str) -> Optional[str]:
+    if DigestType(source.digest_type) == DigestType(digest_type):
+        return source.content
+    return derive_content(source.content, digest_type)
+
+def reuse_offers(db: Session, video: VideoModel) -> List[Dict[str, Any]]:
+    """
+    Describe which near-duplicate digests can be reused for a video.
+
+    Each offer says whether the digests can be cloned as-is or need some
+    sections adapted to this video first. Requests with reuse_duplicates
+    only take offers at or above TRANSCRIPT_CLONE_THRESHOLD on their own.
+    """
+    offers = []
+    for similarity, duplicate, digests in near_duplicate_digests(db, video):
+        sections = sorted({section for digest in digests for section in sections_to_adapt(digest.content, video)})
+        offers.append({
+            "video_id": duplicate.id,
+            "title": duplicate.title,
+            "similarity": round(similarity, 3),
+            "action": "adapt" if sections else "clone",
+            "sections_to_adapt": sections,
+            "digests": [{"id": digest.id, "digest_type": digest.digest_type} for digest in digests]
+        })
+    return offers
+
+def clone_digest(digest: DigestModel, source: DigestModel, video: VideoModel, similarity: float) -> Optional[List[str]]:
+    """
+    Fill a digest with the content of a near-duplicate video's digest; the caller commits.
+
+    Returns:
+        Sections that still need adapting to the new video, or None if the
+        source cannot provide the digest's type
+    """
+    content = _cloned_content(source, digest.digest_type)
+    if content is None:
+        return None
+    source_data = source.extra_data or {}
+    if DigestType(source.digest_type) == DigestType(digest.digest_type):
+        summary_format = source_data.get("summary_format")
+    else:
+        summary_format = DERIVED_FORMATS[DigestType(digest.digest_type)][0].value
+    digest.content = content
+    digest.tokens_used = 0
+    digest.cost = 0.0
+    digest.model_version = source.model_version
+    digest.prompt_version = source.prompt_version
+    digest.llm_id = digest.llm_id or source.llm_id
+    digest.generated_at = datetime.utcnow()
+    digest.extra_data = {
+        "cloned_from": source.id,
+        "similarity": round(similarity, 3),
+        "provider": source_data.get("provider", "openai")
+    }
+    if summary_format:
+        digest.extra_data["summary_format"] = summary_format
+    sections = sections_to_adapt(content, video)
+    if sections:
+        digest.extra_data["adapt_sections"] = sections
+    return sections
+
+def reuse_duplicate_digest(db: Session, digest: DigestModel, video: VideoModel, source_digest_id: Optional[int] = None) -> Optional[List[str]]:
+    """
+    Clone a near-duplicate video's digest into digest; the caller commits.
+
+    Without source_digest_id only duplicates at or above
+    TRANSCRIPT_CLONE_THRESHOLD are used automatically; with it, any offered
+    digest can be chosen.
+
+    Returns:
+        Sections still to adapt (possibly none), or None if nothing was reused
+    """
+    for similarity, _, digests in near_duplicate_digests(db, video):
+        if source_digest_id is None and similarity < settings.TRANSCRIPT_CLONE_THRESHOLD:
+            break
+        # Prefer a digest of the requested type over cutting one from another type
+        digests = sorted(digests, key=lambda source: DigestType(source.digest_type) != DigestType(digest.digest_type))
+        for source in digests:
+            if source_digest_id is not None and source.id != source_digest_id:
+                continue
+            sections = clone_digest(digest, source, video, similarity)
+            if sections is None:
+                continue
+            if digest.id is None:
+                db.add(digest)
+            logger.info(f"Cloned digest {source.id} for video {video.id} (similarity {similarity:.2f})")
+            return sections
+    return None
+
+def adapt_cloned_digest(db: Session, digest: DigestModel) -> bool:
+    """
+    Re-request the sections of a cloned digest that do not fit its video; the caller commits.
+
+    Returns:
+        True if any section was rewritten
+    """
+    sections = (digest.extra_data or {}).get("adapt_sections")
+    if not sections or not digest.content:
+        return False
+    context = load_generation_context(db, digest)
+    if context is None:
+        return False
+    original = {"summary": digest.content, "usage": {}, "finish_reason": None}
+    # The repair call logs its own processing log row
+    result = repair_sections(provider_registry.get_summarizer(context["provider"]), original, context, sections)
+    if result is original:
+        return False
+
+    usage = result["usage"]
+    digest.content = result["summary"]
+    digest.tokens_used = usage.get("total_tokens", 0)
+    digest.cost = usage.get("estimated_cost_usd", 0.0)
+    extra_data = {key: value for key, value in (digest.extra_data or {}).items() if key != "adapt_sections"}
+    extra_data["adapted_sections"] = usage["repair"]["sections"]
+    digest.extra_data = extra_data
+    digest.last_updated = datetime.utcnow()
+    logger.info(f"Adapted sections {', '.join(extra_data['adapted_sections'])} of cloned digest {digest.id}")
+    return True
@@ -0,0 +1,346 @@
+"""
+Streaming digest generation relayed as Server-Sent Events.
+
+One producer thread per digest reads provider tokens into an in-memory buffer
+and checkpoints the partial text to the digest row at intervals. Any number of
+SSE subscribers relay that buffer from their own offset, so a client that
+reconnects with Last-Event-ID resumes where it left off. Subscribers on another
+worker tail the persisted checkpoints instead.
+
+Generation is only started when the client asks for it, and a worker claims
+the digest row before starting, as background generation does, so two
+workers never pay for the same digest; a client arriving while another
+worker generates attaches to that generation.
+The stored digest can differ from the streamed text once sections are
+repaired; clients whose text no longer matches are sent a reset and the
+stored content.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from threading import Lock, Thread
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.database import WorkerSessionLocal
+from app.models.digest import Digest as DigestModel
+from app.services.digest_generation import (
+    STREAMING,
+    claim_digest,
+    claim_is_fresh,
+    load_generation_context,
+    summarizer_arguments,
+    apply_summary_result,
+    record_generation_error,
+    record_processing_log
+)
+from app.services.digest_formats import derive_all_formats
+from app.services.digest_repair import repair_summary_result
+from app.services.provider_router import provider_router, backend_name
+from app.services.summarizers import SummaryGenerationError
+
+logger = logging.getLogger(__name__)
+
+# How often subscribers poll the in-memory buffer
+POLL_INTERVAL_SECONDS = 0.05
+# Comment lines keep idle proxies from closing the connection
+KEEPALIVE_SECONDS = 15.0
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Format a single Server-Sent Event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+def text_hash(text: str) -> str:
+    """Fingerprint of streamed text, to tell whether the stored digest still matches it."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+class DigestStream:
+    """Text produced so far by one in-flight digest generation."""
+
+    def __init__(self, digest_id: int):
+        self.digest_id = digest_id
+        self._parts: List[str] = []
+        self._length = 0
+        self._done = False
+        self._error: Optional[str] = None
+        self._content: Optional[str] = None
+        self._lock = Lock()
+
+    @property
+    def text(self) -> str:
+        with self._lock:
+            return "".join(self._parts)
+
+    def append(self, text: str) -> None:
+        with self._lock:
+            self._parts.append(text)
+            self._length += len(text)
+
+    @property
+    def content(self) -> Optional[str]:
+        """Digest as stored once generation finished, which repairs can make differ from text."""
+        with self._lock:
+            return self._content
+
+    def finish(self, error: Optional[str] = None, content: Optional[str] = None) -> None:
+        with self._lock:
+            self._done = True
+            self._error = error
+            self._content = content
+
+    def read_from(self, offset: int) -> Tuple[str, bool, Optional[str]]:
+        """Return (text after offset, finished, error)."""
+        with self._lock:
+            text = "".join(self._parts)[offset:] if offset < self._length else ""
+            return text, self._done, self._error
+
+class DigestStreamHub:
+    """Registry of in-flight streaming generations in this process."""
+
+    def __init__(self, session_factory: Callable = WorkerSessionLocal):
+        self._session_factory = session_factory
+        self._streams: Dict[int, DigestStream] = {}
+        self._lock = Lock()
+
+    def get(self, digest_id: int) -> Optional[DigestStream]:
+        with self._lock:
+            return self._streams.get(digest_id)
+
+    def claim(self, digest_id: int) -> bool:
+        """Claim an empty digest for streaming; False when another worker or a batch has it."""
+        db = self._session_factory()
+        try:
+            return claim_digest(db, digest_id, STREAMING)
+        finally:
+            db.close()
+
+    def start(self, digest_id: int) -> DigestStream:
+        """Start generating a claimed digest in a producer thread, or return the running stream."""
+        with self._lock:
+            stream = self._streams.get(digest_id)
+            if stream is not None:
+                return stream
+            stream = DigestStream(digest_id)
+            self._streams[digest_id] = stream
+        Thread(target=self._produce, args=(stream,), name=f"digest-stream-{digest_id}", daemon=True).start()
+        return stream
+
+    def _produce(self, stream: DigestStream) -> None:
+        """Run one generation, checkpointing partial text and storing the final result."""
+        db = self._session_factory()
+        digest = None
+        try:
+            digest = db.query(DigestModel).filter(DigestModel.id == stream.digest_id).first()
+            if not digest:
+                stream.finish(error="Digest not found")
+                return
+            if digest.content:
+                # Completed elsewhere between the subscriber's check and this start
+                stream.finish(content=digest.content)
+                return
+
+            context = load_generation_context(db, digest)
+            if context is None:
+                # Also drops the claim, so the digest can be generated again
+                self._fail(db, digest, stream, (digest.extra_data or {}).get("error", "Digest cannot be generated"))
+                return
+
+            backend, summarizer = provider_router.select(context["provider"])
+            context["backend"] = backend_name(backend)
+            logger.info(f"Streaming digest {digest.id} for video {digest.video_id} using backend: {context['backend']}")
+            self._checkpoint(db, digest, stream)
+            last_checkpoint = time.monotonic()
+            started_at = datetime.utcnow()
+            summary_result = None
+
+            call_started = time.monotonic()
+            try:
+                for event in summarizer.generate_stream(**summarizer_arguments(context)):
+                    if "delta" in event:
+                        stream.append(event["delta"])
+                        if time.monotonic() - last_checkpoint >= settings.DIGEST_STREAM_CHECKPOINT_SECONDS:
+                            self._checkpoint(db, digest, stream)
+                            last_checkpoint = time.monotonic()
+                    elif "result" in event:
+                        summary_result = event["result"]
+
+                if summary_result is None:
+                    raise SummaryGenerationError("Stream ended without a result")
+            except Exception:
+                provider_router.record(backend, time.monotonic() - call_started, ok=False)
+                raise
+            provider_router.record(backend, time.monotonic() - call_started, ok=True)
+
+            # Clients already saw the streamed text; the stored digest gets the repaired sections
+            summary_result = repair_summary_result(summarizer, summary_result, context)
+            apply_summary_result(digest, summary_result, context)
+            # Lets reconnecting clients tell whether their offset still points into the stored text
+            streamed = stream.text
+            digest.extra_data = {
+                **digest.extra_data,
+                "stream": {"status": "done", "length": len(streamed), "hash": text_hash(streamed)}
+            }
+            record_processing_log(digest, started_at, summary_result)
+            derive_all_formats(db, digest)
+            db.commit()
+            stream.finish(content=digest.content)
+            logger.info(f"Streamed digest {digest.id} generated successfully")
+
+        except SummaryGenerationError as e:
+            logger.error(f"Error streaming summary: {str(e)}")
+            self._fail(db, digest, stream, str(e))
+        except Exception as e:
+            logger.error(f"Unexpected error in streaming digest generation: {str(e)}", exc_info=True)
+            self._fail(db, digest, stream, f"Unexpected error: {str(e)}")
+        finally:
+            db.close()
+            with self._lock:
+                self._streams.pop(stream.digest_id, None)
+
+    def _checkpoint(self, db, digest: DigestModel, stream: DigestStream) -> None:
+        """Persist the partial text so other workers and late clients can pick it up."""
+        text = stream.text
+        extra_data = dict(digest.extra_data or {})
+        extra_data["partial_content"] = text
+        extra_data["stream"] = {
+            "status": STREAMING,
+            "offset": len(text),
+            "checkpoint_at": datetime.utcnow().isoformat()
+        }
+        digest.extra_data = extra_data
+        db.commit()
+
+    def _fail(self, db, digest: Optional[DigestModel], stream: DigestStream, message: str) -> None:
+        try:
+            db.rollback()
+            if digest is not None:
+                record_generation_error(digest, message)
+                db.commit()
+        except Exception as e:
+            logger.error(f"Error recording streaming failure: {str(e)}", exc_info=True)
+        stream.finish(error=message)
+
+    def load_state(self, digest_id: int) -> Optional[Dict[str, Any]]:
+        """Read the persisted state of a digest for subscribers without a local stream."""
+        db = self._session_factory()
+        try:
+            digest = db.query(DigestModel).filter(DigestModel.id == digest_id).first()
+            if digest is None:
+                return None
+            extra_data = digest.extra_data or {}
+            stream_info = extra_data.get("stream") or {}
+            return {
+                "content": digest.content,
+                "streamed_hash": stream_info.get("hash") if stream_info.get("status") == "done" else None,
+                "partial_content": extra_data.get("partial_content") or "",
+                # Streams on other workers and background generations alike
+                "streaming_elsewhere": claim_is_fresh(stream_info),
+                "batch_pending": "batch_id" in extra_data,
+                "error": extra_data.get("error")
+            }
+        finally:
+            db.close()
+
+digest_stream_hub = DigestStreamHub()
+
+def replay_content(digest_id: int, content: str, offset: int, streamed: Optional[str]) -> List[str]:
+    """
+    Events that bring a client holding offset characters of streamed text to the stored content.
+
+    streamed is the text the client was sent, or its text_hash when only that
+    is known; the offset is only trusted while it matches the stored content.
+    """
+    events = []
+    matches = streamed == content or streamed == text_hash(content)
+    if offset > 0 and not matches:
+        events.append(format_sse("reset", {"digest_id": digest_id}))
+        offset = 0
+    if offset < len(content):
+        events.append(format_sse("token", {"text": content[offset:]}, event_id=len(content)))
+    events.append(format_sse("done", {"digest_id": digest_id, "length": len(content)}))
+    return events
+
+async def relay_digest_stream(
+    digest_id: int,
+    offset: int = 0,
+    generate: bool = False,
+    hub: DigestStreamHub = digest_stream_hub
+) -> AsyncIterator[str]:
+    """
+    Relay a digest as SSE events starting at a character offset.
+
+    Events: "token" (id = offset after the chunk), "reset" (the text sent so
+    far is superseded, discard it), "done" and "error". An empty or failed
+    digest is only generated when generate is set; otherwise its stored error
+    is reported.
+    """
+    last_sent = time.monotonic()
+    stream = None
+    while True:
+        if stream is None:
+            stream = hub.get(digest_id)
+        if stream is None:
+            state = await asyncio.to_thread(hub.load_state, digest_id)
+            if state is None:
+                yield format_sse("error", {"detail": "Digest not found"})
+                return
+            if state["content"]:
+                for event in replay_content(digest_id, state["content"], offset, state.get("streamed_hash")):
+                    yield event
+                return
+            if state["streaming_elsewhere"]:
+                # Another worker is generating; tail its checkpoints (a background
+                # generation has none, so its digest arrives whole) and never
+                # start a second generation if that one fails
+                generate = False
+                partial = state["partial_content"]
+                if offset < len(partial):
+                    yield format_sse("token", {"text": partial[offset:]}, event_id=len(partial))
+                    offset = len(partial)
+                    last_sent = time.monotonic()
+                elif time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                await asyncio.sleep(settings.DIGEST_STREAM_CHECKPOINT_SECONDS)
+                continue
+            if state.get("batch_pending"):
+                yield format_sse("error", {"detail": "Digest is being generated in a batch"})
+                return
+            if not generate:
+                yield format_sse("error", {"detail": state["error"] or "Digest has not been generated"})
+                return
+            # Nothing is generating this digest; start here if no other worker claims it first
+            if not await asyncio.to_thread(hub.claim, digest_id):
+                generate = False
+                continue
+            stream = hub.start(digest_id)
+            if offset > 0:
+                yield format_sse("reset", {"digest_id": digest_id})
+                offset = 0
+
+        text, done, error = stream.read_from(offset)
+        if text:
+            offset += len(text)
+            yield format_sse("token", {"text": text}, event_id=offset)
+            last_sent = time.monotonic()
+        if done:
+            if error:
+                yield format_sse("error", {"detail": error})
+            elif stream.content is not None:
+                for event in replay_content(digest_id, stream.content, offset, stream.text):
+                    yield event
+            else:
+                yield format_sse("done", {"digest_id": digest_id, "length": offset})
+            return
+        if time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
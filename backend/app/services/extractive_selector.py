@@ -0,0 +1,160 @@
+"""
+Extractive pre-selection of transcript sentences for long videos.
+
+When a transcript does not fit the prompt budget, sending its first N tokens
+drops the end of the video entirely. Instead, sentences are ranked by TF-IDF
+centrality (cosine similarity to the rest of the transcript, computed with
+NumPy from sparse term weights) and picked evenly across the timeline until
+the token budget is filled, so the model sees the whole video in one call.
+Sentence windows and timeline segments are sized in tokens, the unit the
+budget is spent in.
+"""
+import logging
+import re
+from typing import List, Optional
+
+from app.services.tokenizer import chunk_by_tokens, count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Try to import numpy but don't fail if it's not available
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logger.warning("numpy library not installed. Long transcripts will be truncated instead of ranked.")
+    NUMPY_AVAILABLE = False
+
+# Auto-captions are rarely punctuated, so long runs are split into token-bounded windows
+MAX_SENTENCE_TOKENS = 50
+# Marks skipped transcript between selected sentences
+GAP_MARKER = " ... "
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Common English function words carry no topical signal
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be because been before being both but by can
+could did do does doing don't down during each few for from further get got had has have having he
+her here hers him his how i i'm if in into is it it's its just know like me more most my no nor not
+now of off on once only or other our out over own really right so some such than that that's the
+their them then there these they this those through to too um uh under until up very was we we're
+well were what when where which while who why will with would yeah you you're your
+""".split())
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, breaking unpunctuated runs into windows of MAX_SENTENCE_TOKENS."""
+    sentences = []
+    for piece in _SENTENCE_END_RE.split(text.strip()):
+        # Most punctuated sentences fit in one window and are counted only once
+        if count_tokens(piece) <= MAX_SENTENCE_TOKENS:
+            sentences.append(" ".join(piece.split()))
+        else:
+            sentences.extend(chunk_by_tokens(piece, MAX_SENTENCE_TOKENS))
+    return [sentence for sentence in sentences if sentence]
+
+def rank_sentences(sentences: List[str]) -> "np.ndarray":
+    """
+    Score each sentence by its TF-IDF cosine similarity to the whole transcript.
+
+    Term weights are kept as (sentence, term, weight) triples, so the cost is
+    linear in the number of words rather than quadratic in sentences.
+    """
+    vocabulary = {}
+    sentence_ids: List[int] = []
+    term_ids: List[int] = []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD_RE.findall(sentence.lower()):
+            if word not in STOPWORDS:
+                sentence_ids.append(i)
+                term_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    n = len(sentences)
+    if not term_ids:
+        return np.zeros(n)
+
+    vocabulary_size = len(vocabulary)
+    keys, counts = np.unique(
+        np.asarray(sentence_ids, dtype=np.int64) * vocabulary_size + np.asarray(term_ids, dtype=np.int64),
+        return_counts=True
+    )
+    rows = keys // vocabulary_size
+    cols = keys % vocabulary_size
+
+    document_frequency = np.bincount(cols, minlength=vocabulary_size)
+    idf = np.log((1 + n) / (1 + document_frequency)) + 1.0
+    weights = (1.0 + np.log(counts)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+    weights /= norms[rows]
+
+    # Similarity to the summed unit vectors equals the sum of cosine similarities to every sentence
+    centroid = np.bincount(cols, weights=weights, minlength=vocabulary_size)
+    return np.bincount(rows, weights=weights * centroid[cols], minlength=n)
+
+def select_sentences(text: str, max_tokens: int, buckets: int = 10) -> str:
+    """
+    Pick the most central sentences, spread across the transcript, within max_tokens.
+
+    The transcript is divided into timeline buckets holding an equal number
+    of its tokens, and each gets an equal share of the budget; budget left
+    over by short buckets is then filled with the best remaining sentences
+    from anywhere in the video.
+
+    Args:
+        text: Transcript text
+        max_tokens: Token budget for the returned text
+        buckets: Number of timeline segments to spread the selection over
+
+    Returns:
+        Selected sentences in their original order, with gaps marked by "..."
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if not NUMPY_AVAILABLE:
+        return truncate_to_tokens(text, max_tokens)
+
+    sentences = split_sentences(text)
+    scores = rank_sentences(sentences)
+    gap_tokens = count_tokens(GAP_MARKER)
+    costs = np.array([count_tokens(sentence) + gap_tokens for sentence in sentences])
+
+    n = len(sentences)
+    buckets = max(1, min(buckets, n))
+    # A sentence belongs to the bucket its first token falls in, so long and short
+    # sentences weigh by their length rather than counting one each
+    offsets = np.cumsum(costs) - costs
+    bucket_of = np.minimum(offsets * buckets // costs.sum(), buckets - 1)
+    selected = np.zeros(n, dtype=bool)
+    used = 0
+
+    # Equal share per timeline bucket, best sentences first
+    share = max_tokens // buckets
+    for bucket in range(buckets):
+        members = np.flatnonzero(bucket_of == bucket)
+        spent = 0
+        for i in members[np.argsort(-scores[members], kind="stable")]:
+            if spent + costs[i] <= share:
+                selected[i] = True
+                spent += costs[i]
+        used += spent
+
+    # Fill what is left with the best remaining sentences anywhere
+    for i in np.argsort(-scores, kind="stable"):
+        if not selected[i] and used + costs[i] <= max_tokens:
+            selected[i] = True
+            used += costs[i]
+
+    parts = []
+    previous: Optional[int] = None
+    for i in np.flatnonzero(selected):
+        if previous is not None:
+            parts.append(" " if i == previous + 1 else GAP_MARKER)
+        parts.append(sentences[i])
+        previous = i
+    if parts and np.flatnonzero(selected)[0] > 0:
+        parts.insert(0, GAP_MARKER.lstrip())
+    # Token counts of joined text can differ slightly from the sum of the pieces
+    return truncate_to_tokens("".join(parts), max_tokens)
@@ -0,0 +1,72 @@
+"""
+Column projections for list endpoints.
+
+List responses only carry what a card or table row shows. Large Text and
+JSONB columns (descriptions, chapters, transcript and digest bodies) are not
+loaded at all. Summaries and descriptions are cut to a snippet in SQL, so the
+full text never leaves the database. Detail endpoints load complete rows.
+"""
+from typing import Any, List, Optional
+
+from sqlalchemy import Text, case, func, literal
+from sqlalchemy.orm import load_only, selectinload, with_expression
+
+from app.core.config import settings
+from app.models.channel import Channel as ChannelModel
+from app.models.digest import Digest as DigestModel
+from app.models.transcript import Transcript as TranscriptModel
+from app.models.video import Video as VideoModel
+
+def snippet(column: Any, length: Optional[int] = None) -> Any:
+    """SQL expression for the first length characters of a text column, with an ellipsis if cut."""
+    length = length or settings.LIST_SNIPPET_CHARS
+    return case(
+        (func.length(column) > length, func.substr(column, 1, length, type_=Text) + literal("…")),
+        else_=column
+    )
+
+def video_list_options() -> List[Any]:
+    """
+    Load options for video cards.
+
+    The statement must outer join the latest digest
+    (DigestModel.id == VideoModel.latest_digest_id) for the summary snippet;
+    videos without one fall back to their own summary column.
+    """
+    return [
+        load_only(
+            VideoModel.id, VideoModel.youtube_id, VideoModel.title, VideoModel.webpage_url,
+            VideoModel.thumbnail, VideoModel.duration, VideoModel.view_count, VideoModel.like_count,
+            VideoModel.upload_date, VideoModel.tags, VideoModel.categories, VideoModel.channel_id,
+            VideoModel.latest_digest_id, VideoModel.processing_status, VideoModel.processed, VideoModel.error_message,
+            VideoModel.last_processed, VideoModel.created_at, VideoModel.updated_at
+        ),
+        selectinload(VideoModel.channel).load_only(
+            ChannelModel.id, ChannelModel.youtube_channel_id, ChannelModel.name,
+            ChannelModel.thumbnail_url, ChannelModel.subscriber_count
+        ),
+        with_expression(VideoModel.summary_snippet, snippet(func.coalesce(DigestModel.content, VideoModel.summary))),
+        with_expression(VideoModel.description_snippet, snippet(VideoModel.description))
+    ]
+
+def digest_list_options() -> List[Any]:
+    """Load options for digest rows: metadata and a snippet, without content or extra_data."""
+    return [
+        load_only(
+            DigestModel.id, DigestModel.video_id, DigestModel.user_id, DigestModel.llm_id,
+            DigestModel.digest_type, DigestModel.tokens_used, DigestModel.cost, DigestModel.model_version,
+            DigestModel.prompt_version, DigestModel.generated_at, DigestModel.last_updated,
+            DigestModel.created_at, DigestModel.updated_at
+        ),
+        with_expression(DigestModel.content_snippet, snippet(DigestModel.content))
+    ]
+
+def transcript_list_options() -> List[Any]:
+    """Load options for transcript rows: status and size, without content, signature or error log."""
+    return [
+        load_only(
+            TranscriptModel.id, TranscriptModel.video_id, TranscriptModel.source_url, TranscriptModel.status,
+            TranscriptModel.token_count, TranscriptModel.fetched_at, TranscriptModel.processed_at,
+            TranscriptModel.created_at, TranscriptModel.updated_at
+        )
+    ]
@@ -0,0 +1,180 @@
+"""
+Keyset (cursor) pagination for listings.
+
+Listings are ordered by a sort key with the row ID as tiebreaker, and the
+cursor carries the sort value and ID of the last row returned. The next page
+starts with a row-value comparison against them, which an index on
+(sort key, id) answers by seeking straight to the position. Page 5,000 costs
+the same as page 1, and rows inserted between requests do not shift pages.
+
+Nullable sort columns are sorted through COALESCE with a sentinel, matching
+the expression indexes on those columns, so the comparison never meets NULL.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, func, literal, select, text, tuple_
+
+from app.core.config import settings
+from app.models.digest import Digest as DigestModel
+from app.models.video import Video as VideoModel
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor cannot be decoded or belongs to another sort order."""
+
+class SortKey:
+    """A sortable column, with the value NULLs sort as, a parser for cursor values and its usual order."""
+
+    def __init__(
+        self,
+        column: Any,
+        null_value: Any = None,
+        parse: Optional[Callable[[Any], Any]] = None,
+        default_order: str = "desc"
+    ):
+        self.column = column
+        self.null_value = null_value
+        self.parse = parse or (lambda value: value)
+        self.default_order = default_order
+
+    @property
+    def expression(self) -> Any:
+        if self.null_value is None:
+            return self.column
+        # Rendered inline rather than as a bind parameter, so the planner
+        # matches the expression index even with server-side parameters
+        return func.coalesce(self.column, literal(self.null_value, literal_execute=True))
+
+    def value_of(self, row: Any) -> Any:
+        value = getattr(row, self.column.key)
+        return self.null_value if value is None else value
+
+# Each key has a matching (sort key, id) index, see the models
+VIDEO_SORT_KEYS: Dict[str, SortKey] = {
+    "created_at": SortKey(VideoModel.created_at, parse=datetime.fromisoformat),
+    "upload_date": SortKey(VideoModel.upload_date, null_value=""),
+    "view_count": SortKey(VideoModel.view_count, null_value=-1),
+    "title": SortKey(VideoModel.title, default_order="asc")
+}
+
+DIGEST_SORT_KEYS: Dict[str, SortKey] = {
+    "created_at": SortKey(DigestModel.created_at, parse=datetime.fromisoformat)
+}
+
+def encode_cursor(sort: str, order: str, value: Any, row_id: int) -> str:
+    """Opaque cursor pointing after the row with this sort value and ID."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "o": order, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, order: str, sort_key: SortKey) -> Tuple[Any, int]:
+    """
+    Sort value and ID a cursor points after.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or was issued for another sort order
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload["s"] != sort or payload["o"] != order:
+            raise InvalidCursorError("Cursor was issued for a different sort order")
+        return sort_key.parse(payload["v"]), int(payload["id"])
+    except InvalidCursorError:
+        raise
+    except (binascii.Error, UnicodeDecodeError, TypeError, KeyError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {str(e)}")
+
+def keyset_page(
+    statement: Select,
+    id_column: Any,
+    sort_key: SortKey,
+    order: str,
+    limit: int,
+    after: Optional[Tuple[Any, int]] = None
+) -> Select:
+    """
+    Order a statement by the sort key and ID and restrict it to one page.
+
+    One row more than limit is selected to tell whether a next page exists.
+    """
+    expression = sort_key.expression
+    if after is not None:
+        position = tuple_(expression, id_column)
+        bound = tuple_(*after)
+        statement = statement.where(position < bound if order == "desc" else position > bound)
+    if order == "desc":
+        statement = statement.order_by(expression.desc(), id_column.desc())
+    else:
+        statement = statement.order_by(expression.asc(), id_column.asc())
+    return statement.limit(limit + 1)
+
+def split_page(rows: Sequence[Any], sort: str, order: str, sort_key: SortKey, limit: int) -> Tuple[List[Any], Optional[str]]:
+    """The rows of a page fetched by keyset_page and the cursor of the next page, if any."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, order, sort_key.value_of(last), last.id)
+
+async def fetch_page(
+    db: Any,
+    statement: Select,
+    id_column: Any,
+    sort_keys: Dict[str, SortKey],
+    sort: str,
+    order: Optional[str],
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of a listing of ORM entities.
+
+    Without an order, the sort key's default order is used.
+
+    Returns:
+        The rows of the page and the cursor of the next page, or None on the last page
+
+    Raises:
+        InvalidCursorError: If the sort order is unknown or the cursor invalid for it
+    """
+    if sort not in sort_keys:
+        raise InvalidCursorError(f"Unknown sort key '{sort}', expected one of: {', '.join(sort_keys)}")
+    sort_key = sort_keys[sort]
+    order = order or sort_key.default_order
+    if order not in ("asc", "desc"):
+        raise InvalidCursorError("Order must be 'asc' or 'desc'")
+    after = decode_cursor(cursor, sort, order, sort_key) if cursor else None
+    result = await db.execute(keyset_page(statement, id_column, sort_key, order, limit, after))
+    return split_page(result.scalars().all(), sort, order, sort_key, limit)
+
+async def total_count(db: Any, table: Any, *criteria: Any) -> Tuple[int, bool]:
+    """
+    Number of rows matching the criteria, and whether it is an estimate.
+
+    An unfiltered listing uses the planner's row estimate from pg_class once
+    the table holds at least PAGINATION_EXACT_COUNT_LIMIT rows, instead of
+    counting every row. Filtered listings are counted exactly through the
+    index on their filter column.
+    """
+    if not criteria and db.get_bind().dialect.name == "postgresql":
+        estimate = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+            {"table_name": table.name}
+        )
+        if estimate is not None and estimate >= settings.PAGINATION_EXACT_COUNT_LIMIT:
+            return int(estimate), True
+    return await db.scalar(select(func.count()).select_from(table).where(*criteria)), False
+
+def page_headers(next_cursor: Optional[str], total: int, estimated: bool) -> Dict[str, str]:
+    """Response headers describing a page: where the next one starts and the total."""
+    headers = {"X-Total-Count": str(total)}
+    if estimated:
+        headers["X-Total-Count-Estimated"] = "true"
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return headers
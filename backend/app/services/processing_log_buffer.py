@@ -0,0 +1,305 @@
+"""
+Write-behind recording of ProcessingLog rows.
+
+Summarizer calls and yt-dlp extractions hand their log records to an in-memory
+buffer instead of writing them in the request's own transaction. A background
+thread flushes the buffer with multi-row inserts every few seconds or once a
+batch fills up, so logging adds no database round trip to the hot path. Each
+flush also folds its rows into the hourly and daily processing rollups. The
+buffer is bounded: if the database stays unavailable, the oldest records are
+dropped and counted, and at shutdown whatever cannot be written within the
+timeout is reported as lost. A batch rejected while the database is up is
+retried row by row, and rows that still fail are logged and dropped so they
+cannot block the rows queued behind them.
+"""
+import inspect
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import WorkerSessionLocal
+from app.models.processing_log import ProcessingLog as ProcessingLogModel, RequestType
+from app.services.processing_rollups import apply_to_rollups
+
+logger = logging.getLogger(__name__)
+
+def is_database_unavailable(error: Exception) -> bool:
+    """Whether an insert failed because the database could not be reached, rather than because of the rows."""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError))
+
+class ProcessingLogBuffer:
+    """Buffers processing log rows and writes them in batches from a background thread."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = WorkerSessionLocal,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        max_pending: int = 10000
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._wake = Event()
+        self._stopped = False
+        self._thread: Optional[Thread] = None
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.flushes = 0
+
+    def record(
+        self,
+        request_type: RequestType,
+        started_at: datetime,
+        video_id: Optional[int] = None,
+        llm_id: Optional[int] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        request_params: Optional[Dict[str, Any]] = None,
+        response_metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Queue one processing log row; returns immediately.
+
+        Args:
+            request_type: Kind of call being logged
+            started_at: When the call started; the duration runs until now
+            video_id: Associated video, if it exists yet
+            llm_id: LLM used, for summarizer calls
+            usage: Summarizer usage dictionary (tokens, cost, model)
+            error: Error message if the call failed
+            request_params: Parameters of the call
+            response_metadata: Metadata of the result
+        """
+        completed_at = datetime.utcnow()
+        usage = usage or {}
+        row = {
+            "video_id": video_id,
+            "llm_id": llm_id,
+            "request_type": request_type,
+            "tokens_used": usage.get("total_tokens", 0),
+            "cost_estimate": usage.get("estimated_cost_usd", 0.0),
+            "input_tokens": usage.get("prompt_tokens"),
+            "output_tokens": usage.get("completion_tokens"),
+            "cached_tokens": usage.get("cached_tokens"),
+            "duration_ms": int((completed_at - started_at).total_seconds() * 1000),
+            "started_at": started_at,
+            "completed_at": completed_at,
+            "error_details": {"message": error} if error else None,
+            "request_params": request_params,
+            "response_metadata": response_metadata
+        }
+        with self._lock:
+            if self._stopped:
+                self.dropped += 1
+                logger.warning(f"Processing log buffer is shut down; dropped {request_type} record")
+                return
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+            self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def _ensure_thread(self) -> None:
+        # Called with self._lock held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = Thread(target=self._run, name="processing-log-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if not self._stopped:
+                self.flush()
+
+    def flush(self) -> int:
+        """
+        Write all pending rows in batches of batch_size.
+
+        When the database is unavailable, the rows of the failed batch go
+        back to the front of the buffer (within max_pending) for the next
+        flush. Any other failure is retried row by row.
+
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    break
+                try:
+                    self._insert(batch)
+                except Exception as e:
+                    if is_database_unavailable(e):
+                        logger.error(f"Failed to write {len(batch)} processing logs: {str(e)}")
+                        self._requeue(batch)
+                        break
+                    logger.warning(f"Failed to write {len(batch)} processing logs, retrying one by one: {str(e)}")
+                    rows_written, available = self._insert_each(batch)
+                    written += rows_written
+                    if not available:
+                        break
+                    continue
+                written += len(batch)
+            with self._lock:
+                self.written += written
+                if written:
+                    self.flushes += 1
+        return written
+
+    def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        db = self.session_factory()
+        try:
+            # One multi-row INSERT ... VALUES statement per batch
+            db.execute(insert(ProcessingLogModel.__table__).values(batch))
+            # Rollups are updated in the same transaction so they never drift from the logs
+            apply_to_rollups(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _insert_each(self, batch: List[Dict[str, Any]]) -> Tuple[int, bool]:
+        """
+        Insert a rejected batch one row at a time, dropping rows that fail on their own.
+
+        Returns:
+            Rows written, and False if the database became unavailable (the
+            rows not yet tried are requeued)
+        """
+        written = 0
+        for index, row in enumerate(batch):
+            try:
+                self._insert([row])
+            except Exception as e:
+                if is_database_unavailable(e):
+                    logger.error(f"Failed to write {len(batch) - index} processing logs: {str(e)}")
+                    self._requeue(batch[index:])
+                    return written, False
+                logger.error(f"Dropped processing log that cannot be written: {row!r}: {str(e)}")
+                with self._lock:
+                    self.dropped += 1
+                    self.rejected += 1
+                continue
+            written += 1
+        return written, True
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            room = self.max_pending - len(self._pending)
+            keep = batch[len(batch) - room:] if room < len(batch) else batch
+            self.dropped += len(batch) - len(keep)
+            self._pending.extendleft(reversed(keep))
+
+    def shutdown(self, timeout: float = 5.0) -> int:
+        """
+        Stop the flush thread and write what is left, giving up after timeout seconds.
+
+        Returns:
+            Number of rows that could not be written and were lost
+        """
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._pending:
+                    break
+            if not self.flush():
+                break
+
+        with self._lock:
+            lost = len(self._pending)
+            self._pending.clear()
+            self.dropped += lost
+        if lost:
+            logger.error(f"Lost {lost} processing logs at shutdown")
+        return lost
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "written": self.written,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "flushes": self.flushes
+            }
+
+    @contextmanager
+    def track(self, request_type: RequestType, video_id: Optional[int] = None, **request_params: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block and record it, including any exception it raises.
+
+        The yielded dictionary can be filled with response metadata.
+        """
+        started_at = datetime.utcnow()
+        metadata: Dict[str, Any] = {}
+        try:
+            yield metadata
+        except Exception as e:
+            self.record(request_type, started_at, video_id=video_id, error=str(e),
+                        request_params=request_params or None, response_metadata=metadata or None)
+            raise
+        self.record(request_type, started_at, video_id=video_id,
+                    request_params=request_params or None, response_metadata=metadata or None)
+
+def log_processing(request_type: RequestType, describe: Optional[Callable[[Any], Dict[str, Any]]] = None) -> Callable:
+    """
+    Decorator recording each call of a function or method with a url parameter.
+
+    Args:
+        request_type: Kind of call being logged
+        describe: Builds response metadata from the function's return value
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            # Binding finds url whether it is passed by keyword or by position, after self on methods
+            url = signature.bind_partial(*args, **kwargs).arguments.get("url")
+            with processing_log_buffer.track(request_type, url=str(url)) as metadata:
+                result = func(*args, **kwargs)
+                if describe is not None:
+                    metadata.update(describe(result))
+                return result
+        return wrapper
+    return decorator
+
+processing_log_buffer = ProcessingLogBuffer(
+    batch_size=settings.PROCESSING_LOG_BATCH_SIZE,
+    flush_interval=settings.PROCESSING_LOG_FLUSH_SECONDS,
+    max_pending=settings.PROCESSING_LOG_MAX_PENDING
+)
@@ -0,0 +1,225 @@
+"""
+Incrementally maintained cost and latency rollups of processing logs.
+
+Every batch of processing logs is folded into hourly and daily buckets per
+LLM, request type and channel in the same transaction that inserts it. A
+bucket keeps counts, token and cost totals, and a mergeable latency sketch, so
+analytics queries read a number of rows proportional to the buckets in the
+requested range, not to the logs behind them.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.processing_log import ProcessingLog as ProcessingLogModel, RequestType
+from app.models.processing_rollup import ProcessingRollup, RollupGranularity
+from app.models.video import Video
+from app.services.latency_sketch import LatencySketch
+
+logger = logging.getLogger(__name__)
+
+# Dimensions rollups can be grouped by, mapped to their column
+GROUP_BY_COLUMNS = {
+    "llm": "llm_id",
+    "request_type": "request_type",
+    "channel": "channel_id",
+}
+SUM_COLUMNS = ("request_count", "error_count", "tokens_used", "input_tokens", "output_tokens",
+               "cached_tokens", "cost_estimate", "duration_ms_total")
+# Rows read at a time when rebuilding from the processing logs
+REBUILD_CHUNK_SIZE = 5000
+
+RollupKey = Tuple[RollupGranularity, datetime, int, RequestType, int]
+
+def as_utc(timestamp: datetime) -> datetime:
+    """Attach UTC to a naive timestamp (the logs are written with utcnow) or convert an aware one."""
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+def bucket_start(timestamp: datetime, granularity: RollupGranularity) -> datetime:
+    """Truncate a timestamp to the start of its bucket, as an aware UTC datetime."""
+    timestamp = as_utc(timestamp).replace(minute=0, second=0, microsecond=0)
+    if granularity == RollupGranularity.DAY:
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+def aggregate_logs(rows: Iterable[Mapping[str, Any]], channel_ids: Mapping[int, int]) -> Dict[RollupKey, Dict[str, Any]]:
+    """
+    Sum processing log rows into per-bucket deltas.
+
+    Args:
+        rows: Processing log rows as column mappings
+        channel_ids: Channel of each video referenced by the rows
+
+    Returns:
+        Totals and a latency sketch for every bucket the rows fall into
+    """
+    deltas: Dict[RollupKey, Dict[str, Any]] = {}
+    for row in rows:
+        channel_id = channel_ids.get(row.get("video_id"), 0) or 0
+        for granularity in RollupGranularity:
+            key = (granularity, bucket_start(row["started_at"], granularity), row.get("llm_id") or 0,
+                   RequestType(row["request_type"]), channel_id)
+            delta = deltas.get(key)
+            if delta is None:
+                delta = deltas[key] = {column: 0 for column in SUM_COLUMNS}
+                delta["duration_sketch"] = LatencySketch()
+            delta["request_count"] += 1
+            delta["error_count"] += 1 if row.get("error_details") else 0
+            delta["tokens_used"] += row.get("tokens_used") or 0
+            delta["input_tokens"] += row.get("input_tokens") or 0
+            delta["output_tokens"] += row.get("output_tokens") or 0
+            delta["cached_tokens"] += row.get("cached_tokens") or 0
+            delta["cost_estimate"] += row.get("cost_estimate") or 0.0
+            if row.get("duration_ms") is not None:
+                delta["duration_ms_total"] += row["duration_ms"]
+                delta["duration_sketch"].add(row["duration_ms"])
+    return deltas
+
+def _channel_ids(db: Session, rows: Sequence[Mapping[str, Any]]) -> Dict[int, int]:
+    video_ids = {row.get("video_id") for row in rows if row.get("video_id")}
+    if not video_ids:
+        return {}
+    return dict(db.query(Video.id, Video.channel_id).filter(Video.id.in_(video_ids)).all())
+
+def apply_to_rollups(db: Session, rows: Sequence[Mapping[str, Any]]) -> int:
+    """
+    Fold newly written processing log rows into the rollups.
+
+    Runs in the caller's transaction. Buckets are created with the delta in one
+    statement; existing buckets are locked and merged, in key order so
+    concurrent writers cannot deadlock.
+
+    Returns:
+        Number of buckets touched
+    """
+    if not rows:
+        return 0
+    deltas = aggregate_logs(rows, _channel_ids(db, rows))
+    table = ProcessingRollup.__table__
+    for key in sorted(deltas, key=lambda k: (k[0].value, k[1], k[2], k[3].value, k[4])):
+        granularity, start, llm_id, request_type, channel_id = key
+        delta = deltas[key]
+        dimensions = {"granularity": granularity, "bucket_start": start, "llm_id": llm_id,
+                      "request_type": request_type, "channel_id": channel_id}
+        values = {**dimensions, **{column: delta[column] for column in SUM_COLUMNS},
+                  "duration_sketch": delta["duration_sketch"].to_dict()}
+        created = db.execute(
+            pg_insert(table).values(values)
+            .on_conflict_do_nothing(constraint="uq_processing_rollup_bucket")
+            .returning(table.c.id)
+        ).first()
+        if created is not None:
+            continue
+
+        rollup = db.query(ProcessingRollup).filter_by(**dimensions).with_for_update().one()
+        for column in SUM_COLUMNS:
+            setattr(rollup, column, (getattr(rollup, column) or 0) + delta[column])
+        sketch = LatencySketch.from_dict(rollup.duration_sketch)
+        sketch.merge(delta["duration_sketch"])
+        rollup.duration_sketch = sketch.to_dict()
+    db.flush()
+    return len(deltas)
+
+def rebuild_rollups(db: Session, since: Optional[datetime] = None) -> int:
+    """
+    Recompute the rollups from the processing logs, from the day of since onwards.
+
+    Used to backfill logs written before rollups existed. Commits once done.
+
+    Returns:
+        Number of processing logs folded in
+    """
+    day = bucket_start(since, RollupGranularity.DAY) if since else None
+    rollups = db.query(ProcessingRollup)
+    logs = db.query(*ProcessingLogModel.__table__.c).order_by(ProcessingLogModel.id)
+    if day is not None:
+        rollups = rollups.filter(ProcessingRollup.bucket_start >= day)
+        logs = logs.filter(ProcessingLogModel.started_at >= day)
+    rollups.delete(synchronize_session=False)
+
+    folded = 0
+    chunk: List[Mapping[str, Any]] = []
+    for row in logs.yield_per(REBUILD_CHUNK_SIZE):
+        chunk.append(dict(row._mapping))
+        if len(chunk) >= REBUILD_CHUNK_SIZE:
+            apply_to_rollups(db, chunk)
+            folded += len(chunk)
+            chunk = []
+    apply_to_rollups(db, chunk)
+    folded += len(chunk)
+    db.commit()
+    logger.info(f"Rebuilt processing rollups from {folded} logs")
+    return folded
+
+def merge_rollups(rollups: Iterable[Any], group_by: Sequence[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Combine rollup rows per bucket and the requested dimensions.
+
+    Args:
+        rollups: ProcessingRollup rows
+        group_by: Dimensions to keep apart (keys of GROUP_BY_COLUMNS); others are merged
+
+    Returns:
+        One dictionary per bucket and group with totals and p50/p95 durations, in bucket order
+    """
+    columns = [GROUP_BY_COLUMNS[dimension] for dimension in group_by]
+    groups: Dict[Tuple, Dict[str, Any]] = {}
+    for rollup in rollups:
+        key = (rollup.bucket_start,) + tuple(getattr(rollup, column) for column in columns)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {column: 0 for column in SUM_COLUMNS}
+            group["duration_sketch"] = LatencySketch()
+        for column in SUM_COLUMNS:
+            group[column] += getattr(rollup, column) or 0
+        group["duration_sketch"].merge(LatencySketch.from_dict(rollup.duration_sketch))
+
+    results = []
+    for key in sorted(groups, key=lambda k: tuple(str(part) for part in k)):
+        group = groups[key]
+        sketch = group.pop("duration_sketch")
+        result = {"bucket_start": key[0], "llm_id": None, "request_type": None, "channel_id": None}
+        for column, value in zip(columns, key[1:]):
+            # 0 stands for "none" in the id dimensions
+            result[column] = value if column == "request_type" else (value or None)
+        result.update(group)
+        result["avg_duration_ms"] = group["duration_ms_total"] / sketch.count if sketch.count else None
+        result["p50_duration_ms"] = sketch.quantile(0.5)
+        result["p95_duration_ms"] = sketch.quantile(0.95)
+        results.append(result)
+    return results
+
+def query_rollups(
+    db: Session,
+    granularity: RollupGranularity,
+    start: datetime,
+    end: datetime,
+    group_by: Sequence[str] = (),
+    llm_id: Optional[int] = None,
+    request_type: Optional[RequestType] = None,
+    channel_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Read and merge the rollups of buckets starting in [start, end), optionally filtered by dimension."""
+    query = db.query(ProcessingRollup).filter(
+        ProcessingRollup.granularity == granularity,
+        ProcessingRollup.bucket_start >= bucket_start(start, granularity),
+        ProcessingRollup.bucket_start < as_utc(end)
+    )
+    if llm_id is not None:
+        query = query.filter(ProcessingRollup.llm_id == llm_id)
+    if request_type is not None:
+        query = query.filter(ProcessingRollup.request_type == request_type)
+    if channel_id is not None:
+        query = query.filter(ProcessingRollup.channel_id == channel_id)
+    return merge_rollups(query.all(), group_by)
+
+def default_range(granularity: RollupGranularity, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Last two days of hourly buckets or last thirty days of daily ones."""
+    end = as_utc(now) if now else datetime.now(timezone.utc)
+    span = timedelta(hours=48) if granularity == RollupGranularity.HOUR else timedelta(days=30)
+    return end - span, end
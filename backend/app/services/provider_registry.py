@@ -0,0 +1,107 @@
+"""
+Registry of long-lived LLM provider clients and summarizers.
+
+Provider clients hold HTTP connection pools, so they are created once per
+(provider, model) and shared by every request and background task instead of
+being rebuilt for each digest.
+"""
+import logging
+from threading import RLock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from openai import OpenAI
+
+from app.core.config import settings
+from app.services.summarizers import (
+    SummarizerInterface,
+    OpenAISummarizer,
+    GoogleAISummarizer
+)
+
+logger = logging.getLogger(__name__)
+
+RegistryKey = Tuple[str, Optional[str]]
+
+class ProviderRegistry:
+    """Thread-safe owner of provider clients and summarizer instances."""
+
+    def __init__(self):
+        self._clients: Dict[RegistryKey, Any] = {}
+        self._summarizers: Dict[RegistryKey, SummarizerInterface] = {}
+        self._lock = RLock()
+
+    def _get_or_create(self, cache: Dict[RegistryKey, Any], key: RegistryKey, factory: Callable[[], Any]) -> Any:
+        """Return the cached instance for key, building it once under the lock."""
+        instance = cache.get(key)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = cache.get(key)
+            if instance is None:
+                instance = factory()
+                cache[key] = instance
+        return instance
+
+    def get_client(self, provider: str, model: Optional[str] = None) -> Any:
+        """
+        Get the shared API client for a provider and model.
+
+        Args:
+            provider: The LLM provider (currently only "openai" uses a client)
+            model: Optional model name; each model gets its own client
+
+        Returns:
+            A long-lived provider client
+        """
+        provider = provider.lower()
+        if provider != "openai":
+            raise ValueError(f"Provider '{provider}' does not use a shared client")
+        return self._get_or_create(self._clients, (provider, model), self._build_openai_client)
+
+    def get_summarizer(self, provider: str, model: Optional[str] = None) -> SummarizerInterface:
+        """
+        Get the shared summarizer for a provider and model, building it on first use.
+
+        Args:
+            provider: The LLM provider (openai, google)
+            model: Optional model name override
+
+        Returns:
+            A SummarizerInterface implementation
+        """
+        provider = provider.lower()
+        if provider == "google":
+            return self._get_or_create(self._summarizers, (provider, model), GoogleAISummarizer)
+        if provider == "openai":
+            return self._get_or_create(
+                self._summarizers,
+                (provider, model),
+                lambda: OpenAISummarizer(client=self.get_client(provider, model), model=model)
+            )
+        raise ValueError(f"Unknown provider '{provider}'")
+
+    def _build_openai_client(self) -> OpenAI:
+        """Create an OpenAI client; the same HTTP pool is reused for every call."""
+        logger.info("Creating shared OpenAI client")
+        # Use a mock API key if not set in environment
+        # Retries are handled by the summarizer's retry policy and budget, not the SDK
+        return OpenAI(
+            api_key=settings.OPENAI_API_KEY or "sk-mock-key-for-development",
+            base_url=settings.OPENAI_BASE_URL or None,
+            max_retries=0
+        )
+
+    def shutdown(self) -> None:
+        """Close all provider clients and drop cached summarizers."""
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+            self._summarizers.clear()
+        for key, client in clients:
+            try:
+                client.close()
+                logger.info(f"Closed provider client {key}")
+            except Exception as e:
+                logger.warning(f"Error closing provider client {key}: {str(e)}")
+
+provider_registry = ProviderRegistry()
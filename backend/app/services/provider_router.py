@@ -0,0 +1,320 @@
+"""
+Latency-aware routing of summary requests across providers and models.
+
+Every call records its latency and outcome per backend (provider and model).
+Requests go to the healthiest, fastest backend first and fail over to the next
+one when the provider is down or failed transiently; errors caused by the
+request itself are raised, since every backend would reject it. With hedging
+enabled and more than one backend, a request that runs past the primary
+backend's p95 latency is also sent to a second backend, and the first
+successful answer wins.
+"""
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from threading import Lock
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.processing_log import RequestType
+from app.services.processing_log_buffer import processing_log_buffer
+from app.services.provider_registry import provider_registry
+from app.services.summarizers import SummarizerInterface, SummaryGenerationError, CircuitOpenError
+from app.services.summarizers.resilience import CircuitBreaker, get_circuit_breaker, is_retryable
+from app.services.summarizer_factory import GOOGLE_AI_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+# Samples needed before a backend's latency or error rate is trusted
+MIN_SAMPLES = 5
+# Hedge delay used until a backend has enough samples for a p95
+DEFAULT_HEDGE_SECONDS = 20.0
+
+Backend = Tuple[str, Optional[str]]
+
+def parse_backends(spec: str) -> List[Backend]:
+    """Parse "openai:o3-mini,google" into [("openai", "o3-mini"), ("google", None)]."""
+    backends = []
+    for item in spec.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        provider, _, model = item.partition(":")
+        backends.append((provider, model or None))
+    return backends
+
+def backend_name(backend: Backend) -> str:
+    provider, model = backend
+    return f"{provider}:{model}" if model else provider
+
+def should_fail_over(error: Optional[BaseException]) -> bool:
+    """Whether another backend may succeed, looking through the summarizers' SummaryGenerationError wrapping."""
+    while error is not None:
+        if isinstance(error, CircuitOpenError) or is_retryable(error):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+class LatencyTracker:
+    """Rolling window of call latencies and outcomes for one backend."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._lock = Lock()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._samples.append((seconds, ok))
+
+    def _latencies(self) -> List[float]:
+        with self._lock:
+            return sorted(seconds for seconds, ok in self._samples if ok)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile of successful calls, or None without enough samples."""
+        latencies = self._latencies()
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+    @property
+    def sample_count(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": self.sample_count,
+            "p50_seconds": self.percentile(0.50),
+            "p95_seconds": self.percentile(0.95),
+            "error_rate": self.error_rate
+        }
+
+class ProviderRouter:
+    """Chooses, fails over and optionally hedges between summarizer backends."""
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        summarizer_for: Callable[[str, Optional[str]], SummarizerInterface] = provider_registry.get_summarizer,
+        hedging: bool = False,
+        max_error_rate: float = 0.5,
+        max_workers: int = 8
+    ):
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.backends = backends
+        self.summarizer_for = summarizer_for
+        self.hedging = hedging
+        self.max_error_rate = max_error_rate
+        self.trackers: Dict[Backend, LatencyTracker] = {backend: LatencyTracker() for backend in backends}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="summary-hedge")
+            return self._executor
+
+    def is_healthy(self, backend: Backend) -> bool:
+        if get_circuit_breaker(backend[0]).state == CircuitBreaker.OPEN:
+            return False
+        tracker = self.trackers[backend]
+        return tracker.sample_count < MIN_SAMPLES or tracker.error_rate <= self.max_error_rate
+
+    def ranked(self, preferred: Optional[str] = None) -> List[Backend]:
+        """
+        Backends in the order they should be tried.
+
+        Healthy backends come first. Among them, the preferred provider leads,
+        then lower p95 latency; backends without enough samples rank as fast so
+        they get measured.
+        """
+        def key(backend: Backend):
+            p95 = self.trackers[backend].percentile(0.95)
+            return (
+                not self.is_healthy(backend),
+                backend[0] != preferred,
+                p95 if p95 is not None else 0.0,
+                self.trackers[backend].error_rate
+            )
+        return sorted(self.backends, key=key)
+
+    def select(self, preferred: Optional[str] = None) -> Tuple[Backend, SummarizerInterface]:
+        """Return the best backend and its summarizer, for callers that drive the call themselves."""
+        backend = self.ranked(preferred)[0]
+        return backend, self.summarizer_for(*backend)
+
+    def record(self, backend: Backend, seconds: float, ok: bool) -> None:
+        self.trackers[backend].record(seconds, ok)
+
+    def _call(self, backend: Backend, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.monotonic()
+        try:
+            result = self.summarizer_for(*backend).generate(**kwargs)
+        except Exception as e:
+            # Errors that would fail on any backend (bad request, bad content)
+            # say nothing about this backend's health
+            if should_fail_over(e):
+                self.record(backend, time.monotonic() - start, ok=False)
+            raise
+        self.record(backend, time.monotonic() - start, ok=True)
+        return result
+
+    def generate(
+        self,
+        preferred: Optional[str] = None,
+        video_id: Optional[int] = None,
+        digest_id: Optional[int] = None,
+        **kwargs: Any
+    ) -> Tuple[Dict[str, Any], Backend]:
+        """
+        Generate a summary on the best available backend.
+
+        Args:
+            preferred: Provider to favour while it is healthy
+            video_id: Video being summarized, for the processing logs of discarded hedges
+            digest_id: Digest being generated, for the same logs
+            **kwargs: Arguments for SummarizerInterface.generate()
+
+        Returns:
+            The summary result and the backend that produced it
+        """
+        ranked = self.ranked(preferred)
+        # With a single backend a hedge would only send the same request twice
+        if self.hedging and len(ranked) > 1:
+            return self._generate_hedged(ranked, kwargs, {"video_id": video_id, "digest_id": digest_id})
+
+        last_error: Optional[Exception] = None
+        for backend in ranked:
+            try:
+                return self._call(backend, kwargs), backend
+            except Exception as e:
+                if not should_fail_over(e):
+                    raise
+                logger.warning(f"Backend {backend_name(backend)} failed, trying next: {str(e)}")
+                last_error = e
+        self._raise_exhausted(last_error)
+
+    def _generate_hedged(self, ranked: List[Backend], kwargs: Dict[str, Any], log_params: Dict[str, Any]) -> Tuple[Dict[str, Any], Backend]:
+        """Race the primary against a hedge started once the primary exceeds its p95."""
+        primary = ranked[0]
+        remaining = ranked[1:]
+        pending: Dict[Future, Backend] = {}
+        started: Dict[Future, datetime] = {}
+
+        def submit(backend: Backend) -> None:
+            future = self.executor.submit(self._call, backend, kwargs)
+            pending[future] = backend
+            started[future] = datetime.utcnow()
+
+        submit(primary)
+
+        hedge_after = self.trackers[primary].percentile(0.95) or DEFAULT_HEDGE_SECONDS
+        done, _ = wait(pending, timeout=hedge_after)
+        if not done:
+            hedge = remaining.pop(0)
+            logger.info(f"Hedging request to {backend_name(hedge)} after {hedge_after:.1f}s on {backend_name(primary)}")
+            submit(hedge)
+
+        last_error: Optional[Exception] = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"Backend {backend_name(backend)} failed: {str(e)}")
+                    last_error = e
+                    if not should_fail_over(e):
+                        self._discard(pending, started, log_params)
+                        raise
+                    # Keep one request in flight while other backends remain
+                    if not pending and remaining:
+                        submit(remaining.pop(0))
+                    continue
+                self._discard(pending, started, log_params)
+                return result, backend
+        self._raise_exhausted(last_error)
+
+    def _discard(self, pending: Dict[Future, Backend], started: Dict[Future, datetime], log_params: Dict[str, Any]) -> None:
+        """
+        Cancel requests that lost the race.
+
+        A request already sent cannot be recalled and is still billed, so it
+        gets its own processing log row when it finishes; it also still
+        records its latency.
+        """
+        for future, backend in pending.items():
+            if future.cancel():
+                continue
+            future.add_done_callback(
+                lambda done, backend=backend, started_at=started[future]: self._log_discarded(done, backend, started_at, log_params)
+            )
+
+    def _log_discarded(self, future: Future, backend: Backend, started_at: datetime, log_params: Dict[str, Any]) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        usage: Dict[str, Any] = {}
+        if error is None:
+            usage = future.result().get("usage") or {}
+            logger.info(
+                f"Discarded hedged answer from {backend_name(backend)}: "
+                f"{usage.get('total_tokens', 0)} tokens, ${usage.get('estimated_cost_usd', 0.0):.4f}"
+            )
+        processing_log_buffer.record(
+            RequestType.SUMMARIZE,
+            started_at,
+            video_id=log_params.get("video_id"),
+            usage=usage,
+            error=str(error) if error is not None else None,
+            request_params={"digest_id": log_params.get("digest_id"), "backend": backend_name(backend), "hedge": "discarded"},
+            response_metadata={"model": usage.get("model")} if usage else None
+        )
+
+    def _raise_exhausted(self, last_error: Optional[Exception]) -> None:
+        # An open circuit carries retry_after for the caller's backoff
+        if isinstance(last_error, CircuitOpenError):
+            raise last_error
+        raise SummaryGenerationError(f"All summarizer backends failed: {str(last_error)}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Rolling latency and error statistics per backend."""
+        return {
+            backend_name(backend): {**tracker.snapshot(), "healthy": self.is_healthy(backend)}
+            for backend, tracker in self.trackers.items()
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+def _configured_backends() -> List[Backend]:
+    backends = []
+    for provider, model in parse_backends(settings.SUMMARIZER_BACKENDS):
+        if provider == "google" and not (GOOGLE_AI_AVAILABLE and settings.has_google_key):
+            logger.warning("Skipping google backend: library not installed or API key not configured")
+            continue
+        if provider not in ("openai", "google"):
+            logger.warning(f"Skipping unknown summarizer backend '{provider}'")
+            continue
+        backends.append((provider, model))
+    return backends or [("openai", None)]
+
+provider_router = ProviderRouter(_configured_backends(), hedging=settings.SUMMARIZER_HEDGING)
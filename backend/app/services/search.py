@@ -0,0 +1,160 @@
+"""
+Full-text search over videos, transcripts and digests.
+
+Each of the three tables has a search_vector column that Postgres generates
+from the text on every insert and update, so the GIN indexes on them are
+maintained row by row and never rebuilt. A query is parsed once with
+websearch_to_tsquery (quoted phrases, OR, -excluded words) and the indexes
+find the matching rows of each source. The SEARCH_RANK_CANDIDATES best
+matches per source by ts_rank, which only reads the stored vector, are
+re-ranked with the costlier ts_rank_cd. Highlighted fragments are cut with
+ts_headline for the rows of the returned page only, from the first
+SEARCH_HEADLINE_CHARS characters of their text, since it re-parses the text
+and would dominate the query if run on every match or on whole transcripts.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Float, Select, case, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import ts_headline, websearch_to_tsquery
+
+from app.core.config import settings
+from app.models.base import SEARCH_CONFIG
+from app.models.digest import Digest as DigestModel
+from app.models.transcript import Transcript as TranscriptModel
+from app.models.video import Video as VideoModel
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=30, MinWords=12, FragmentDelimiter=' … ', StartSel=<mark>, StopSel=</mark>"
+
+class SearchSource:
+    """A searchable table: its search vector, the text fragments are cut from and the video a row belongs to."""
+
+    def __init__(self, model: Any, text: Any, video_id: Any):
+        self.model = model
+        self.text = text
+        self.video_id = video_id
+
+    @property
+    def vector(self) -> Any:
+        return self.model.__table__.c.search_vector
+
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    "videos": SearchSource(
+        VideoModel,
+        VideoModel.title + literal("\n") + func.coalesce(VideoModel.description, ""),
+        VideoModel.id
+    ),
+    "transcripts": SearchSource(TranscriptModel, TranscriptModel.content, TranscriptModel.video_id),
+    "digests": SearchSource(DigestModel, DigestModel.content, DigestModel.video_id)
+}
+
+def parse_query(q: str) -> Any:
+    """tsquery of a search string in web search syntax."""
+    return websearch_to_tsquery(SEARCH_CONFIG, q)
+
+def source_hits(name: str, query: Any, limit: int, candidates: int) -> Select:
+    """
+    The best ranked matches of one source.
+
+    The candidates best matches by ts_rank are re-ranked with ts_rank_cd,
+    which also weighs how close the query terms are, and the top limit kept.
+    """
+    source = SEARCH_SOURCES[name]
+    vector = source.vector
+    matches = (
+        select(
+            source.model.id.label("id"),
+            source.video_id.label("video_id"),
+            vector.label("vector")
+        )
+        .where(vector.bool_op("@@")(query))
+        .order_by(func.ts_rank(vector, query).desc(), source.model.id.desc())
+        .limit(candidates)
+        .subquery()
+    )
+    rank = func.ts_rank_cd(matches.c.vector, query, type_=Float)
+    return (
+        select(
+            literal(name).label("source"),
+            matches.c.id,
+            matches.c.video_id,
+            rank.label("rank")
+        )
+        .order_by(rank.desc(), matches.c.id.desc())
+        .limit(limit)
+    )
+
+def headline(hits: Any, sources: Sequence[str], query: Any) -> Any:
+    """Highlighted fragments of each hit, cut from a bounded prefix of its source's text."""
+    fragments = {
+        name: select(
+            ts_headline(
+                SEARCH_CONFIG,
+                func.substr(SEARCH_SOURCES[name].text, 1, settings.SEARCH_HEADLINE_CHARS),
+                query,
+                HEADLINE_OPTIONS
+            )
+        )
+        .where(SEARCH_SOURCES[name].model.id == hits.c.id)
+        .correlate_except(SEARCH_SOURCES[name].model)
+        .scalar_subquery()
+        for name in sources
+    }
+    # Only the branch of the hit's own source is evaluated
+    return case(*((hits.c.source == name, fragment) for name, fragment in fragments.items()))
+
+def search_statement(
+    q: str,
+    sources: Optional[Sequence[str]] = None,
+    limit: int = 20,
+    candidates: Optional[int] = None
+) -> Select:
+    """
+    Best ranked matches of a search across sources, with the title of each match's video.
+
+    Raises:
+        ValueError: If a source is unknown
+    """
+    sources = list(sources or SEARCH_SOURCES)
+    unknown = [name for name in sources if name not in SEARCH_SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown search source '{unknown[0]}', expected one of: {', '.join(SEARCH_SOURCES)}")
+    candidates = candidates or settings.SEARCH_RANK_CANDIDATES
+    query = parse_query(q)
+    matches = union_all(*(source_hits(name, query, limit, candidates) for name in sources)).subquery()
+    hits = (
+        select(matches)
+        .order_by(matches.c.rank.desc(), matches.c.source, matches.c.id.desc())
+        .limit(limit)
+        .subquery()
+    )
+    return (
+        select(
+            hits.c.source,
+            hits.c.id,
+            hits.c.video_id,
+            VideoModel.youtube_id,
+            VideoModel.title,
+            hits.c.rank,
+            headline(hits, sources, query).label("headline")
+        )
+        .join_from(hits, VideoModel, VideoModel.id == hits.c.video_id)
+        .order_by(hits.c.rank.desc(), hits.c.source, hits.c.id.desc())
+    )
+
+async def search(
+    db: Any,
+    q: str,
+    sources: Optional[Sequence[str]] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """
+    Search videos, transcripts and digests, best matches first.
+
+    Returns:
+        One dictionary per match with source, id, video_id, youtube_id, title, rank and headline
+
+    Raises:
+        ValueError: If a source is unknown
+    """
+    result = await db.execute(search_statement(q, sources, limit))
+    return [dict(row._mapping) for row in result]
@@ -0,0 +1,95 @@
+"""
+Typeahead suggestions for video titles, channel names and tags.
+
+Each keystroke runs one round trip: a UNION ALL of three lookups answered by
+the pg_trgm GIN indexes on videos.title, channels.name and tags.name. From
+three characters on, names are matched by substring; shorter input matches
+prefixes only, since a trigram index cannot narrow an unanchored pattern of
+fewer than three characters. The SUGGEST_CANDIDATES best matches per kind,
+prefix matches first and then the most popular, are ordered by trigram
+similarity as well and only the first few are returned, so the payload
+stays bounded however common the input is.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Select, func, literal, select, union_all
+
+from app.core.config import settings
+from app.models.channel import Channel as ChannelModel
+from app.models.tag import Tag as TagModel
+from app.models.video import Video as VideoModel
+
+class SuggestSource:
+    """A suggestible name column, with the ID and popularity of its rows and any criteria rows must meet."""
+
+    def __init__(self, label: Any, id_column: Any, popularity: Any, *criteria: Any):
+        self.label = label
+        self.id_column = id_column
+        self.popularity = popularity
+        self.criteria = criteria
+
+SUGGEST_SOURCES: Dict[str, SuggestSource] = {
+    "titles": SuggestSource(VideoModel.title, VideoModel.id, VideoModel.view_count),
+    "channels": SuggestSource(ChannelModel.name, ChannelModel.id, ChannelModel.subscriber_count),
+    # Tags whose videos were all deleted or retagged stay in the dictionary with no videos
+    "tags": SuggestSource(TagModel.name, TagModel.id, TagModel.video_count, TagModel.video_count > 0)
+}
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so input is matched literally."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def source_suggestions(name: str, term: str, limit: int, candidates: int) -> Select:
+    """The first suggestions of one kind, numbered by position."""
+    source = SUGGEST_SOURCES[name]
+    escaped = escape_like(term)
+    pattern = f"%{escaped}%" if len(term) >= 3 else f"{escaped}%"
+    # Cheap to sort on, unlike similarity, so the cap keeps the likeliest matches
+    matches = (
+        select(
+            source.id_column.label("id"),
+            source.label.label("label"),
+            source.popularity.label("popularity")
+        )
+        .where(source.label.ilike(pattern, escape="\\"), *source.criteria)
+        .order_by(
+            source.label.ilike(f"{escaped}%", escape="\\").desc(),
+            source.popularity.desc().nulls_last(),
+            source.id_column
+        )
+        .limit(candidates)
+        .subquery()
+    )
+    ordering = (
+        matches.c.label.ilike(f"{escaped}%", escape="\\").desc(),
+        func.similarity(matches.c.label, term).desc(),
+        matches.c.popularity.desc().nulls_last(),
+        matches.c.id
+    )
+    top = (
+        select(matches.c.id, matches.c.label, func.row_number().over(order_by=ordering).label("position"))
+        .order_by(*ordering)
+        .limit(limit)
+        .subquery()
+    )
+    return select(literal(name).label("source"), top.c.id, top.c.label, top.c.position)
+
+def suggest_statement(q: str, limit: int = 5, candidates: Optional[int] = None) -> Select:
+    """Suggestions of every kind for typed input, grouped by kind and in order."""
+    term = q.strip()
+    candidates = candidates or settings.SUGGEST_CANDIDATES
+    suggestions = union_all(*(source_suggestions(name, term, limit, candidates) for name in SUGGEST_SOURCES)).subquery()
+    return select(suggestions).order_by(suggestions.c.source, suggestions.c.position)
+
+async def suggest(db: Any, q: str, limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Suggest video titles, channel names and tags for typed input.
+
+    Returns:
+        Up to limit suggestions per kind, each with the ID and label of the matching row
+    """
+    result = await db.execute(suggest_statement(q, limit))
+    suggestions: Dict[str, List[Dict[str, Any]]] = {name: [] for name in SUGGEST_SOURCES}
+    for row in result:
+        suggestions[row.source].append({"id": row.id, "label": row.label})
+    return suggestions
@@ -3,10 +3,9 @@ import logging
 from app.core.config import settings
 from app.services.summarizers import (
     SummarizerInterface,
-    OpenAISummarizer,
-    GoogleAISummarizer,
     SummaryFormat
 )
+from app.services.provider_registry import provider_registry
 
 logger = logging.getLogger(__name__)
 
@@ -27,13 +26,13 @@ def get_summarizer(provider: str = "openai") -> SummarizerInterface:
         provider: The LLM provider to use (openai, google)
         
     Returns:
-        An instance of a SummarizerInterface implementation
+        The shared SummarizerInterface implementation for the provider
     """
     provider = provider.lower()
     
     if provider == "google" and GOOGLE_AI_AVAILABLE and settings.has_google_key:
         logger.info("Using Google AI summarizer")
-        return GoogleAISummarizer()
+        return provider_registry.get_summarizer("google")
     else:
         if provider == "google":
             reason = "API key not configured" if not settings.has_google_key else "library not installed"
@@ -42,7 +41,7 @@ def get_summarizer(provider: str = "openai") -> SummarizerInterface:
             logger.warning(f"Provider '{provider}' not supported, falling back to OpenAI")
         
         logger.info("Using OpenAI summarizer")
-        return OpenAISummarizer()
+        return provider_registry.get_summarizer("openai")
 
 def map_digest_type_to_summary_format(digest_type: str) -> SummaryFormat:
     """
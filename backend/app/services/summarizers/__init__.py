@@ -1,5 +1,6 @@
 from .openai_summarizer import OpenAISummarizer
 from .google_summarizer import GoogleAISummarizer
 from .base import SummarizerInterface, SummaryFormat, SummaryGenerationError
+from .resilience import CircuitOpenError
 
-__all__ = ['OpenAISummarizer', 'GoogleAISummarizer', 'SummarizerInterface', 'SummaryFormat', 'SummaryGenerationError']
+__all__ = ['OpenAISummarizer', 'GoogleAISummarizer', 'SummarizerInterface', 'SummaryFormat', 'SummaryGenerationError', 'CircuitOpenError']
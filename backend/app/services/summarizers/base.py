@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from enum import Enum
 from datetime import datetime
+from app.core.config import settings
+from app.services.tokenizer import count_tokens
 
 class SummaryFormat(str, Enum):
     """Types of summary formats that can be generated."""
@@ -12,15 +14,22 @@ class SummaryFormat(str, Enum):
 
 class SummarizerInterface(ABC):
     """Base interface for all summarizer implementations."""
+
+    # Completion tokens reserved for the digest output
+    MAX_COMPLETION_TOKENS = 3000
     
     @abstractmethod
-    def generate(self, transcript: str, format_type: SummaryFormat = SummaryFormat.STANDARD) -> Dict[str, Any]:
+    def generate(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> Dict[str, Any]:
         """
         Generate a summary from a transcript.
         
         Args:
             transcript: The video transcript text
+            title: Optional video title for context
+            description: Optional video description for context
+            chapters: Optional list of processed chapters
             format_type: The desired format for the summary
+            transcript_tokens: Stored token count of the transcript, if known
             
         Returns:
             Dictionary containing:
@@ -42,6 +51,85 @@ class SummarizerInterface(ABC):
             Estimated cost in USD
         """
         pass
+
+    def generate_stream(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a summary incrementally.
+        
+        Yields {"delta": text} events as text is produced, followed by a single
+        {"result": ...} event holding the same dictionary generate() returns.
+        Providers without streaming support emit the whole summary as one delta.
+        """
+        result = self.generate(transcript, title, description, chapters, format_type, transcript_tokens)
+        yield {"delta": result["summary"]}
+        yield {"result": result}
+
+    def estimate_usage(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Estimate token usage and cost of a generate() call without calling the provider.
+        
+        Args:
+            transcript: The video transcript text
+            title: Optional video title for context
+            description: Optional video description for context
+            chapters: Optional list of processed chapters
+            format_type: The desired format for the summary
+            transcript_tokens: Stored token count of the transcript, if known
+            
+        Returns:
+            Dictionary with prompt_tokens, max_completion_tokens and cost bounds in USD
+        """
+        if transcript_tokens is None:
+            transcript_tokens = count_tokens(transcript)
+        prompt_tokens = (
+            count_tokens(self.get_prompt_for_format(format_type))
+            + count_tokens(self.format_video_context("", title, description, chapters))
+            + min(transcript_tokens, settings.TRANSCRIPT_TOKEN_BUDGET)
+        )
+        return self._usage_estimate(prompt_tokens, transcript_tokens)
+
+    def _usage_estimate(self, prompt_tokens: int, transcript_tokens: int) -> Dict[str, Any]:
+        """Build the estimate dictionary for a prompt of the given size."""
+        prompt_cost = self.calculate_cost(prompt_tokens, 0)
+        return {
+            "transcript_tokens": transcript_tokens,
+            "prompt_tokens": prompt_tokens,
+            "max_completion_tokens": self.MAX_COMPLETION_TOKENS,
+            "prompt_cost_usd": prompt_cost,
+            "max_cost_usd": prompt_cost + self.calculate_cost(0, self.MAX_COMPLETION_TOKENS)
+        }
+    
+    def generate_sections(self, sections: List[str], digest: str, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Generate only the given sections of a digest, for repairing incomplete output.
+        
+        Args:
+            sections: Headings of the sections to write
+            digest: The existing, incomplete digest
+            transcript: Transcript excerpt to draw from
+            title: Optional video title for context
+            description: Optional video description for context
+            chapters: Optional list of processed chapters
+            
+        Returns:
+            Dictionary with the generated Markdown as summary, usage and finish_reason
+        """
+        # Providers that can send a separate system prompt and a smaller completion
+        # budget override this; the default sends the repair instructions and
+        # request through generate() as the transcript, so every backend can repair
+        request = self.SECTION_REPAIR_PROMPT + "\n\n" + self.format_repair_request(sections, digest, transcript, title, description, chapters)
+        result = self.generate(request, transcript_tokens=count_tokens(request))
+        result.setdefault("finish_reason", None)
+        return result
+    
+    def format_repair_request(self, sections: List[str], digest: str, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None) -> str:
+        """User message asking for the given sections of a digest."""
+        requested = "\n".join(f"- ## {heading}" for heading in sections)
+        return (
+            f"**Sections to write:**\n{requested}\n\n"
+            f"**Existing digest:**\n{digest}\n\n"
+            + self.format_video_context(transcript, title, description, chapters)
+        )
     
     def get_prompt_for_format(self, format_type: SummaryFormat) -> str:
         """
@@ -55,6 +143,10 @@ class SummarizerInterface(ABC):
         """
         return self.MASTER_DIGEST_PROMPT
     
+    # Version of MASTER_DIGEST_PROMPT stamped on every generated digest.
+    # Bump it with any prompt change so older digests can be regenerated selectively.
+    PROMPT_VERSION = 2
+    
     # Master Digest Prompt - The single source of truth for structured digests
     MASTER_DIGEST_PROMPT = """<Role>
 You are DigestBot 5000, an AI system specialized in analyzing video transcripts and generating structured, insightful digests using Markdown. Your primary goal is to help users quickly determine video value and navigate content according to the strict format below.
@@ -201,16 +293,41 @@ Caching strategies significantly impact both metrics:
 </Instructions>
 
 <Task>
-Analyze the following context and transcript and generate the structured Markdown digest.
+Analyze the context and transcript provided in the user message and generate the structured Markdown digest.
+</Task>"""
+
+    # Prompt for re-requesting individual sections of a digest that came back incomplete
+    SECTION_REPAIR_PROMPT = """<Role>
+You are DigestBot 5000, repairing a structured video digest written in Markdown.
+</Role>
 
-**Context:**
+<Instructions>
+Some sections of the existing digest are missing or were cut off. Write ONLY the sections listed in the user message, each starting with its exact "## " heading. Match the formatting, emoji use and level of detail of the existing digest. Use the existing digest and the transcript excerpt as your sources. Do not repeat any other section and do not add commentary.
+</Instructions>"""
+
+    # Per-video context sent after the static prompt. Keeping the prompt above free of
+    # per-video values gives every request a byte-identical prefix that providers can cache.
+    VIDEO_CONTEXT_TEMPLATE = """**Context:**
 Title: {title}
 Description: {description}
 Chapters:
-{chapters_formatted_list} <-- System will provide "None" if not available
+{chapters_formatted_list}
 
 **Transcript:**
 {transcript}"""
 
+    def format_video_context(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Fill the per-video context template; "None" is used when chapters are not available."""
+        if chapters:
+            chapters_formatted_list = "\n".join([f"- {chap.get('timestamp', 'N/A')}: {chap.get('title', 'Untitled')}" for chap in chapters])
+        else:
+            chapters_formatted_list = "None"
+        return self.VIDEO_CONTEXT_TEMPLATE.format(
+            title=title or "[Title not provided]",
+            description=description or "[Description not provided]",
+            chapters_formatted_list=chapters_formatted_list,
+            transcript=transcript
+        )
+
 class SummaryGenerationError(Exception):
     """Base exception for summary generation errors."""
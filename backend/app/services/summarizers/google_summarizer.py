@@ -37,7 +37,7 @@ class GoogleAISummarizer(SummarizerInterface):
         completion_cost = (completion_tokens / 1000) * self.TOKEN_COST_PER_1K["completion"]
         return prompt_cost + completion_cost
     
-    def generate(self, transcript: str, format_type: SummaryFormat = SummaryFormat.STANDARD) -> Dict[str, Any]:
+    def generate(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> Dict[str, Any]:
         """Generate summary from transcript text using Google's Gemini model."""
         try:
             logger.info(f"Starting Google AI summary generation with format: {format_type}")
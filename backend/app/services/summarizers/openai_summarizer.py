@@ -1,15 +1,19 @@
 from openai import OpenAI
+from openai.types.chat import ChatCompletion
 import json
 import logging
 import time
 from functools import wraps
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception
 from threading import Lock
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from enum import Enum
 from app.core.config import settings
 from datetime import datetime
+from app.services.tokenizer import count_tokens, truncate_to_tokens
+from app.services.extractive_selector import select_sentences
 from .base import SummarizerInterface, SummaryFormat, SummaryGenerationError
+from .resilience import CircuitOpenError, get_circuit_breaker, retry_budget, should_retry
 
 logger = logging.getLogger(__name__)
 
@@ -45,65 +49,113 @@ class OpenAISummarizer(SummarizerInterface):
     # Token cost per 1k tokens (in USD) for o3-mini
     TOKEN_COST_PER_1K = {
         "prompt": 0.0011,    # Input tokens (o3-mini) - $1.10 per 1M tokens
+        "cached_prompt": 0.00055,  # Input tokens served from the prompt cache - $0.55 per 1M tokens
         "completion": 0.0044  # Output tokens (o3-mini) - $4.40 per 1M tokens
     }
 
-    def __init__(self):
+    # Batch API jobs are billed at half the synchronous rate
+    BATCH_PRICE_MULTIPLIER = 0.5
+
+    DEFAULT_MODEL = "o3-mini"
+
+    # Context window sizes (prompt + completion) per model
+    CONTEXT_WINDOW_TOKENS = {
+        "o3-mini": 200000,
+        "gpt-4o": 128000,
+        "gpt-4o-mini": 128000
+    }
+    DEFAULT_CONTEXT_WINDOW_TOKENS = 128000
+    # Per-message framing tokens added by the chat format
+    MESSAGE_OVERHEAD_TOKENS = 4
+
+    def __init__(self, client: Optional[OpenAI] = None, model: Optional[str] = None):
         logger.info(f"Initializing OpenAISummarizer with API key present: {bool(settings.OPENAI_API_KEY)}")
-        # Use a mock API key if not set in environment
-        api_key = settings.OPENAI_API_KEY or "sk-mock-key-for-development"
-        self.client = OpenAI(api_key=api_key)
+        if client is None:
+            # Use a mock API key if not set in environment
+            api_key = settings.OPENAI_API_KEY or "sk-mock-key-for-development"
+            # The SDK reads OPENAI_BASE_URL from the environment itself
+            client = OpenAI(api_key=api_key, max_retries=0)
+        self.client = client
+        self.model = model or self.DEFAULT_MODEL
         self.rate_limiter = RateLimiter(calls_per_minute=50)  # OpenAI's default RPM limit
 
-    def calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
-        """Calculate the cost of the API call in USD."""
-        prompt_cost = (prompt_tokens / 1000) * self.TOKEN_COST_PER_1K["prompt"]
+    def calculate_cost(self, prompt_tokens: int, completion_tokens: int, batch: bool = False, cached_tokens: int = 0) -> float:
+        """Calculate the cost of the API call in USD; cached_tokens is the part of prompt_tokens read from the prompt cache."""
+        prompt_cost = (
+            ((prompt_tokens - cached_tokens) / 1000) * self.TOKEN_COST_PER_1K["prompt"]
+            + (cached_tokens / 1000) * self.TOKEN_COST_PER_1K["cached_prompt"]
+        )
         completion_cost = (completion_tokens / 1000) * self.TOKEN_COST_PER_1K["completion"]
+        if batch:
+            return (prompt_cost + completion_cost) * self.BATCH_PRICE_MULTIPLIER
         return prompt_cost + completion_cost
 
+    def _build_api_params(self, messages: List[Dict[str, str]], max_tokens: int = 3000) -> Dict[str, Any]:
+        """Build chat-completion parameters for the configured model."""
+        model_name = self.model
+        api_params = {
+            "model": model_name,
+            "messages": messages,
+            "max_tokens": max_tokens # Default parameter name
+        }
+        
+        # Add parameters specific to o3-mini based on the latest example and error message
+        if model_name == "o3-mini":
+            # o3-mini uses max_completion_tokens instead of max_tokens
+            max_val = api_params.pop("max_tokens")
+            api_params["max_completion_tokens"] = max_val
+            logger.info(f"Switched max_tokens to max_completion_tokens={max_val} for o3-mini")
+
+            api_params["response_format"] = {"type": "text"}
+            api_params["reasoning_effort"] = "medium" # Reverted from high
+            api_params["store"] = False
+            logger.info("Adding o3-mini specific parameters: response_format, reasoning_effort, store")
+        
+        # Add standard parameters like temperature if needed for either model
+        # api_params["temperature"] = 0.7 
+        return api_params
+
+    def _call_openai_api(self, messages: List[Dict[str, str]], max_tokens: int = 3000, stream: bool = False) -> Any:
+        """Make an API call to OpenAI, retrying transient errors within the shared retry budget."""
+        retry_budget.record_request()
+        return self._call_openai_api_with_retry(messages, max_tokens, stream)
+
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type(Exception)
+        wait=wait_exponential_jitter(initial=1, max=10),
+        retry=retry_if_exception(should_retry),
+        reraise=True
     )
-    def _call_openai_api(self, messages: List[Dict[str, str]], max_tokens: int = 3000) -> Dict[str, Any]:
-        """Make an API call to OpenAI with retry logic and rate limiting."""
-        model_name = "o3-mini" # Define the model to use
+    def _call_openai_api_with_retry(self, messages: List[Dict[str, str]], max_tokens: int = 3000, stream: bool = False) -> Any:
+        """One API call attempt, guarded by the provider circuit breaker."""
+        breaker = get_circuit_breaker("openai")
         try:
-            logger.info(f"Calling OpenAI API with model: {model_name} with max_tokens={max_tokens}") # Log model and max_tokens
+            logger.info(f"Calling OpenAI API with model: {self.model} with max_tokens={max_tokens}, stream={stream}") # Log model and max_tokens
             
-            api_params = {
-                "model": model_name,
-                "messages": messages,
-                "max_tokens": max_tokens # Default parameter name
-            }
-            
-            # Add parameters specific to o3-mini based on the latest example and error message
-            if model_name == "o3-mini":
-                # o3-mini uses max_completion_tokens instead of max_tokens
-                if "max_tokens" in api_params:
-                    max_val = api_params.pop("max_tokens")
-                    api_params["max_completion_tokens"] = max_val
-                    logger.info(f"Switched max_tokens to max_completion_tokens={max_val} for o3-mini")
-                else: # Should not happen based on current logic, but good practice
-                    api_params["max_completion_tokens"] = max_tokens 
-                    logger.warning("max_tokens not found in api_params, setting max_completion_tokens directly")
-
-                api_params["response_format"] = {"type": "text"}
-                api_params["reasoning_effort"] = "medium" # Reverted from high
-                api_params["store"] = False
-                logger.info("Adding o3-mini specific parameters: response_format, reasoning_effort, store")
-            
-            # Add standard parameters like temperature if needed for either model
-            # api_params["temperature"] = 0.7 
+            api_params = self._build_api_params(messages, max_tokens)
+            if stream:
+                api_params["stream"] = True
+                api_params["stream_options"] = {"include_usage": True}
 
-            response = self.client.chat.completions.create(**api_params)
+            # Fails fast without a request while the provider is down
+            breaker.allow()
+            try:
+                # Every attempt, retries included, counts against the rate limit
+                with self.rate_limiter:
+                    response = self.client.chat.completions.create(**api_params)
+            except Exception as e:
+                breaker.record_failure(e)
+                raise
+            breaker.record_success()
             
-            logger.info(f"Received response from model: {response.model}") # Log the model that responded
+            if stream:
+                logger.info("Opened streaming response")
+            else:
+                logger.info(f"Received response from model: {response.model}") # Log the model that responded
             return response
         except Exception as e:
             logger.error(f"Error calling OpenAI API: {str(e)}")
-            if "authentication" in str(e).lower():
+            if "authentication" in str(e).lower() and not stream:
                 logger.warning("Authentication error with OpenAI API, using mock response")
                 # Create a mock response object with the same structure
                 from collections import namedtuple
@@ -121,7 +173,50 @@ class OpenAISummarizer(SummarizerInterface):
             else:
                 raise
 
-    def generate(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD) -> Dict[str, Any]:
+    def transcript_token_budget(self, prompt_text: str) -> int:
+        """Number of transcript tokens that fit alongside the rest of the prompt and the reserved completion."""
+        context_window = self.CONTEXT_WINDOW_TOKENS.get(self.model, self.DEFAULT_CONTEXT_WINDOW_TOKENS)
+        available = (
+            context_window
+            - count_tokens(prompt_text)
+            - self.MAX_COMPLETION_TOKENS
+            - self.MESSAGE_OVERHEAD_TOKENS * 2
+        )
+        return max(0, min(settings.TRANSCRIPT_TOKEN_BUDGET, available))
+
+    def build_messages(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> List[Dict[str, str]]:
+        """Build the chat messages, packing as much transcript as the token budget allows."""
+        # The static prompt is identical for every video so the provider can cache it;
+        # everything video-specific follows in the user message
+        developer_prompt = self.get_prompt_for_format(format_type)
+        context_without_transcript = self.format_video_context("", title, description, chapters)
+
+        # Pack the transcript by tokens; the stored count lets short transcripts skip encoding
+        budget = self.transcript_token_budget(developer_prompt + context_without_transcript)
+        if transcript_tokens is not None and transcript_tokens <= budget:
+            packed_text = transcript
+        elif settings.TRANSCRIPT_SELECTION == "extractive":
+            # Keep salient sentences from the whole video rather than only its beginning
+            packed_text = select_sentences(transcript, budget)
+        else:
+            packed_text = truncate_to_tokens(transcript, budget)
+        logger.info(f"Transcript length: {len(transcript)} chars, packed length: {len(packed_text)} chars, token budget: {budget}")
+        
+        # Prepare messages - o3 models use developer message instead of system message
+        return [
+            {"role": "developer", "content": developer_prompt},
+            {"role": "user", "content": self.format_video_context(packed_text, title, description, chapters)}
+        ]
+
+    def estimate_usage(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Estimate token usage and cost from the exact messages generate() would send."""
+        if transcript_tokens is None:
+            transcript_tokens = count_tokens(transcript)
+        messages = self.build_messages(transcript, title, description, chapters, format_type, transcript_tokens)
+        prompt_tokens = sum(count_tokens(m["content"]) + self.MESSAGE_OVERHEAD_TOKENS for m in messages)
+        return self._usage_estimate(prompt_tokens, transcript_tokens)
+
+    def generate(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> Dict[str, Any]:
         """Generate summary from transcript text using provided context."""
         try:
             logger.info(f"Starting summary generation with format: {format_type}")
@@ -131,8 +226,8 @@ class OpenAISummarizer(SummarizerInterface):
             if not transcript or not transcript.strip():
                 raise ValueError("Transcript is empty or invalid")
             
-            # Check if we're using a mock API key
-            if not settings.OPENAI_API_KEY:
+            # Check if we're using a mock API key; a custom endpoint may not need one
+            if not settings.OPENAI_API_KEY and not settings.OPENAI_BASE_URL:
                 logger.warning("Using mock OpenAI response because API key is not set")
                 # Return a mock response
                 return {
@@ -164,79 +259,135 @@ class OpenAISummarizer(SummarizerInterface):
                     }
                 }
                 
-            # Truncate text to avoid token limits while preserving context
-            truncated_text = transcript[:15000]  # Approximately 3750 tokens
-            logger.info(f"Transcript length: {len(transcript)}, truncated length: {len(truncated_text)}")
-            
-            # Get the base prompt (MASTER_DIGEST_PROMPT)
-            base_prompt = self.get_prompt_for_format(format_type)
-            
-            # Format the chapters list for the prompt
-            if chapters:
-                chapters_formatted_list = "\n".join([f"- {chap.get('timestamp', 'N/A')}: {chap.get('title', 'Untitled')}" for chap in chapters])
-            else:
-                chapters_formatted_list = "None"
-                
-            # Prepare context dictionary for formatting
-            context = {
-                "title": title or "[Title not provided]",
-                "description": description or "[Description not provided]",
-                "chapters_formatted_list": chapters_formatted_list,
-                "transcript": "[Transcript provided in user message]" # Placeholder as transcript goes in user message
-            }
-            
-            # Format the base prompt with the actual context
-            # We only format the context part, assuming the transcript itself goes in the user message below
-            try:
-                developer_prompt = base_prompt.format(**context)
-            except KeyError as e:
-                logger.error(f"Failed to format prompt. Missing key: {e}. Prompt: {base_prompt}", exc_info=True)
-                # Fallback to a very simple prompt if formatting fails
-                developer_prompt = "Summarize the transcript provided in the user message."
-
-            logger.debug(f"Final Developer Prompt: \n{developer_prompt}") # Log the formatted prompt
-            
-            # Prepare messages - o3 models use developer message instead of system message
-            messages = [
-                {"role": "developer", "content": developer_prompt},
-                {"role": "user", "content": truncated_text}
-            ]
+            messages = self.build_messages(transcript, title, description, chapters, format_type, transcript_tokens)
             
             # Make API call with retry logic and rate limiting
-            with self.rate_limiter:  # Apply rate limiting
-                response = self._call_openai_api(messages)
+            response = self._call_openai_api(messages, max_tokens=self.MAX_COMPLETION_TOKENS)
             
             if not response.choices:
                 raise SummaryGenerationError("No summary generated in response")
             
-            # Calculate cost
-            cost = self.calculate_cost(
-                response.usage.prompt_tokens,
-                response.usage.completion_tokens
-            )
-            
             result = {
                 "summary": response.choices[0].message.content,
-                "usage": {
-                    "prompt_tokens": response.usage.prompt_tokens,
-                    "completion_tokens": response.usage.completion_tokens,
-                    "total_tokens": response.usage.total_tokens,
-                    "estimated_cost_usd": cost,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "model": response.model  # Add the model name here
-                }
+                "usage": self._usage_from_response(response.usage, getattr(response, "model", self.model)),
+                # "length" means the output was cut off at max_completion_tokens
+                "finish_reason": getattr(response.choices[0], "finish_reason", None)
             }
             
-            logger.info(f"Summary generated successfully. Length: {len(result['summary'])}, Cost: ${cost:.4f}")
+            logger.info(f"Summary generated successfully. Length: {len(result['summary'])}, Cost: ${result['usage']['estimated_cost_usd']:.4f}")
             return result
             
         except ValueError as e:
             logger.error(f"Validation error: {str(e)}")
             raise SummaryGenerationError(f"Invalid input: {str(e)}")
+        except CircuitOpenError:
+            # Keep retry_after for the caller's backoff
+            raise
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}", exc_info=True)
             raise SummaryGenerationError(f"Failed to generate summary: {str(e)}")
 
+    def generate_stream(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Stream summary text from OpenAI as it is generated."""
+        # Mock and placeholder results are produced locally, so they are emitted in one piece
+        if (not settings.OPENAI_API_KEY and not settings.OPENAI_BASE_URL) or not transcript or not transcript.strip() or transcript.startswith("["):
+            yield from super().generate_stream(transcript, title, description, chapters, format_type, transcript_tokens)
+            return
+
+        try:
+            logger.info(f"Starting streaming summary generation with format: {format_type}")
+            messages = self.build_messages(transcript, title, description, chapters, format_type, transcript_tokens)
+            
+            stream = self._call_openai_api(messages, max_tokens=self.MAX_COMPLETION_TOKENS, stream=True)
+            
+            parts = []
+            usage = None
+            model = self.model
+            finish_reason = None
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield {"delta": chunk.choices[0].delta.content}
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+                # The final chunk carries usage because of stream_options.include_usage
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                    model = chunk.model or model
+            
+            summary = "".join(parts)
+            if not summary:
+                raise SummaryGenerationError("No summary generated in response")
+            if usage is None:
+                raise SummaryGenerationError("Stream ended without usage information")
+            
+            result = {"summary": summary, "usage": self._usage_from_response(usage, model), "finish_reason": finish_reason}
+            logger.info(f"Streamed summary generated successfully. Length: {len(summary)}, Cost: ${result['usage']['estimated_cost_usd']:.4f}")
+            yield {"result": result}
+            
+        except SummaryGenerationError:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming summary: {str(e)}", exc_info=True)
+            raise SummaryGenerationError(f"Failed to generate summary: {str(e)}")
+
+    def build_request_body(self, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None, format_type: SummaryFormat = SummaryFormat.STANDARD, transcript_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Chat-completion request body generate() would send, for submission as a batch line."""
+        messages = self.build_messages(transcript, title, description, chapters, format_type, transcript_tokens)
+        return self._build_api_params(messages, self.MAX_COMPLETION_TOKENS)
+
+    def result_from_completion(self, completion: Dict[str, Any], batch: bool = False) -> Dict[str, Any]:
+        """Build a generate()-style result from a raw chat-completion response body."""
+        response = ChatCompletion.model_validate(completion)
+        if not response.choices or not response.choices[0].message.content:
+            raise SummaryGenerationError("No summary generated in response")
+        if response.usage is None:
+            raise SummaryGenerationError("Response has no usage information")
+        return {
+            "summary": response.choices[0].message.content,
+            "usage": self._usage_from_response(response.usage, response.model, batch=batch),
+            "finish_reason": response.choices[0].finish_reason
+        }
+
+    def generate_sections(self, sections: List[str], digest: str, transcript: str, title: Optional[str] = None, description: Optional[str] = None, chapters: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Re-request only the given digest sections with a small prompt and completion budget."""
+        try:
+            messages = [
+                {"role": "developer", "content": self.SECTION_REPAIR_PROMPT},
+                {"role": "user", "content": self.format_repair_request(sections, digest, transcript, title, description, chapters)}
+            ]
+            response = self._call_openai_api(messages, max_tokens=settings.DIGEST_REPAIR_MAX_COMPLETION_TOKENS)
+            if not response.choices or not response.choices[0].message.content:
+                raise SummaryGenerationError("No sections generated in response")
+            return {
+                "summary": response.choices[0].message.content,
+                "usage": self._usage_from_response(response.usage, getattr(response, "model", self.model)),
+                "finish_reason": getattr(response.choices[0], "finish_reason", None)
+            }
+        except (SummaryGenerationError, CircuitOpenError):
+            raise
+        except Exception as e:
+            logger.error(f"Error generating digest sections: {str(e)}", exc_info=True)
+            raise SummaryGenerationError(f"Failed to generate sections: {str(e)}")
+
+    def _usage_from_response(self, usage: Any, model: str, batch: bool = False) -> Dict[str, Any]:
+        """Build the usage dictionary stored with a digest from a provider usage object."""
+        # Tokens served from the provider's prompt cache are billed at a lower rate
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details else 0
+        result = {
+            "prompt_tokens": usage.prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "estimated_cost_usd": self.calculate_cost(usage.prompt_tokens, usage.completion_tokens, batch=batch, cached_tokens=cached_tokens),
+            "timestamp": datetime.utcnow().isoformat(),
+            "model": model  # Add the model name here
+        }
+        if batch:
+            result["batch"] = True
+        return result
+
     def get_prompt_for_format(self, format_type: SummaryFormat) -> str:
         """Return the prompt for the specified format."""
         # Ensure MASTER_DIGEST_PROMPT is accessible here if defined in base class
@@ -0,0 +1,215 @@
+"""
+Failure handling for provider calls.
+
+Errors are classified as retryable (timeouts, connection errors, rate limits,
+5xx) or permanent (bad requests, authentication, validation), so permanent
+failures are not retried. Retries draw from a process-wide budget, so an
+outage cannot multiply traffic. A circuit breaker per provider fails fast
+while the provider is down and reports when to try again.
+"""
+import logging
+import time
+from threading import Lock
+from typing import Any, Dict, Optional
+
+import openai
+
+from app.core.config import settings
+from .base import SummaryGenerationError
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: request timeout, conflict, rate limit and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+class CircuitOpenError(SummaryGenerationError):
+    """Raised without calling the provider while its circuit is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Provider '{name}' is unavailable; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient and the same request may succeed later."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent requests.
+
+    Each request deposits `ratio` tokens and each retry spends one. A small
+    per-second allowance lets low traffic still retry. The budget starts empty,
+    so a process that starts during an outage earns its retries like any other.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 0.1, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._lock = Lock()
+        self.requests = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._refill()
+            self.requests += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False when the budget is exhausted."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.retries += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            return {
+                "available": round(self._tokens, 2),
+                "requests": self.requests,
+                "retries": self.retries,
+                "rejected": self.rejected
+            }
+
+class CircuitBreaker:
+    """
+    Closed -> open after consecutive retryable failures; open -> half-open after
+    the reset timeout, letting one trial call through; success closes it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = Lock()
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._current_state() != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go to the provider now."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            retry_after = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_after or self.reset_timeout)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit for '{self.name}' closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        """Count a failed call; only provider-side (retryable) errors can open the circuit."""
+        if not is_retryable(error):
+            with self._lock:
+                self._trial_in_flight = False
+            return
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit for '{self.name}' opened after {self._failures} failures")
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened
+            }
+
+retry_budget = RetryBudget(
+    ratio=settings.RETRY_BUDGET_RATIO,
+    min_per_second=settings.RETRY_BUDGET_MIN_PER_SECOND,
+    max_tokens=settings.RETRY_BUDGET_MAX_TOKENS
+)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = Lock()
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Shared circuit breaker for a provider."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_RESET_SECONDS
+            )
+            _breakers[name] = breaker
+        return breaker
+
+def should_retry(error: Optional[BaseException]) -> bool:
+    """Retry predicate: transient errors only, and only while the retry budget allows."""
+    if error is None or not is_retryable(error):
+        return False
+    if not retry_budget.try_spend():
+        logger.warning(f"Retry budget exhausted, not retrying: {str(error)}")
+        return False
+    return True
+
+def resilience_snapshot() -> Dict[str, Any]:
+    """Circuit breaker and retry budget state for the metrics endpoint."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {
+        "circuit_breakers": {name: breaker.snapshot() for name, breaker in breakers.items()},
+        "retry_budget": retry_budget.snapshot()
+    }
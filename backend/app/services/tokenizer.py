@@ -0,0 +1,123 @@
+"""
+Local token counting for prompt budgeting.
+
+Uses the tiktoken BPE for the OpenAI model family when its encoding file is
+available locally (the Docker image bundles it at build time). Without it, a
+deterministic regex approximation is used so budgeting never needs the network.
+"""
+import logging
+import re
+from threading import Lock
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Try to import tiktoken but don't fail if it's not available
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    logger.warning("tiktoken library not installed. Token counts will be approximated.")
+    TIKTOKEN_AVAILABLE = False
+
+# Encoding used by o3-mini and the gpt-4o family
+DEFAULT_ENCODING = "o200k_base"
+
+# Fallback pieces: short runs of word characters or single punctuation marks,
+# which tracks BPE token counts for English text closely enough for budgeting.
+_APPROX_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+class Tokenizer:
+    """Counts, truncates and chunks text by tokens."""
+
+    def __init__(self, encoding_name: str = DEFAULT_ENCODING):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._loaded = False
+        self._lock = Lock()
+
+    @property
+    def encoding(self):
+        """The tiktoken encoding, or None when only the approximation is available."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._encoding = self._load_encoding()
+                    self._loaded = True
+        return self._encoding
+
+    @property
+    def is_exact(self) -> bool:
+        """Whether counts come from the real BPE rather than the approximation."""
+        return self.encoding is not None
+
+    def _load_encoding(self):
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        try:
+            return tiktoken.get_encoding(self.encoding_name)
+        except Exception as e:
+            logger.warning(f"Could not load tokenizer encoding '{self.encoding_name}', using approximation: {str(e)}")
+            return None
+
+    def count(self, text: Optional[str]) -> int:
+        """Return the number of tokens in text."""
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return sum(1 for _ in _APPROX_TOKEN_RE.finditer(text))
+
+    def truncate(self, text: Optional[str], max_tokens: int) -> str:
+        """Return the longest prefix of text that fits in max_tokens."""
+        if not text or max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            return self.encoding.decode(tokens[:max_tokens])
+        end = None
+        for i, match in enumerate(_APPROX_TOKEN_RE.finditer(text)):
+            if i == max_tokens:
+                return text[:end]
+            end = match.end()
+        return text
+
+    def chunk(self, text: Optional[str], max_tokens: int) -> List[str]:
+        """
+        Split text at whitespace into consecutive chunks of at most max_tokens tokens.
+
+        Words are counted one at a time, so a chunk's count as a whole can be
+        off by the odd token; a single word longer than max_tokens becomes a
+        chunk of its own rather than being cut.
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        chunks: List[str] = []
+        words: List[str] = []
+        used = 0
+        for word in (text or "").split():
+            tokens = self.count(word)
+            if words and used + tokens > max_tokens:
+                chunks.append(" ".join(words))
+                words, used = [], 0
+            words.append(word)
+            used += tokens
+        if words:
+            chunks.append(" ".join(words))
+        return chunks
+
+tokenizer = Tokenizer()
+
+def count_tokens(text: Optional[str]) -> int:
+    """Count tokens with the shared tokenizer."""
+    return tokenizer.count(text)
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int) -> str:
+    """Truncate text to max_tokens with the shared tokenizer."""
+    return tokenizer.truncate(text, max_tokens)
+
+def chunk_by_tokens(text: Optional[str], max_tokens: int) -> List[str]:
+    """Chunk text at word boundaries into max_tokens pieces with the shared tokenizer."""
+    return tokenizer.chunk(text, max_tokens)
@@ -0,0 +1,129 @@
+"""
+Token-reduction pass applied to transcripts before they reach a summarizer.
+
+Auto-generated captions repeat rolling fragments, carry timing-only newline
+segments and non-speech markers such as [Music], all of which are billed as
+prompt tokens. The pass is deterministic and linear in the transcript length,
+so it runs on every generation instead of rewriting the stored transcript.
+"""
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Non-speech markers: [Music], [Applause], (laughter), music notes and >> speaker changes
+_MARKER_RE = re.compile(
+    r"\[[^\[\]]{1,40}\]"
+    r"|\((?:music|applause|laughter|laughs|inaudible|crosstalk|silence|cheering)\)"
+    r"|[♪♫]+"
+    r"|>>",
+    re.IGNORECASE
+)
+_WHITESPACE_RE = re.compile(r"\s+")
+# A transcript that is nothing but one bracketed message is a placeholder, not captions
+_PLACEHOLDER_RE = re.compile(r"\s*\[[^\[\]]*\]\s*")
+
+# Filler words dropped when disfluency removal is enabled
+DISFLUENCIES = frozenset({"um", "umm", "uh", "uhh", "uhm", "erm", "er", "ah", "hmm", "mm", "mhm"})
+
+# Polynomial rolling hash over word ids
+_HASH_BASE = 1_000_003
+_HASH_MOD = (1 << 61) - 1
+
+class TranscriptPreprocessor:
+    """Normalises caption text and collapses rolling duplicates."""
+
+    def __init__(self, max_repeat_words: int = 16, min_repeat_words: int = 2, drop_disfluencies: bool = False):
+        """
+        Args:
+            max_repeat_words: Longest immediately repeated span that is collapsed
+            min_repeat_words: Shortest span that is collapsed; shorter repeats are left alone
+            drop_disfluencies: Also remove filler words and one-word stutters
+        """
+        self.max_repeat_words = max_repeat_words
+        self.min_repeat_words = min_repeat_words
+        self.drop_disfluencies = drop_disfluencies
+        self._powers = [1]
+        for _ in range(max_repeat_words):
+            self._powers.append(self._powers[-1] * _HASH_BASE % _HASH_MOD)
+
+    def process(self, text: Optional[str]) -> Tuple[str, Dict[str, int]]:
+        """
+        Clean a transcript.
+
+        Returns:
+            The cleaned text and counts of removed markers, repeated words and disfluencies
+        """
+        stats = {"markers_removed": 0, "repeated_words_removed": 0, "disfluencies_removed": 0}
+        if not text or _PLACEHOLDER_RE.fullmatch(text):
+            return text or "", stats
+
+        text, stats["markers_removed"] = _MARKER_RE.subn(" ", text)
+        words = _WHITESPACE_RE.split(text.strip())
+        if words == [""]:
+            return "", stats
+
+        if self.drop_disfluencies:
+            words, stats["disfluencies_removed"] = self._drop_disfluencies(words)
+        words, stats["repeated_words_removed"] = self._collapse_repeats(words)
+        return " ".join(words), stats
+
+    def _drop_disfluencies(self, words: List[str]) -> Tuple[List[str], int]:
+        kept: List[str] = []
+        previous = None
+        for word in words:
+            key = word.lower().strip(",.")
+            # Fillers and single-word stutters ("I I think") carry no content
+            if key in DISFLUENCIES or (key == previous and word[-1:] not in ".?!"):
+                continue
+            kept.append(word)
+            previous = key
+        return kept, len(words) - len(kept)
+
+    def _collapse_repeats(self, words: List[str]) -> Tuple[List[str], int]:
+        """
+        Drop spans that immediately repeat the text before them.
+
+        Rolling captions restate the tail of the previous line, so a span
+        starting at a word that was last seen k words ago is compared with the
+        preceding k output words. Prefix hashes make each comparison O(1).
+        """
+        ids: List[int] = []
+        vocabulary: Dict[str, int] = {}
+        for word in words:
+            ids.append(vocabulary.setdefault(word.lower().strip(",.?!"), len(vocabulary) + 1))
+
+        n = len(ids)
+        in_hash = [0] * (n + 1)
+        for i, word_id in enumerate(ids):
+            in_hash[i + 1] = (in_hash[i] * _HASH_BASE + word_id) % _HASH_MOD
+
+        powers = self._powers
+        out_words: List[str] = []
+        out_hash = [0]
+        last_seen: Dict[int, int] = {}
+        i = 0
+        while i < n:
+            word_id = ids[i]
+            position = last_seen.get(word_id)
+            if position is not None:
+                k = len(out_words) - position
+                if self.min_repeat_words <= k <= self.max_repeat_words and i + k <= n:
+                    span = (in_hash[i + k] - in_hash[i] * powers[k]) % _HASH_MOD
+                    tail = (out_hash[-1] - out_hash[-1 - k] * powers[k]) % _HASH_MOD
+                    if span == tail:
+                        i += k
+                        continue
+            last_seen[word_id] = len(out_words)
+            out_words.append(words[i])
+            out_hash.append((out_hash[-1] * _HASH_BASE + word_id) % _HASH_MOD)
+            i += 1
+        return out_words, n - len(out_words)
+
+def preprocess_transcript(text: Optional[str]) -> Tuple[str, Dict[str, int]]:
+    """Clean a transcript with the configured settings."""
+    preprocessor = TranscriptPreprocessor(drop_disfluencies=settings.TRANSCRIPT_DROP_DISFLUENCIES)
+    return preprocessor.process(text)
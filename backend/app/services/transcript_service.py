@@ -4,6 +4,9 @@ import logging
 from typing import Dict, Any, Tuple
 import requests
 
+from app.models.processing_log import RequestType
+from app.services.processing_log_buffer import log_processing
+
 logger = logging.getLogger(__name__)
 
 class VideoTranscriptError(Exception):
@@ -12,6 +15,10 @@ class VideoTranscriptError(Exception):
 
 class TranscriptService:
     @staticmethod
+    @log_processing(
+        RequestType.EXTRACT_TRANSCRIPT,
+        describe=lambda result: {"source": result[1].get("source"), "characters": len(result[0] or "")}
+    )
     def extract_transcript(url: str) -> Tuple[str, Dict[str, Any]]:
         """Extract transcript from a YouTube video."""
         try:
@@ -0,0 +1,320 @@
+"""
+Near-duplicate transcript detection with MinHash and locality-sensitive hashing.
+
+Reuploads, mirrors and re-edits of a talk have almost the same transcript. At
+ingest each transcript gets a MinHash signature over its word shingles,
+computed with NumPy for all hash permutations at once, and stored on the row.
+The signatures are kept in an in-memory LSH index: every band of the signature
+is hashed to a 64-bit key held in a sorted array per band, so a lookup is one
+binary search per band plus a signature comparison for the few candidates,
+independent of how many transcripts are indexed. A transcript whose signature
+changes is indexed again under a new row; its old row stays in the band
+arrays but no longer matches.
+"""
+import logging
+import re
+import time
+import zlib
+from datetime import timedelta
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.transcript import Transcript as TranscriptModel
+
+logger = logging.getLogger(__name__)
+
+# Try to import numpy but don't fail if it's not available
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logger.warning("numpy library not installed. Near-duplicate transcript detection is disabled.")
+    NUMPY_AVAILABLE = False
+
+NUM_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard similarity almost always share a band
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_WORDS = 5
+# Shingles hashed per step, bounding the permutation matrix to NUM_PERMUTATIONS x this
+SHINGLE_CHUNK = 4096
+# Pending index entries merged into the sorted band arrays at once
+COMPACT_EVERY = 1024
+# Refreshes re-read this much before the newest update seen, for transactions
+# that committed after a refresh with an earlier updated_at
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+if NUMPY_AVAILABLE:
+    # Fixed seed: signatures are stored and must stay comparable across processes
+    _rng = np.random.default_rng(20240611)
+    _PERM_A = _rng.integers(1, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+    _PERM_B = _rng.integers(0, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+    _BAND_MULTIPLIERS = _rng.integers(1, 1 << 62, ROWS_PER_BAND, dtype=np.uint64) | np.uint64(1)
+
+def _shingle_hashes(text: str) -> "np.ndarray":
+    """Hashes (below the Mersenne prime) of the distinct word shingles of a text."""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    vocabulary: Dict[str, int] = {}
+    word_hashes = np.fromiter(
+        (vocabulary.setdefault(word, zlib.crc32(word.encode()) % _MERSENNE_PRIME) for word in words),
+        dtype=np.uint64, count=len(words)
+    )
+    width = min(SHINGLE_WORDS, len(words))
+    count = len(words) - width + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    for k in range(width):
+        hashes = (hashes * np.uint64(1000003) + word_hashes[k:k + count]) % np.uint64(_MERSENNE_PRIME)
+    return np.unique(hashes)
+
+def minhash_signature(text: str) -> Optional["np.ndarray"]:
+    """
+    Compute the MinHash signature of a transcript.
+
+    Returns:
+        NUM_PERMUTATIONS uint32 minimums, or None for empty text or without numpy
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+    shingles = _shingle_hashes(text)
+    if shingles.size == 0:
+        return None
+    signature = np.full(NUM_PERMUTATIONS, _MERSENNE_PRIME, dtype=np.uint64)
+    for start in range(0, shingles.size, SHINGLE_CHUNK):
+        chunk = shingles[start:start + SHINGLE_CHUNK]
+        # (a * x + b) mod p for every permutation and shingle; products stay below 2^62
+        permuted = (_PERM_A[:, None] * chunk[None, :] + _PERM_B[:, None]) % np.uint64(_MERSENNE_PRIME)
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+def transcript_signature(text: str) -> Optional[bytes]:
+    """MinHash signature of a transcript as stored on the row."""
+    signature = minhash_signature(text)
+    return signature.astype("<u4").tobytes() if signature is not None else None
+
+def signature_from_bytes(data: Optional[bytes]) -> Optional["np.ndarray"]:
+    if not data or not NUMPY_AVAILABLE:
+        return None
+    signature = np.frombuffer(data, dtype="<u4")
+    return signature if signature.size == NUM_PERMUTATIONS else None
+
+def band_keys(signatures: "np.ndarray") -> "np.ndarray":
+    """64-bit hash of each band of one signature (shape (BANDS,)) or many (shape (n, BANDS))."""
+    bands = signatures.astype(np.uint64).reshape(signatures.shape[:-1] + (BANDS, ROWS_PER_BAND))
+    # uint64 arithmetic wraps, which is fine for a hash
+    return (bands * _BAND_MULTIPLIERS).sum(axis=-1, dtype=np.uint64)
+
+def estimated_similarity(a: "np.ndarray", b: "np.ndarray") -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(a == b))
+
+class LSHIndex:
+    """
+    Band index over MinHash signatures.
+
+    Each band keeps its keys in a sorted array with the matching row numbers;
+    new entries collect in a small dictionary and are merged in batches.
+    """
+
+    def __init__(self):
+        self._keys = [np.empty(0, dtype=np.uint64) for _ in range(BANDS)]
+        self._rows = [np.empty(0, dtype=np.int64) for _ in range(BANDS)]
+        self._pending: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self._pending_count = 0
+
+    def add(self, row: int, keys: "np.ndarray") -> None:
+        for band, key in enumerate(keys.tolist()):
+            self._pending[band].setdefault(key, []).append(row)
+        self._pending_count += 1
+        if self._pending_count >= COMPACT_EVERY:
+            self.compact()
+
+    def add_many(self, rows: "np.ndarray", keys: "np.ndarray") -> None:
+        """Add rows with their band keys (shape (n, BANDS)) in one merge."""
+        self.compact()
+        for band in range(BANDS):
+            self._merge(band, keys[:, band], rows)
+
+    def _merge(self, band: int, keys: "np.ndarray", rows: "np.ndarray") -> None:
+        all_keys = np.concatenate([self._keys[band], keys])
+        all_rows = np.concatenate([self._rows[band], rows.astype(np.int64)])
+        order = np.argsort(all_keys, kind="stable")
+        self._keys[band] = all_keys[order]
+        self._rows[band] = all_rows[order]
+
+    def compact(self) -> None:
+        """Merge pending entries into the sorted band arrays."""
+        if not self._pending_count:
+            return
+        for band, pending in enumerate(self._pending):
+            keys = [key for key, rows in pending.items() for _ in rows]
+            rows = [row for row_list in pending.values() for row in row_list]
+            self._merge(band, np.array(keys, dtype=np.uint64), np.array(rows, dtype=np.int64))
+            pending.clear()
+        self._pending_count = 0
+
+    def candidates(self, keys: "np.ndarray") -> set:
+        """Rows sharing at least one band with the given band keys."""
+        found = set()
+        for band in range(BANDS):
+            # Search with a uint64 array: a Python int would convert the whole band array
+            key = keys[band:band + 1]
+            start = int(np.searchsorted(self._keys[band], key, side="left")[0])
+            end = int(np.searchsorted(self._keys[band], key, side="right")[0])
+            if end > start:
+                found.update(self._rows[band][start:end].tolist())
+            found.update(self._pending[band].get(int(key[0]), ()))
+        return found
+
+class TranscriptSimilarityIndex:
+    """
+    Process-wide LSH index of stored transcript signatures.
+
+    Loaded from the database on first use and topped up every
+    TRANSCRIPT_INDEX_REFRESH_SECONDS with transcripts whose updated_at is past
+    the newest one loaded, so re-extracted transcripts are picked up too;
+    transcripts ingested by this process are added immediately.
+    """
+
+    def __init__(self, refresh_seconds: float = 60.0, clock=time.monotonic):
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+        self._lock = Lock()
+        self._index = LSHIndex() if NUMPY_AVAILABLE else None
+        self._signatures = np.empty((0, NUM_PERMUTATIONS), dtype=np.uint32) if NUMPY_AVAILABLE else None
+        self._size = 0
+        self._video_ids: List[int] = []
+        self._transcript_ids: List[int] = []
+        # Current row of each transcript; rows of replaced signatures are skipped
+        self._row_of: Dict[int, int] = {}
+        self._loaded_until = None
+        self._refreshed_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _append(self, transcript_ids: List[int], video_ids: List[int], signatures: "np.ndarray") -> "np.ndarray":
+        # Called with self._lock held; returns the row numbers of the new entries
+        needed = self._size + len(transcript_ids)
+        if needed > len(self._signatures):
+            grown = np.empty((max(needed, 2 * len(self._signatures), 1024), NUM_PERMUTATIONS), dtype=np.uint32)
+            grown[:self._size] = self._signatures[:self._size]
+            self._signatures = grown
+        rows = np.arange(self._size, needed)
+        self._signatures[self._size:needed] = signatures
+        self._size = needed
+        self._transcript_ids.extend(transcript_ids)
+        self._video_ids.extend(video_ids)
+        self._row_of.update(zip(transcript_ids, rows.tolist()))
+        return rows
+
+    def _is_indexed(self, transcript_id: int, signature: "np.ndarray") -> bool:
+        # Called with self._lock held
+        row = self._row_of.get(transcript_id)
+        return row is not None and bool(np.array_equal(self._signatures[row], signature))
+
+    def add(self, transcript_id: int, video_id: int, signature: Optional[bytes]) -> bool:
+        """Index one transcript; returns False if it has no usable signature."""
+        parsed = signature_from_bytes(signature)
+        if parsed is None:
+            return False
+        with self._lock:
+            if self._is_indexed(transcript_id, parsed):
+                return True
+            rows = self._append([transcript_id], [video_id], parsed[None, :])
+            self._index.add(int(rows[0]), band_keys(parsed))
+        return True
+
+    def add_transcript(self, transcript: TranscriptModel) -> bool:
+        return self.add(transcript.id, transcript.video_id, transcript.minhash_signature)
+
+    def add_many(self, transcript_ids: List[int], video_ids: List[int], signatures: "np.ndarray") -> int:
+        """
+        Bulk-index signatures (shape (n, NUM_PERMUTATIONS)), as when loading from the database.
+
+        Returns:
+            Number of transcripts added or re-indexed; unchanged ones are skipped
+        """
+        with self._lock:
+            changed = [i for i, transcript_id in enumerate(transcript_ids)
+                       if not self._is_indexed(transcript_id, signatures[i])]
+            if not changed:
+                return 0
+            signatures = signatures[changed]
+            rows = self._append([transcript_ids[i] for i in changed], [video_ids[i] for i in changed], signatures)
+            self._index.add_many(rows, band_keys(signatures))
+        return len(changed)
+
+    def refresh(self, db: Session, force: bool = False) -> int:
+        """
+        Load signatures of transcripts stored or updated since the last refresh.
+
+        Returns:
+            Number of transcripts added or re-indexed
+        """
+        if not NUMPY_AVAILABLE:
+            return 0
+        now = self.clock()
+        with self._lock:
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_seconds:
+                return 0
+            self._refreshed_at = now
+            loaded_until = self._loaded_until
+        query = db.query(
+            TranscriptModel.id, TranscriptModel.video_id, TranscriptModel.minhash_signature, TranscriptModel.updated_at
+        ).filter(TranscriptModel.minhash_signature.isnot(None))
+        if loaded_until is not None:
+            query = query.filter(TranscriptModel.updated_at >= loaded_until - REFRESH_OVERLAP)
+        rows = query.order_by(TranscriptModel.updated_at, TranscriptModel.id).all()
+        if not rows:
+            return 0
+        with self._lock:
+            if self._loaded_until is None or rows[-1].updated_at > self._loaded_until:
+                self._loaded_until = rows[-1].updated_at
+        loaded = [(row.id, row.video_id, signature_from_bytes(row.minhash_signature)) for row in rows]
+        loaded = [entry for entry in loaded if entry[2] is not None]
+        if not loaded:
+            return 0
+        added = self.add_many([entry[0] for entry in loaded], [entry[1] for entry in loaded],
+                              np.stack([entry[2] for entry in loaded]))
+        if added:
+            logger.info(f"Indexed {added} transcript signatures ({len(self)} total)")
+        return added
+
+    def query(self, signature: Optional[bytes], threshold: float, exclude_video_id: Optional[int] = None) -> List[Tuple[int, int, float]]:
+        """
+        Find indexed transcripts similar to a signature.
+
+        Returns:
+            (video_id, transcript_id, similarity) at or above threshold, most similar first
+        """
+        parsed = signature_from_bytes(signature)
+        if parsed is None:
+            return []
+        with self._lock:
+            rows = sorted(self._index.candidates(band_keys(parsed)))
+            if not rows:
+                return []
+            similarities = np.mean(self._signatures[rows] == parsed, axis=1)
+            matches = [
+                (self._video_ids[row], self._transcript_ids[row], float(similarity))
+                for row, similarity in zip(rows, similarities)
+                if similarity >= threshold and self._video_ids[row] != exclude_video_id
+                and self._row_of[self._transcript_ids[row]] == row
+            ]
+        return sorted(matches, key=lambda match: -match[2])
+
+    def find_near_duplicates(self, db: Session, transcript: TranscriptModel, threshold: Optional[float] = None) -> List[Tuple[int, int, float]]:
+        """Near-duplicates of a stored transcript among other videos' transcripts."""
+        self.refresh(db)
+        threshold = settings.TRANSCRIPT_DUPLICATE_THRESHOLD if threshold is None else threshold
+        return self.query(transcript.minhash_signature, threshold, exclude_video_id=transcript.video_id)
+
+transcript_index = TranscriptSimilarityIndex(refresh_seconds=settings.TRANSCRIPT_INDEX_REFRESH_SECONDS)
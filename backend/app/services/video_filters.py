@@ -0,0 +1,67 @@
+"""
+Library filters for video listings, evaluated in SQL.
+
+Each filter is backed by an index:
+- time_range uses the published_on date index.
+- category uses the GIN index on categories (jsonb_path_ops containment).
+- has_digest is an EXISTS probe into the digests.video_id index.
+- processing_status of an unfinished state uses the partial index on those states.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exists, select
+
+from app.models.digest import Digest as DigestModel
+from app.models.video import ProcessingStatus, Video as VideoModel
+
+# Time ranges of the library view, by how far back they reach
+TIME_RANGES: Dict[str, timedelta] = {
+    "day": timedelta(days=1),
+    "week": timedelta(days=7),
+    "month": timedelta(days=30),
+    "year": timedelta(days=365)
+}
+
+# sort_by values sent by the library view, as keyset pagination sort keys.
+# There is no relevance score outside search, so it lists newest first.
+SORT_BY: Dict[str, str] = {
+    "date": "created_at",
+    "views": "view_count",
+    "title": "title",
+    "relevance": "created_at"
+}
+
+def video_criteria(
+    time_range: Optional[str] = None,
+    has_digest: Optional[bool] = None,
+    category: Optional[str] = None,
+    processing_status: Optional[str] = None,
+    today: Optional[date] = None
+) -> List[Any]:
+    """
+    WHERE criteria for the library filters that are set.
+
+    Args:
+        time_range: Only videos uploaded within this range ("all" or None for no limit)
+        has_digest: Only videos with (True) or without (False) a digest
+        category: Only videos in this category
+        processing_status: Only videos in this processing state
+        today: Date the time range ends on, today by default
+
+    Raises:
+        ValueError: If time_range is not one of TIME_RANGES or processing_status not a ProcessingStatus
+    """
+    criteria: List[Any] = []
+    if time_range and time_range != "all":
+        if time_range not in TIME_RANGES:
+            raise ValueError(f"Unknown time range '{time_range}', expected one of: all, {', '.join(TIME_RANGES)}")
+        criteria.append(VideoModel.published_on >= (today or date.today()) - TIME_RANGES[time_range])
+    if has_digest is not None:
+        digest_exists = exists(select(DigestModel.id).where(DigestModel.video_id == VideoModel.id))
+        criteria.append(digest_exists if has_digest else ~digest_exists)
+    if category:
+        criteria.append(VideoModel.categories.contains([category]))
+    if processing_status:
+        criteria.append(VideoModel.processing_status == ProcessingStatus(processing_status.upper()))
+    return criteria
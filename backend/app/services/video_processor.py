@@ -1,9 +1,14 @@
 from typing import Dict, Any, Optional, Tuple
 import logging
 import json
+from datetime import datetime
 import yt_dlp
 from app.core.config import settings
-from app.services.summarizers.openai_summarizer import OpenAISummarizer, SummaryGenerationError
+from app.services.summarizers.openai_summarizer import SummaryGenerationError
+from app.services.summarizers.base import SummarizerInterface
+from app.services.provider_registry import provider_registry
+from app.services.processing_log_buffer import log_processing, processing_log_buffer
+from app.models.processing_log import RequestType
 from app.services.transcript_service import TranscriptService, VideoTranscriptError
 from app.services.exceptions import (
     VideoProcessingError, 
@@ -26,9 +31,20 @@ logger = logging.getLogger(__name__)
 
 class VideoProcessor:
     def __init__(self):
-        self.summarizer = OpenAISummarizer()
+        self._summarizer: Optional[SummarizerInterface] = None
         self.transcript_service = TranscriptService()
 
+    @property
+    def summarizer(self) -> SummarizerInterface:
+        """Shared summarizer, resolved on first use so metadata-only paths never build one."""
+        if self._summarizer is None:
+            self._summarizer = provider_registry.get_summarizer("openai")
+        return self._summarizer
+
+    @log_processing(
+        RequestType.EXTRACT_METADATA,
+        describe=lambda video_data: {"youtube_id": video_data.get("youtube_id"), "chapters": len(video_data.get("chapters") or [])}
+    )
     def validate_and_extract_info(self, url: str) -> dict:
         """Extract video information from URL.
         
@@ -213,6 +229,8 @@ class VideoProcessor:
             return ""
             
         # Call the summarizer with the transcript and context
+        started_at = datetime.utcnow()
+        request_params = {"youtube_id": video_data.get("youtube_id")}
         try:
             logger.info("Calling summarizer service with transcript and context...")
             summary_result = self.summarizer.generate(
@@ -226,6 +244,8 @@ class VideoProcessor:
             # Extract summary and usage data from the result dictionary
             summary = summary_result.get("summary", "")
             usage = summary_result.get("usage", {})
+            processing_log_buffer.record(RequestType.SUMMARIZE, started_at, video_id=video_data.get("id"),
+                                         usage=usage, request_params=request_params)
             
             if not summary:
                  logger.warning("[VideoProcessor] Summarizer returned an empty summary.")
@@ -244,4 +264,6 @@ class VideoProcessor:
         except Exception as e:
             # Catch potential errors from the summarizer service
             logger.error(f"[VideoProcessor] Error during summary generation: {e}", exc_info=True)
+            processing_log_buffer.record(RequestType.SUMMARIZE, started_at, video_id=video_data.get("id"),
+                                         error=str(e), request_params=request_params)
             return ""
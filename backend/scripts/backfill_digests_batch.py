@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Script to generate pending digests in bulk through the provider batch API.
+
+Batch jobs finish within 24 hours at half the synchronous price, which suits
+backfills of archived videos. With --create-missing, empty digests are first
+created for the selected videos that have a processed transcript but no digest
+of the type. Re-running the script collects batches left in flight by an
+earlier run before submitting new ones.
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.models.digest import DigestType
+from app.services.batch_digests import BatchDigestRunner, LocalBatchBackend, OpenAIBatchBackend
+from app.services.provider_registry import provider_registry
+
+def main():
+    """Main function to backfill digests."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of pending digests to submit")
+    parser.add_argument("--poll-seconds", type=float, default=None, help="Seconds between batch status checks")
+    parser.add_argument("--submit-only", action="store_true", help="Submit batches and exit without polling")
+    parser.add_argument("--local", action="store_true", help="Use the in-process batch backend instead of the provider")
+    parser.add_argument("--create-missing", action="store_true",
+                        help="First create empty digests for videos with a processed transcript and no digest")
+    parser.add_argument("--video-ids", type=int, nargs="+", default=None, help="With --create-missing, only these videos")
+    parser.add_argument("--channel-id", type=int, default=None, help="With --create-missing, only videos of this channel")
+    parser.add_argument("--digest-type", choices=[digest_type.value for digest_type in DigestType],
+                        default=DigestType.SUMMARY.value, help="With --create-missing, type of digest to create")
+    args = parser.parse_args()
+
+    if args.local:
+        backend = LocalBatchBackend()
+    else:
+        backend = OpenAIBatchBackend(provider_registry.get_client("openai"))
+    runner = BatchDigestRunner(backend)
+
+    if args.create_missing:
+        created = runner.create_missing_digests(
+            video_ids=args.video_ids,
+            channel_id=args.channel_id,
+            digest_type=DigestType(args.digest_type),
+            limit=args.limit
+        )
+        logger.info(f"Created {created} digests to backfill")
+
+    if args.submit_only:
+        batch_ids = runner.submit_pending(args.limit)
+        logger.info(f"Submitted {len(batch_ids)} batches: {', '.join(batch_ids) or 'none'}")
+        return
+
+    totals = runner.run(limit=args.limit, poll_seconds=args.poll_seconds)
+    logger.info(f"Backfill completed: {totals['batches']} batches, {totals['stored']} digests stored, {totals['failed']} failed")
+
+if __name__ == "__main__":
+    main()
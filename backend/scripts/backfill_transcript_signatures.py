@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Script to compute MinHash signatures for transcripts stored without one.
+
+Signatures let near-duplicate videos reuse each other's digests; new
+transcripts get theirs at ingest, so this only needs to run once after
+upgrading.
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import SessionLocal
+from app.models.transcript import Transcript, TranscriptStatus
+from app.services.transcript_similarity import transcript_signature
+
+def main():
+    """Main function to backfill transcript signatures."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500, help="Transcripts committed per batch")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        last_id = 0
+        updated = 0
+        while True:
+            transcripts = db.query(Transcript).filter(
+                Transcript.id > last_id,
+                Transcript.status == TranscriptStatus.PROCESSED,
+                Transcript.minhash_signature.is_(None)
+            ).order_by(Transcript.id).limit(args.batch_size).all()
+            if not transcripts:
+                break
+            for transcript in transcripts:
+                # Placeholders for failed extractions have no real transcript to compare
+                if transcript.source_url != "error":
+                    transcript.minhash_signature = transcript_signature(transcript.content)
+                    updated += transcript.minhash_signature is not None
+            last_id = transcripts[-1].id
+            db.commit()
+            logger.info(f"Computed {updated} signatures so far (up to transcript {last_id})")
+        logger.info(f"Done: {updated} transcript signatures computed")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Script to benchmark requests per second of the read endpoints on one worker.
+
+Sends concurrent GET requests to a running API, ideally started with a single
+worker (uvicorn app.main:app --workers 1), and reports requests per second
+and latency per endpoint. With --slow-path, a second set of clients keeps
+requesting a slow endpoint at the same time: with sync sessions every slow
+query stalls the event loop and the read endpoints' throughput drops with it.
+
+Run it once on the commit before the async read endpoints and once after,
+saving each run with --output, then compare them with --compare.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATHS = [
+    "/api/v1/videos/?limit=50",
+    "/api/v1/videos/{video_id}",
+    "/api/v1/videos/youtube/{youtube_id}",
+    "/api/v1/digests/?video_id={video_id}",
+    "/api/v1/channels/{channel_id}/videos?limit=50"
+]
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+async def sample_ids(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """IDs of an existing video and its channel to fill the path templates."""
+    response = await client.get("/api/v1/videos/", params={"limit": 1})
+    response.raise_for_status()
+    videos = response.json()
+    if not videos:
+        raise SystemExit("The database has no videos to benchmark with")
+    return {"video_id": videos[0]["id"], "youtube_id": videos[0]["youtube_id"], "channel_id": videos[0]["channel_id"]}
+
+async def hammer(client: httpx.AsyncClient, path: str, deadline: float, latencies: List[float], errors: List[int]) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError:
+            errors.append(0)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+async def benchmark_path(client: httpx.AsyncClient, path: str, args: argparse.Namespace) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: List[int] = []
+    slow_latencies: List[float] = []
+    deadline = time.perf_counter() + args.duration
+    tasks = [hammer(client, path, deadline, latencies, errors) for _ in range(args.concurrency)]
+    if args.slow_path:
+        tasks += [hammer(client, args.slow_path, deadline, slow_latencies, []) for _ in range(args.slow_concurrency)]
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        "slow_requests": len(slow_latencies)
+    }
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    limits = httpx.Limits(max_connections=args.concurrency + args.slow_concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60.0) as client:
+        ids = await sample_ids(client)
+        results = {}
+        for template in args.paths:
+            path = template.format(**ids)
+            # Warm up connections and caches before timing
+            for _ in range(args.concurrency):
+                await client.get(path)
+            results[template] = await benchmark_path(client, path, args)
+            logger.info(f"{template}: {results[template]}")
+        return results
+
+def print_comparison(before: Dict[str, Dict[str, Any]], after: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'endpoint':<48} {'rps before':>11} {'rps after':>10} {'change':>8}")
+    for path in after:
+        if path not in before:
+            continue
+        old, new = before[path]["rps"], after[path]["rps"]
+        change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+        print(f"{path:<48} {old:>11} {new:>10} {change:>8}")
+
+def main():
+    """Main function to benchmark the read endpoints."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000", help="URL of the running API (one worker)")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS,
+                        help="Path templates; {video_id}, {youtube_id} and {channel_id} are filled from the first video")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients per endpoint")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to benchmark each endpoint")
+    parser.add_argument("--slow-path", help="Slow endpoint requested alongside, e.g. /api/v1/analytics/processing?granularity=hour")
+    parser.add_argument("--slow-concurrency", type=int, default=4, help="Concurrent clients on --slow-path")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+    if not args.slow_path:
+        args.slow_concurrency = 0
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Script to benchmark near-duplicate lookups in the transcript LSH index.
+
+Fills an index with random signatures (default one million), then times
+lookups of perturbed copies of indexed signatures and of unrelated ones.
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from app.services.transcript_similarity import NUM_PERMUTATIONS, TranscriptSimilarityIndex
+
+def main():
+    """Main function to benchmark the transcript index."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000, help="Number of indexed signatures")
+    parser.add_argument("--queries", type=int, default=2000, help="Number of timed lookups")
+    parser.add_argument("--changed", type=float, default=0.1, help="Fraction of signature values changed in near-duplicate queries")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    signatures = rng.integers(0, 2**31 - 1, (args.size, NUM_PERMUTATIONS), dtype=np.uint32)
+    index = TranscriptSimilarityIndex()
+    started = time.perf_counter()
+    index.add_many(list(range(args.size)), list(range(args.size)), signatures)
+    print(f"Indexed {args.size} signatures in {time.perf_counter() - started:.1f}s")
+
+    targets = rng.integers(0, args.size, args.queries)
+    queries = signatures[targets].copy()
+    changed = rng.random(queries.shape) < args.changed
+    queries[changed] = rng.integers(0, 2**31 - 1, int(changed.sum()), dtype=np.uint32)
+    unrelated = rng.integers(0, 2**31 - 1, (args.queries, NUM_PERMUTATIONS), dtype=np.uint32)
+
+    for name, batch in (("near-duplicate", queries), ("unrelated", unrelated)):
+        found = 0
+        timings = []
+        for i, signature in enumerate(batch):
+            data = signature.astype("<u4").tobytes()
+            started = time.perf_counter()
+            matches = index.query(data, threshold=0.8)
+            timings.append(time.perf_counter() - started)
+            found += any(match[1] == targets[i] for match in matches) if name == "near-duplicate" else bool(matches)
+        timings_us = np.array(timings) * 1e6
+        print(f"{name}: p50 {np.percentile(timings_us, 50):.0f}us, p99 {np.percentile(timings_us, 99):.0f}us, "
+              f"{found}/{len(batch)} {'found' if name == 'near-duplicate' else 'false matches'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""
+Deterministic stand-in for the OpenAI chat-completions API, for load and latency tests.
+
+Point the backend at it with OPENAI_BASE_URL=http://localhost:8001/v1 so digest
+generation runs through the real client, rate limiter, retry policy and
+circuit breaker without spending tokens. Latency, generation speed, error rate
+and 429 injection are configurable, and a fixed seed replays the same run.
+
+Usage:
+    python scripts/fake_llm_server.py --port 8001 --latency-ms 800 --tokens-per-second 80 --rate-limit-rate 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from itertools import count
+from threading import Lock
+from typing import Any, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.tokenizer import count_tokens
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Providers only cache prompt prefixes of at least this many tokens, in steps of 128
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+class FakeLLMConfig:
+    """Behaviour of the fake server."""
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.5,
+        tokens_per_second: float = 80.0,
+        completion_tokens: int = 600,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Args:
+            latency_ms: Median time to first token (log-normally distributed)
+            latency_sigma: Spread of the log-normal latency; 0 makes it constant
+            tokens_per_second: Generation speed after the first token
+            completion_tokens: Completion length, capped by the request's max tokens
+            error_rate: Fraction of requests answered with a 500
+            rate_limit_rate: Fraction of requests answered with a 429
+            seed: Seed for the per-request random draws
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+
+def _fake_digest(messages: List[Dict[str, Any]], target_tokens: int) -> str:
+    """Markdown shaped like a master digest, padded to roughly target_tokens."""
+    user_content = messages[-1].get("content", "") if messages else ""
+    title = "the video"
+    for line in user_content.splitlines():
+        if line.startswith("Title:"):
+            title = line[len("Title:"):].strip() or title
+            break
+    sections = [
+        "## Concise Summary",
+        f"A deterministic fake digest of {title}.",
+        "## Target Audience & Value",
+        "**Audience:** Load testers",
+        "**Reasons to Watch:**",
+        "- Exercises the full request path",
+        "- Costs nothing",
+        "## Key Takeaways",
+        "- Latency comes from the fake server configuration",
+        "- Token counts are computed locally",
+        "- Errors are injected at the configured rates",
+        "## Video Highlights ✨",
+        "* **Key Tools Mentioned:** 🛠️ **fake_llm_server**",
+    ]
+    text = "\n".join(sections)
+    filler = " lorem ipsum dolor sit amet"
+    missing = target_tokens - count_tokens(text)
+    if missing > 0:
+        text += "\n\n" + (filler * (missing // 5 + 1)).strip()
+    return text
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    """Build the fake chat-completions app."""
+    app = FastAPI(title="Fake LLM")
+    request_numbers = count()
+    seen_prefixes = set()
+    prefixes_lock = Lock()
+
+    def draw(request_number: int) -> random.Random:
+        # Seeded per request number so a run with the same seed replays exactly
+        return random.Random(f"{config.seed}:{request_number}")
+
+    def cached_tokens(messages: List[Dict[str, Any]]) -> int:
+        """Simulate prefix caching of the first message."""
+        if not messages:
+            return 0
+        prefix = str(messages[0].get("content", ""))
+        tokens = count_tokens(prefix)
+        if tokens < CACHE_MIN_TOKENS:
+            return 0
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        with prefixes_lock:
+            hit = key in seen_prefixes
+            seen_prefixes.add(key)
+        return (tokens // CACHE_BLOCK_TOKENS) * CACHE_BLOCK_TOKENS if hit else 0
+
+    def error_response(status_code: int, error_type: str, message: str, headers: Dict[str, str] = None) -> JSONResponse:
+        return JSONResponse(
+            status_code=status_code,
+            content={"error": {"message": message, "type": error_type, "param": None, "code": None}},
+            headers=headers
+        )
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "o3-mini", "object": "model", "created": 0, "owned_by": "fake"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        rng = draw(next(request_numbers))
+        messages = body.get("messages", [])
+        model = body.get("model", "o3-mini")
+
+        ttft = config.latency_ms / 1000.0
+        if config.latency_sigma > 0:
+            ttft *= math.exp(rng.gauss(0.0, config.latency_sigma))
+
+        outcome = rng.random()
+        if outcome < config.rate_limit_rate:
+            await asyncio.sleep(min(ttft, 0.05))
+            return error_response(429, "rate_limit_error", "Rate limit reached (injected)", {"retry-after": "1"})
+        if outcome < config.rate_limit_rate + config.error_rate:
+            await asyncio.sleep(ttft)
+            return error_response(500, "server_error", "Internal server error (injected)")
+
+        max_tokens = body.get("max_completion_tokens") or body.get("max_tokens") or config.completion_tokens
+        content = _fake_digest(messages, min(config.completion_tokens, max_tokens))
+        prompt_tokens = sum(count_tokens(str(message.get("content", ""))) + 4 for message in messages)
+        completion_tokens = count_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens(messages)}
+        }
+        completion_id = f"chatcmpl-fake-{rng.getrandbits(48):012x}"
+        created = int(time.time())
+        generation_seconds = completion_tokens / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + generation_seconds)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                "usage": usage
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events():
+            await asyncio.sleep(ttft)
+            words = content.split(" ")
+            # Send roughly ten chunks per second of generation
+            chunk_words = max(1, len(words) // max(1, int(generation_seconds * 10)))
+            delay = generation_seconds * chunk_words / len(words) if words else 0.0
+            for start in range(0, len(words), chunk_words):
+                piece = " ".join(words[start:start + chunk_words])
+                if start:
+                    piece = " " + piece
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(delay)
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            if include_usage:
+                yield f"data: {json.dumps({**final, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+def main():
+    """Run the fake server."""
+    parser = argparse.ArgumentParser(description="Deterministic fake chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Median time to first token")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal spread of the latency")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Generation speed")
+    parser.add_argument("--completion-tokens", type=int, default=600, help="Completion length")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests failing with 429")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    logger.info(f"Starting fake LLM server on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
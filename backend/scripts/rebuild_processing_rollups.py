@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""
+Script to rebuild the hourly and daily processing rollups from the processing logs.
+
+Run once after upgrading to fold in logs written before rollups existed, or
+with --since to recompute recent days.
+"""
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import SessionLocal
+from app.services.processing_rollups import rebuild_rollups
+
+def main():
+    """Main function to rebuild the processing rollups."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="Only rebuild buckets from this UTC date on (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        folded = rebuild_rollups(db, args.since)
+        logger.info(f"Folded {folded} processing logs into the rollups")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+Script to rebuild the tag dictionary used by typeahead from the tags of all videos.
+
+Run once after upgrading to add the tags of existing videos, and again after
+deleting videos outside the ORM (bulk deletes, channel cascades in SQL),
+whose tags the dictionary keeps counting until then.
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import SessionLocal
+from app.models.tag import rebuild_tag_dictionary
+
+def main():
+    """Main function to rebuild the tag dictionary."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        tags = rebuild_tag_dictionary(db)
+        logger.info(f"Rebuilt the tag dictionary with {tags} tags")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Script to regenerate digests made with an older prompt version.
+
+Digests are processed most recently viewed first, under a cost cap and a
+request rate limit. A job stopped by its cap or interrupted is resumed with
+--job-id; raise its cap with --cost-cap to let it continue.
+"""
+import argparse
+import logging
+import os
+import sys
+
+# Set up logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db.database import SessionLocal
+from app.models.regeneration_job import RegenerationJob
+from app.services.digest_regeneration import DigestRegenerationRunner
+from app.services.summarizers import SummarizerInterface
+
+def main():
+    """Main function to regenerate outdated digests."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--job-id", type=int, default=None, help="Resume an existing job instead of creating one")
+    parser.add_argument("--target-version", type=int, default=SummarizerInterface.PROMPT_VERSION,
+                        help="Regenerate digests below this prompt version")
+    parser.add_argument("--cost-cap", type=float, default=None, help="Maximum spend for the job in USD")
+    parser.add_argument("--rpm", type=int, default=None, help="Maximum generation requests per minute")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of digests to process in this run")
+    args = parser.parse_args()
+
+    runner = DigestRegenerationRunner()
+    job_id = args.job_id
+    if job_id is None:
+        job_id = runner.create_job(args.target_version, args.cost_cap, args.rpm)
+        logger.info(f"Created regeneration job {job_id} for prompt version {args.target_version}")
+    elif args.cost_cap is not None or args.rpm is not None:
+        db = SessionLocal()
+        try:
+            job = db.query(RegenerationJob).filter(RegenerationJob.id == job_id).first()
+            if job is None:
+                logger.error(f"Regeneration job {job_id} not found")
+                sys.exit(1)
+            if args.cost_cap is not None:
+                job.cost_cap_usd = args.cost_cap
+            if args.rpm is not None:
+                job.requests_per_minute = args.rpm
+            db.commit()
+        finally:
+            db.close()
+
+    progress = runner.run(job_id, limit=args.limit)
+    logger.info(
+        f"Job {progress['job_id']} {progress['status']}: {progress['regenerated']} regenerated, "
+        f"{progress['failed']} failed, ${progress['spent_usd']:.4f} of ${progress['cost_cap_usd'] or 0:.2f} spent"
+    )
+
+if __name__ == "__main__":
+    main()
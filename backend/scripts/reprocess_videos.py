@@ -19,15 +19,22 @@ logger = logging.getLogger(__name__)
 # API configuration
 API_BASE_URL = "http://localhost:8000/api/v1"
 
-def get_videos() -> List[Dict[str, Any]]:
-    """Get all videos from the API."""
+def get_videos(processing_status: str) -> List[Dict[str, Any]]:
+    """Get all videos in a processing state from the API, following its page cursors."""
+    videos: List[Dict[str, Any]] = []
+    params: Dict[str, Any] = {"processing_status": processing_status, "limit": 500}
     try:
-        response = requests.get(f"{API_BASE_URL}/videos/")
-        response.raise_for_status()
-        return response.json()
+        while True:
+            response = requests.get(f"{API_BASE_URL}/videos/", params=params)
+            response.raise_for_status()
+            videos.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return videos
+            params["cursor"] = cursor
     except requests.RequestException as e:
-        logger.error(f"Failed to get videos: {e}")
-        return []
+        logger.error(f"Failed to get {processing_status} videos: {e}")
+        return videos
 
 def process_video(video_id: int) -> bool:
     """Trigger processing for a specific video."""
@@ -44,14 +51,10 @@ def main():
     """Main function to reprocess videos."""
     logger.info("Starting video reprocessing script")
     
-    # Get all videos
-    videos = get_videos()
-    logger.info(f"Found {len(videos)} videos")
-    
-    # Filter videos by processing status
-    pending_videos = [v for v in videos if v.get("processing_status") == "PENDING"]
-    processing_videos = [v for v in videos if v.get("processing_status") == "PROCESSING"]
-    failed_videos = [v for v in videos if v.get("processing_status") == "FAILED"]
+    # Get the unfinished videos, filtered by the API
+    pending_videos = get_videos("PENDING")
+    processing_videos = get_videos("PROCESSING")
+    failed_videos = get_videos("FAILED")
     
     logger.info(f"Status breakdown: PENDING={len(pending_videos)}, PROCESSING={len(processing_videos)}, FAILED={len(failed_videos)}")
     
@@ -168,7 +168,8 @@ def test_list_transcripts(client, test_transcript):
     assert response.status_code == 200
     data = response.json()
     assert len(data) > 0
-    assert "content" in data[0]
+    # List items leave the transcript itself to GET /transcripts/{id}
+    assert "status" in data[0] and "content" not in data[0]
 
 def test_get_transcript(client, test_transcript):
     # First get all transcripts to get an ID
@@ -191,7 +192,8 @@ def test_get_video_transcripts(client):
     assert response.status_code == 200
     data = response.json()
     assert len(data) > 0
-    assert "content" in data[0]
+    # List items leave the transcript itself to GET /transcripts/{id}
+    assert "status" in data[0] and "content" not in data[0]
 
 # Tests for Digests API
 def test_list_digests(client, setup_db):
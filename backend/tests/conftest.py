@@ -5,11 +5,14 @@ import os
 import pytest
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
 from app.main import app
-from app.db.database import Base, get_db
+from app.db.database import Base, SyncSessionAdapter, get_async_db, get_db
+from app.models import Base as ModelBase
 
 # Load environment variables
 load_dotenv()
@@ -82,7 +85,11 @@ def client(db_session):
         finally:
             pass  # Session is closed in the db_session fixture
     
+    def override_get_async_db():
+        yield SyncSessionAdapter(db_session)
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     
     with TestClient(app) as test_client:
         yield test_client
@@ -91,6 +98,33 @@ def client(db_session):
     app.dependency_overrides.clear()
 
 
+@compiles(JSONB, "sqlite")
+def jsonb_as_json(element, compiler, **kw):
+    return "JSON"
+
+
+@compiles(TSVECTOR, "sqlite")
+def tsvector_as_text(element, compiler, **kw):
+    return "TEXT"
+
+
+@pytest.fixture
+def sqlite_engine():
+    """Create an in-memory SQLite engine with all tables, for model tests that need no PostgreSQL."""
+    engine = create_engine("sqlite://")
+
+    # Stand-ins for the text search functions of the generated search_vector columns
+    @event.listens_for(engine, "connect")
+    def add_search_functions(connection, record):
+        connection.create_function("to_tsvector", 2, lambda config, text: text, deterministic=True)
+        connection.create_function("setweight", 2, lambda vector, weight: vector, deterministic=True)
+
+    # SQLite does not enforce foreign keys, so referenced rows can be left out
+    ModelBase.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
 # Test data fixtures
 @pytest.fixture
 def test_channel():
@@ -0,0 +1,128 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, sessionmaker
+from app.models import Digest, LLM, Transcript, TranscriptStatus, Video
+from app.models.digest import DigestType
+from app.services.batch_digests import (
+    BatchDigestRunner,
+    LocalBatchBackend,
+    build_batch_line,
+    claim_digests,
+    parse_batch_result,
+    digest_id_from_custom_id,
+    release_digests
+)
+from app.services.digest_generation import record_generation_error
+from app.services.summarizers import OpenAISummarizer, SummaryFormat, SummaryGenerationError
+
+@pytest.fixture
+def summarizer():
+    return OpenAISummarizer(client=Mock())
+
+@pytest.fixture
+def context():
+    return {
+        "video": SimpleNamespace(title="Test Video", description="About testing", chapters=None),
+        "transcript": SimpleNamespace(content="This is a transcript about testing.", token_count=8),
+        "transcript_text": "This is a transcript about testing.",
+        "transcript_tokens": 8,
+        "provider": "openai",
+        "summary_format": SummaryFormat.ENHANCED
+    }
+
+def test_batch_line_matches_synchronous_request(summarizer, context):
+    """Test that batch lines carry the same body generate() would send."""
+    line = build_batch_line(summarizer, 42, context)
+
+    assert line["custom_id"] == "digest-42"
+    assert line["url"] == "/v1/chat/completions"
+    assert line["body"]["model"] == "o3-mini"
+    assert line["body"]["max_completion_tokens"] == summarizer.MAX_COMPLETION_TOKENS
+    assert line["body"]["messages"][1]["content"].endswith("This is a transcript about testing.")
+    assert digest_id_from_custom_id(line["custom_id"]) == 42
+    assert digest_id_from_custom_id("other-1") is None
+
+def test_local_backend_round_trip(summarizer, context):
+    """Test that the local backend completes a batch and results parse at the batch price."""
+    backend = LocalBatchBackend()
+    batch_id = backend.submit([build_batch_line(summarizer, 1, context), build_batch_line(summarizer, 2, context)])
+
+    assert backend.status(batch_id) == "completed"
+    results = backend.results(batch_id)
+    assert [line["custom_id"] for line in results] == ["digest-1", "digest-2"]
+
+    result = parse_batch_result(summarizer, results[0])
+    usage = result["usage"]
+    assert result["summary"] == "Local batch summary."
+    assert usage["batch"] is True
+    assert usage["estimated_cost_usd"] == pytest.approx(
+        summarizer.calculate_cost(usage["prompt_tokens"], usage["completion_tokens"]) * summarizer.BATCH_PRICE_MULTIPLIER
+    )
+
+def test_failed_request_raises(summarizer, context):
+    """Test that per-request failures surface as SummaryGenerationError."""
+    def responder(body):
+        raise RuntimeError("context length exceeded")
+
+    backend = LocalBatchBackend(responder)
+    batch_id = backend.submit([build_batch_line(summarizer, 1, context)])
+
+    with pytest.raises(SummaryGenerationError, match="context length exceeded"):
+        parse_batch_result(summarizer, backend.results(batch_id)[0])
+
+    error_line = {"custom_id": "digest-2", "response": {"status_code": 400, "body": {"error": {"message": "bad request"}}}, "error": None}
+    with pytest.raises(SummaryGenerationError, match="bad request"):
+        parse_batch_result(summarizer, error_line)
+
+def test_claims_count_attempts_and_survive_errors():
+    """Test that a claim counts an attempt, a release gives it back and an error keeps the count."""
+    digest = SimpleNamespace(extra_data={"provider": "openai", "error": "earlier failure"})
+    claim_digests([digest])
+    assert digest.extra_data["batch_id"] is None and digest.extra_data["batch_attempts"] == 1
+    assert "error" not in digest.extra_data
+
+    release_digests([digest])
+    assert "batch_id" not in digest.extra_data and digest.extra_data["batch_attempts"] == 0
+
+    claim_digests([digest])
+    digest.extra_data = {**digest.extra_data, "batch_id": "batch_1"}
+    record_generation_error(digest, "Batch request failed")
+    assert digest.extra_data == {"provider": "openai", "batch_attempts": 1, "error": "Batch request failed"}
+
+def test_pending_query_skips_claimed_and_exhausted_digests(summarizer):
+    """Test that only unclaimed digests under the attempt limit are selected, with locked rows skipped."""
+    runner = BatchDigestRunner(LocalBatchBackend(), summarizer=summarizer)
+    compiled = runner.pending_query(Session(), 10).statement.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert sql.rstrip().endswith("FOR UPDATE SKIP LOCKED")
+    assert "created_at < now() -" in sql
+    assert {"batch_id", "stream", "batch_attempts", "backfill"} <= set(compiled.params.values())
+    assert ("stream", "checkpoint_at") in compiled.params.values()
+
+def test_create_missing_digests_for_archived_videos(sqlite_engine, summarizer):
+    """Test that empty backfill digests are created only for transcribed videos without one."""
+    factory = sessionmaker(bind=sqlite_engine)
+    db = factory()
+    db.add(LLM(id=1, name="o3-mini", base_cost_per_token=0.000001))
+    for video_id in (1, 2, 3):
+        db.add(Video(id=video_id, youtube_id=f"vid{video_id}", title=f"Video {video_id}",
+                     webpage_url="https://youtu.be/x", channel_id=1))
+    for video_id in (1, 2):
+        db.add(Transcript(video_id=video_id, source_url="https://youtu.be/x", content="text",
+                          status=TranscriptStatus.PROCESSED))
+    db.flush()
+    db.add(Digest(video_id=2, user_id=1, llm_id=1, content="done", digest_type=DigestType.SUMMARY,
+                  tokens_used=1, cost=0.0, model_version="test", generated_at=datetime.utcnow()))
+    db.commit()
+
+    runner = BatchDigestRunner(LocalBatchBackend(), summarizer=summarizer, session_factory=factory)
+    assert runner.create_missing_digests() == 1
+    created = db.query(Digest).filter(Digest.video_id == 1).one()
+    assert created.content == "" and created.extra_data == {"provider": "openai", "backfill": True}
+    assert runner.create_missing_digests() == 0
+    db.close()
+
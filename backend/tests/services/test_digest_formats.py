@@ -0,0 +1,57 @@
+from app.models.digest import Digest as DigestModel, DigestType
+from app.services.digest_formats import apply_derived_content, derive_content, parse_sections
+
+MASTER = """## Concise Summary
+A talk about design systems.
+
+## Target Audience & Value
+**Audience:** Frontend engineers
+
+## Key Takeaways
+- Tokens keep platforms consistent
+
+## Chapter Breakdown
+**[00:45](t=45) | 📌 Introduction**
+* Design tokens
+
+## Video Highlights ✨
+* **Key Tools Mentioned:** 🛠️ **Figma**
+"""
+
+def test_parse_sections_normalises_headings():
+    """Test that sections are keyed by heading without emoji or case."""
+    sections = parse_sections(MASTER)
+    assert list(sections) == ["concise summary", "target audience & value", "key takeaways", "chapter breakdown", "video highlights"]
+    assert sections["video highlights"].startswith("## Video Highlights ✨")
+    assert "Figma" in sections["video highlights"]
+
+def test_derived_types_keep_their_sections():
+    """Test that each digest type gets only its own sections, in order."""
+    summary = derive_content(MASTER, DigestType.SUMMARY)
+    assert summary.index("## Concise Summary") < summary.index("## Key Takeaways")
+    assert "Chapter Breakdown" not in summary
+
+    highlights = derive_content(MASTER, DigestType.HIGHLIGHTS)
+    assert "## Video Highlights" in highlights and "Key Takeaways" not in highlights
+
+    chapters = derive_content(MASTER, DigestType.CHAPTERS)
+    assert chapters.startswith("## Chapter Breakdown") and "Figma" not in chapters
+
+    assert derive_content(MASTER, DigestType.DETAILED) == MASTER.strip()
+
+def test_missing_sections_are_not_derived():
+    """Test that unstructured or incomplete digests fall back to generation."""
+    assert derive_content("This is a mock summary.", DigestType.HIGHLIGHTS) is None
+    segmentless = MASTER.replace("## Chapter Breakdown", "**Chapters**")
+    assert derive_content(segmentless, DigestType.CHAPTERS) is None
+
+def test_apply_derived_content_is_free_and_linked():
+    """Test that derived digests cost nothing and point at their master digest."""
+    master = DigestModel(id=7, video_id=1, llm_id=2, user_id=1, digest_type=DigestType.SUMMARY,
+                         content=MASTER, model_version="o3-mini", extra_data={"provider": "openai"})
+    digest = DigestModel(video_id=1, user_id=1, digest_type=DigestType.HIGHLIGHTS)
+
+    assert apply_derived_content(digest, master)
+    assert digest.tokens_used == 0 and digest.cost == 0.0
+    assert digest.llm_id == 2 and digest.model_version == "o3-mini"
+    assert digest.extra_data == {"derived_from": 7, "summary_format": "concise", "provider": "openai"}
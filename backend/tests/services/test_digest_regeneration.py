@@ -0,0 +1,94 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock
+from app.models.digest import Digest as DigestModel, DigestType
+from app.models.regeneration_job import RegenerationJob
+from app.services import digest_regeneration
+from app.services.digest_regeneration import DigestRegenerationRunner
+from app.services.summarizers import SummarizerInterface, SummaryFormat, SummaryGenerationError, CircuitOpenError
+
+@pytest.fixture
+def context(monkeypatch):
+    context = {
+        "video": SimpleNamespace(title="Test Video", description=None, chapters=None),
+        "transcript_text": "A transcript.",
+        "transcript_tokens": 3,
+        "preprocessing": {},
+        "provider": "openai",
+        "summary_format": SummaryFormat.ENHANCED
+    }
+    monkeypatch.setattr(digest_regeneration, "load_generation_context", lambda db, digest: {**context, "digest": digest})
+    monkeypatch.setattr(digest_regeneration, "record_processing_log", Mock())
+    return context
+
+@pytest.fixture
+def db():
+    db = Mock()
+    db.query.return_value.filter.return_value.all.return_value = []
+    return db
+
+def make_job(**kwargs):
+    values = dict(id=1, target_version=2, cost_cap_usd=1.0, requests_per_minute=60,
+                  regenerated_count=0, failed_count=0, tokens_used=0, spent_usd=0.0)
+    values.update(kwargs)
+    return RegenerationJob(**values)
+
+def make_digest():
+    return DigestModel(id=5, video_id=1, llm_id=1, digest_type=DigestType.SUMMARY,
+                       content="Old digest", prompt_version=1, extra_data={})
+
+def summary_result(cost=0.25):
+    return {"summary": "New digest", "usage": {"total_tokens": 1000, "estimated_cost_usd": cost, "model": "o3-mini"}}
+
+def test_regenerated_digest_is_stamped_and_counted(context, db):
+    """Test that a regenerated digest gets the current prompt version and the job tracks spend."""
+    runner = DigestRegenerationRunner(session_factory=None, generate=lambda ctx: (summary_result(), "openai"),
+                                      estimate=lambda ctx: 0.5)
+    job, digest = make_job(), make_digest()
+
+    assert runner.regenerate_digest(db, job, digest)
+    assert digest.content == "New digest"
+    assert digest.prompt_version == SummarizerInterface.PROMPT_VERSION
+    assert (job.regenerated_count, job.tokens_used, job.spent_usd, job.last_digest_id) == (1, 1000, 0.25, 5)
+
+def test_cost_cap_stops_before_the_call(context, db):
+    """Test that a digest whose estimated cost exceeds the remaining budget is not generated."""
+    generate = Mock()
+    runner = DigestRegenerationRunner(session_factory=None, generate=generate, estimate=lambda ctx: 0.5)
+    job = make_job(spent_usd=0.75)
+
+    assert not runner.regenerate_digest(db, job, make_digest())
+    generate.assert_not_called()
+    assert make_job(cost_cap_usd=None, spent_usd=100.0).budget_allows(0.5)
+
+def test_failures_are_skipped_and_open_circuits_pause(context, db):
+    """Test that a failed digest is skipped on resume while an open circuit stops the job."""
+    def failing(ctx):
+        raise SummaryGenerationError("bad output")
+    runner = DigestRegenerationRunner(session_factory=None, generate=failing, estimate=lambda ctx: 0.1)
+    job, digest = make_job(), make_digest()
+
+    assert runner.regenerate_digest(db, job, digest)
+    assert job.failed_digest_ids == [5] and job.failed_count == 1
+    assert digest.content == "Old digest"
+
+    def circuit_open(ctx):
+        raise CircuitOpenError("openai", retry_after=10.0)
+    runner.generate = circuit_open
+    job = make_job()
+    assert not runner.regenerate_digest(db, job, make_digest())
+    assert job.failed_count == 0
+
+def test_requests_are_paced_to_the_rate_limit():
+    """Test that consecutive requests are spaced by 60 / requests_per_minute seconds."""
+    now = [100.0]
+    sleeps = []
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    runner = DigestRegenerationRunner(session_factory=None, sleep=sleep, clock=lambda: now[0])
+
+    runner._pace(30)
+    now[0] += 0.5
+    runner._pace(30)
+    assert sleeps == [pytest.approx(1.5)]
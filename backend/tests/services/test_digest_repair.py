@@ -0,0 +1,148 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import Mock
+from app.models.digest import Digest as DigestModel
+from app.services import digest_repair
+from app.services.digest_generation import record_processing_log
+from app.services.digest_repair import generation_usage, merge_sections, repair_summary_result, validate_digest
+from app.services.summarizers import OpenAISummarizer, SummarizerInterface, SummaryGenerationError
+
+COMPLETE = """## Concise Summary
+A talk about design systems.
+
+## Target Audience & Value
+**Audience:** Frontend engineers
+
+## Key Takeaways
+- Tokens keep platforms consistent
+
+## Chapter Breakdown
+**[00:00](t=0) | 📌 Introduction**
+* Why design systems matter
+**[05:30](t=330) | 📌 Component Architecture**
+* Primitives and compounds
+
+## Video Highlights ✨
+* **Key Tools Mentioned:** 🛠️ **Figma**"""
+
+CHAPTERS = [{"timestamp": "00:00", "title": "Introduction"}, {"timestamp": "05:30", "title": "Component Architecture"}]
+
+@pytest.fixture(autouse=True)
+def log_buffer(monkeypatch):
+    log_buffer = Mock()
+    monkeypatch.setattr(digest_repair, "processing_log_buffer", log_buffer)
+    monkeypatch.setattr("app.services.digest_generation.processing_log_buffer", log_buffer)
+    return log_buffer
+
+def usage(prompt, completion, cost):
+    return {"prompt_tokens": prompt, "cached_tokens": 0, "completion_tokens": completion,
+            "total_tokens": prompt + completion, "estimated_cost_usd": cost, "model": "o3-mini"}
+
+def test_complete_digest_needs_no_repair():
+    """Test that a digest with every required section and chapter passes validation."""
+    assert validate_digest(COMPLETE, CHAPTERS, "stop") == []
+
+def test_missing_sections_chapters_and_truncation_are_found():
+    """Test that missing sections, left-out chapters and a cut-off ending are all reported."""
+    without_takeaways = COMPLETE.replace("## Key Takeaways\n- Tokens keep platforms consistent\n\n", "")
+    assert validate_digest(without_takeaways, CHAPTERS) == ["Key Takeaways"]
+
+    assert validate_digest(COMPLETE, CHAPTERS + [{"timestamp": "12:15", "title": "Practical Implementation"}]) == ["Chapter Breakdown"]
+
+    truncated = COMPLETE.split("## Video Highlights")[0] + "## Video Highlights ✨\n* **Key Tools"
+    assert validate_digest(truncated, CHAPTERS, "length") == ["Video Highlights"]
+
+def test_merge_keeps_master_order():
+    """Test that repaired sections replace or fill gaps in their master position."""
+    without_takeaways = COMPLETE.replace("## Key Takeaways\n- Tokens keep platforms consistent\n\n", "")
+    merged = merge_sections(without_takeaways, "## Key Takeaways\n- New takeaway")
+
+    assert merged.index("## Target Audience") < merged.index("## Key Takeaways") < merged.index("## Chapter Breakdown")
+    assert "- New takeaway" in merged
+    assert merged.count("## ") == 5
+
+def test_repair_requests_only_needed_sections():
+    """Test that only the missing section is re-requested and its cost is added to the digest's."""
+    summarizer = OpenAISummarizer(client=Mock())
+    summarizer.generate_sections = Mock(return_value={
+        "summary": "## Key Takeaways\n- Repaired takeaway",
+        "usage": usage(1500, 200, 0.002),
+        "finish_reason": "stop"
+    })
+    context = {"video": SimpleNamespace(title="Design", description=None, chapters=CHAPTERS),
+               "transcript_text": "Design systems keep products consistent. " * 20}
+    broken = COMPLETE.replace("## Key Takeaways\n- Tokens keep platforms consistent\n\n", "")
+
+    result = repair_summary_result(summarizer, {"summary": broken, "usage": usage(5000, 3000, 0.03), "finish_reason": "stop"}, context)
+
+    assert summarizer.generate_sections.call_args[0][0] == ["Key Takeaways"]
+    assert "- Repaired takeaway" in result["summary"]
+    assert result["usage"]["total_tokens"] == 9700
+    assert result["usage"]["estimated_cost_usd"] == pytest.approx(0.032)
+    assert result["usage"]["repair"]["sections"] == ["Key Takeaways"]
+
+def test_unstructured_or_failed_repairs_keep_the_original():
+    """Test that mock summaries are not repaired and repair errors keep the original result."""
+    summarizer = OpenAISummarizer(client=Mock())
+    summarizer.generate_sections = Mock(side_effect=SummaryGenerationError("boom"))
+    context = {"video": SimpleNamespace(title="Design", description=None, chapters=None), "transcript_text": "Text."}
+
+    mock_result = {"summary": "This is a mock summary.", "usage": usage(100, 50, 0.0)}
+    assert repair_summary_result(summarizer, mock_result, context) is mock_result
+
+    broken = {"summary": "## Concise Summary\nA talk.\n\n## Key Takeaways\n- One", "usage": usage(100, 50, 0.0)}
+    assert repair_summary_result(summarizer, broken, context) is broken
+    summarizer.generate_sections.assert_called_once()
+
+class GenerateOnlySummarizer(SummarizerInterface):
+    """Summarizer that implements only generate(), like the Google backend."""
+
+    def __init__(self):
+        self.requests = []
+
+    def generate(self, transcript, title=None, description=None, chapters=None, format_type=None, transcript_tokens=None):
+        self.requests.append(transcript)
+        return {"summary": "## Key Takeaways\n- Repaired takeaway", "usage": usage(800, 100, 0.001)}
+
+    def calculate_cost(self, prompt_tokens, completion_tokens):
+        return 0.0
+
+def test_summarizers_without_their_own_repair_go_through_generate():
+    """Test that the default section repair sends the repair prompt through generate()."""
+    summarizer = GenerateOnlySummarizer()
+    context = {"video": SimpleNamespace(title="Design", description=None, chapters=CHAPTERS),
+               "transcript_text": "Design systems keep products consistent. " * 20}
+    broken = COMPLETE.replace("## Key Takeaways\n- Tokens keep platforms consistent\n\n", "")
+
+    result = repair_summary_result(summarizer, {"summary": broken, "usage": usage(5000, 3000, 0.03), "finish_reason": "stop"}, context)
+
+    assert len(summarizer.requests) == 1
+    assert summarizer.requests[0].startswith(SummarizerInterface.SECTION_REPAIR_PROMPT)
+    assert "- ## Key Takeaways" in summarizer.requests[0]
+    assert "- Repaired takeaway" in result["summary"]
+    assert result["usage"]["repair"]["sections"] == ["Key Takeaways"]
+
+def test_repair_call_gets_its_own_processing_log(log_buffer):
+    """Test that a repair is logged as its own call and left out of the generation's row."""
+    summarizer = OpenAISummarizer(client=Mock())
+    summarizer.generate_sections = Mock(return_value={
+        "summary": "## Key Takeaways\n- Repaired takeaway",
+        "usage": usage(1500, 200, 0.002),
+        "finish_reason": "stop"
+    })
+    digest = DigestModel(id=9, video_id=4, llm_id=2, extra_data={})
+    context = {"digest": digest, "video": SimpleNamespace(title="Design", description=None, chapters=CHAPTERS),
+               "transcript_text": "Design systems keep products consistent. " * 20}
+    broken = COMPLETE.replace("## Key Takeaways\n- Tokens keep platforms consistent\n\n", "")
+
+    result = repair_summary_result(summarizer, {"summary": broken, "usage": usage(5000, 3000, 0.03), "finish_reason": "stop"}, context)
+    record_processing_log(digest, datetime.utcnow(), result)
+
+    repair_row, generation_row = [call.kwargs for call in log_buffer.record.call_args_list]
+    assert repair_row["video_id"] == 4 and repair_row["usage"]["total_tokens"] == 1700
+    assert repair_row["request_params"] == {"digest_id": 9, "repair_sections": ["Key Takeaways"]}
+    assert generation_row["usage"]["total_tokens"] == 8000
+    assert generation_row["usage"]["estimated_cost_usd"] == pytest.approx(0.03)
+    assert generation_usage(result["usage"])["prompt_tokens"] == 5000
+
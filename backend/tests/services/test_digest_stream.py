@@ -0,0 +1,208 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from app.api.v1.digests import generate_digest_background
+from app.services.digest_generation import GENERATING, STREAMING, claim_digest, claim_is_fresh
+from app.services.digest_stream import DigestStream, DigestStreamHub, format_sse, relay_digest_stream, text_hash
+
+def collect(agen):
+    """Drain an async generator into a list."""
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+def parse(events):
+    """Return (event, data, id) tuples for the non-comment events."""
+    parsed = []
+    for raw in events:
+        if raw.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in raw.strip().split("\n"))
+        parsed.append((fields["event"], json.loads(fields["data"]), fields.get("id")))
+    return parsed
+
+class FakeHub(DigestStreamHub):
+    """Hub whose persisted state and producer are supplied by the test."""
+
+    def __init__(self, state=None, chunks=None, error=None, content=None, claimable=True):
+        super().__init__(session_factory=None)
+        self.state = state
+        self.chunks = chunks or []
+        self.error = error
+        self.content = content
+        self.claimable = claimable
+        self.started = 0
+
+    def load_state(self, digest_id):
+        return self.state
+
+    def claim(self, digest_id):
+        return self.claimable
+
+    def start(self, digest_id):
+        self.started += 1
+        stream = DigestStream(digest_id)
+        for chunk in self.chunks:
+            stream.append(chunk)
+        stream.finish(error=self.error, content=self.content)
+        self._streams[digest_id] = stream
+        return stream
+
+def test_format_sse():
+    """Test the wire format of an event."""
+    assert format_sse("token", {"text": "hi"}, event_id=2) == 'id: 2\nevent: token\ndata: {"text": "hi"}\n\n'
+    assert format_sse("done", {}) == "event: done\ndata: {}\n\n"
+
+def test_read_from_offset():
+    """Test that readers get only the text after their offset."""
+    stream = DigestStream(1)
+    stream.append("Hello ")
+    stream.append("world")
+    assert stream.read_from(0) == ("Hello world", False, None)
+    assert stream.read_from(6) == ("world", False, None)
+    assert stream.read_from(11) == ("", False, None)
+    stream.finish()
+    assert stream.read_from(11) == ("", True, None)
+
+def test_relay_completed_digest_resumes_from_offset():
+    """Test that a completed digest is replayed from the client's offset without generating."""
+    hub = FakeHub(state={"content": "Hello world", "streamed_hash": text_hash("Hello world"), "partial_content": "", "streaming_elsewhere": False, "error": None})
+    events = parse(collect(relay_digest_stream(1, offset=6, hub=hub)))
+
+    assert events[0] == ("token", {"text": "world"}, "11")
+    assert events[-1][0] == "done"
+    assert hub.started == 0
+
+def test_relay_generates_and_streams():
+    """Test that a pending digest is generated once and streamed to completion."""
+    hub = FakeHub(state={"content": "", "partial_content": "", "streaming_elsewhere": False, "error": None}, chunks=["Sum", "mary"])
+    events = parse(collect(relay_digest_stream(1, generate=True, hub=hub)))
+
+    assert events[0] == ("token", {"text": "Summary"}, "7")
+    assert events[-1] == ("done", {"digest_id": 1, "length": 7}, None)
+    assert hub.started == 1
+
+def test_relay_resets_when_generation_restarts():
+    """Test that a client with an offset is told to discard text when generation starts over."""
+    hub = FakeHub(state={"content": "", "partial_content": "", "streaming_elsewhere": False, "error": None}, chunks=["New"])
+    events = parse(collect(relay_digest_stream(1, offset=4, generate=True, hub=hub)))
+
+    assert [event for event, _, _ in events] == ["reset", "token", "done"]
+
+def test_relay_reports_generation_error():
+    """Test that a failed generation ends the stream with an error event and is not retried."""
+    hub = FakeHub(state={"content": "", "partial_content": "", "streaming_elsewhere": False, "error": None}, error="boom")
+    events = parse(collect(relay_digest_stream(1, generate=True, hub=hub)))
+
+    assert events[-1] == ("error", {"detail": "boom"}, None)
+    assert hub.started == 1
+
+def test_relay_missing_digest():
+    """Test that an unknown digest ends with an error event."""
+    events = parse(collect(relay_digest_stream(1, hub=FakeHub(state=None))))
+    assert events == [("error", {"detail": "Digest not found"}, None)]
+
+def test_relay_does_not_generate_without_opt_in():
+    """Test that an empty or failed digest reports its stored error instead of starting a generation."""
+    hub = FakeHub(state={"content": "", "partial_content": "", "streaming_elsewhere": False, "error": "Rate limited"})
+    events = parse(collect(relay_digest_stream(1, hub=hub)))
+
+    assert events == [("error", {"detail": "Rate limited"}, None)]
+    assert hub.started == 0
+
+def test_relay_does_not_generate_claimed_digest():
+    """Test that a digest claimed by another worker is not generated a second time."""
+    hub = FakeHub(state={"content": "", "partial_content": "", "streaming_elsewhere": False, "error": None}, claimable=False)
+    events = parse(collect(relay_digest_stream(1, generate=True, hub=hub)))
+
+    assert events[-1][0] == "error"
+    assert hub.started == 0
+
+def test_relay_resets_when_stored_digest_differs():
+    """Test that a client whose streamed text was repaired afterwards gets the stored digest in full."""
+    hub = FakeHub(state={"content": "Hello there", "streamed_hash": text_hash("Hello world"), "partial_content": "", "streaming_elsewhere": False, "error": None})
+    events = parse(collect(relay_digest_stream(1, offset=6, hub=hub)))
+
+    assert events == [
+        ("reset", {"digest_id": 1}, None),
+        ("token", {"text": "Hello there"}, "11"),
+        ("done", {"digest_id": 1, "length": 11}, None)
+    ]
+
+def test_relay_sends_repaired_digest_after_stream():
+    """Test that subscribers of a live stream get a reset and the stored digest when repairs changed it."""
+    hub = FakeHub(state={"content": "", "partial_content": "", "streaming_elsewhere": False, "error": None},
+                  chunks=["Draft"], content="Repaired")
+    events = parse(collect(relay_digest_stream(1, generate=True, hub=hub)))
+
+    assert [event for event, _, _ in events] == ["token", "reset", "token", "done"]
+    assert events[2] == ("token", {"text": "Repaired"}, "8")
+
+class SequenceHub(FakeHub):
+    """Hub whose persisted state changes on every read."""
+
+    def __init__(self, states, **kwargs):
+        super().__init__(**kwargs)
+        self.states = list(states)
+
+    def load_state(self, digest_id):
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+def test_stream_attaches_to_background_generation(monkeypatch):
+    """Test that a client asking to generate a digest another worker is generating waits for that result."""
+    monkeypatch.setattr("app.services.digest_stream.settings.DIGEST_STREAM_CHECKPOINT_SECONDS", 0)
+    running = {"content": "", "partial_content": "", "streaming_elsewhere": True, "error": None}
+    hub = SequenceHub([running, running, {"content": "Summary", "partial_content": "", "streaming_elsewhere": False, "error": None}])
+    events = parse(collect(relay_digest_stream(1, generate=True, hub=hub)))
+
+    assert events == [("token", {"text": "Summary"}, "7"), ("done", {"digest_id": 1, "length": 7}, None)]
+    assert hub.started == 0
+
+def test_failed_background_generation_is_not_restarted(monkeypatch):
+    """Test that a stream attached to a generation that fails reports the error instead of generating again."""
+    monkeypatch.setattr("app.services.digest_stream.settings.DIGEST_STREAM_CHECKPOINT_SECONDS", 0)
+    hub = SequenceHub([
+        {"content": "", "partial_content": "", "streaming_elsewhere": True, "error": None},
+        {"content": "", "partial_content": "", "streaming_elsewhere": False, "error": "Rate limited"}
+    ])
+    events = parse(collect(relay_digest_stream(1, generate=True, hub=hub)))
+
+    assert events == [("error", {"detail": "Rate limited"}, None)]
+    assert hub.started == 0
+
+def test_claims_expire_by_kind():
+    """Test that stream claims go stale without checkpoints and background claims after the generation timeout."""
+    a_minute_ago = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+    assert not claim_is_fresh({"status": STREAMING, "checkpoint_at": a_minute_ago})
+    assert claim_is_fresh({"status": GENERATING, "checkpoint_at": a_minute_ago})
+    assert not claim_is_fresh({"status": "done", "length": 7})
+
+def test_claim_is_one_conditional_update():
+    """Test that claiming is a single UPDATE that only matches unclaimed empty digests."""
+    statements = []
+
+    class RecordingSession(Session):
+        def execute(self, statement, *args, **kwargs):
+            statements.append(statement)
+            return Mock(rowcount=1)
+
+        def commit(self):
+            pass
+
+    assert claim_digest(RecordingSession(), 5, GENERATING)
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE digests SET extra_data=")
+    assert "digests.content =" in sql and "CASE WHEN" in sql and "#>>" in sql
+
+def test_background_generation_skips_claimed_digest():
+    """Test that the background task does not call a provider for a digest claimed elsewhere."""
+    with patch("app.api.v1.digests.WorkerSessionLocal"), \
+         patch("app.api.v1.digests.claim_digest", return_value=False) as claim, \
+         patch("app.api.v1.digests.provider_router") as router:
+        asyncio.run(generate_digest_background(5))
+    assert claim.call_args[0][1:] == (5, GENERATING)
+    router.generate.assert_not_called()
+
@@ -0,0 +1,75 @@
+import re
+import time
+from unittest.mock import patch
+from app.services.extractive_selector import MAX_SENTENCE_TOKENS, select_sentences, split_sentences, rank_sentences
+from app.services.summarizers import OpenAISummarizer
+from app.services.tokenizer import count_tokens
+
+def long_transcript(sentences=600):
+    """Transcript where every sentence names its position, with a recurring main topic."""
+    parts = []
+    for i in range(sentences):
+        if i % 3 == 0:
+            parts.append(f"Marker{i} neural networks learn representations from training data.")
+        else:
+            parts.append(f"Marker{i} unrelated aside number {i} about weather{i} and lunch{i}.")
+    return " ".join(parts)
+
+def positions(text):
+    return [int(n) for n in re.findall(r"Marker(\d+)", text)]
+
+def test_split_unpunctuated_captions():
+    """Test that unpunctuated caption runs are split into token-bounded windows."""
+    run = " ".join(f"caption{i}" for i in range(100))
+    sentences = split_sentences(run + ". Short one.")
+
+    assert sentences[-1] == "Short one."
+    assert " ".join(sentences[:-1]) == run + "."
+    assert len(sentences) > 2
+    assert all(count_tokens(sentence) <= MAX_SENTENCE_TOKENS for sentence in sentences)
+
+def test_timeline_buckets_are_sized_in_tokens():
+    """Test that a run of long sentences does not take more than its token share of the timeline."""
+    short = " ".join(f"Marker{i} neural networks learn." for i in range(300))
+    long = " ".join(f"Marker{i} neural networks learn representations from {'training data and ' * 4}more." for i in range(300, 400))
+    selected = select_sentences(short + " " + long, 600)
+
+    # The long sentences hold about half of the tokens, so they get about half of the budget
+    tail = sum(count_tokens(part) for part in re.split(r"(?=Marker)", selected) if positions(part) and positions(part)[0] >= 300)
+    assert tail >= 200
+
+def test_central_sentences_rank_higher():
+    """Test that sentences on the recurring topic outrank one-off asides."""
+    sentences = split_sentences(long_transcript(30))
+    scores = rank_sentences(sentences)
+    assert scores[0] > scores[1]
+    assert scores[3] > scores[4]
+
+def test_selection_fits_budget_and_covers_timeline():
+    """Test that the selection respects the budget and includes content from the end of the video."""
+    text = long_transcript()
+    selected = select_sentences(text, 800)
+
+    assert count_tokens(selected) <= 800
+    # Every tenth of the timeline is represented, including the last one
+    assert {position * 10 // 600 for position in positions(selected)} == set(range(10))
+    assert " ... " in selected
+    assert select_sentences("short text", 800) == "short text"
+
+@patch('app.services.summarizers.openai_summarizer.settings')
+def test_summarizer_uses_extractive_selection(mock_settings):
+    """Test that over-budget transcripts are packed with sentences from the whole video."""
+    mock_settings.TRANSCRIPT_TOKEN_BUDGET = 800
+    mock_settings.TRANSCRIPT_SELECTION = "extractive"
+    summarizer = OpenAISummarizer(client=object())
+
+    packed = summarizer.build_messages(long_transcript())[-1]["content"]
+    assert max(positions(packed)) >= 540
+
+def test_ranking_is_fast():
+    """Test that ranking a 50k-word transcript takes well under a second."""
+    text = " ".join(f"term{(i * 7919) % 5000}" for i in range(50000))
+
+    start = time.perf_counter()
+    rank_sentences(split_sentences(text))
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,71 @@
+import openai
+import pytest
+from fastapi.testclient import TestClient
+from openai import OpenAI
+
+from app.core.config import settings
+from app.services.summarizers.openai_summarizer import OpenAISummarizer
+from scripts.fake_llm_server import FakeLLMConfig, create_app
+
+def fake_client(**config) -> OpenAI:
+    app = create_app(FakeLLMConfig(latency_ms=0, latency_sigma=0, tokens_per_second=0, **config))
+    return OpenAI(api_key="sk-fake", base_url="http://testserver/v1", http_client=TestClient(app), max_retries=0)
+
+@pytest.fixture
+def fake_endpoint(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(settings, "OPENAI_BASE_URL", "http://testserver/v1")
+
+def test_summarizer_runs_against_fake_server(fake_endpoint):
+    """Test that a custom endpoint bypasses the mock response and returns real usage."""
+    summarizer = OpenAISummarizer(client=fake_client(completion_tokens=200))
+    result = summarizer.generate("Some words about testing. " * 50, title="Load Testing 101")
+
+    assert "## Concise Summary" in result["summary"]
+    assert "Load Testing 101" in result["summary"]
+    assert result["usage"]["prompt_tokens"] > 0
+    assert 150 <= result["usage"]["completion_tokens"] <= 250
+
+def test_streaming_matches_non_streaming(fake_endpoint):
+    """Test that streamed chunks join to the same text and report usage."""
+    client = fake_client(completion_tokens=120)
+    messages = [{"role": "user", "content": "Title: Streams"}]
+    full = client.chat.completions.create(model="o3-mini", messages=messages)
+    stream = client.chat.completions.create(
+        model="o3-mini", messages=messages, stream=True, stream_options={"include_usage": True}
+    )
+    chunks = list(stream)
+
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in chunks if chunk.choices)
+    assert text == full.choices[0].message.content
+    assert chunks[-1].usage.completion_tokens == full.usage.completion_tokens
+
+def test_injected_rate_limits_are_seeded():
+    """Test that 429s carry Retry-After and replay identically for the same seed."""
+    def outcomes(seed):
+        client = fake_client(rate_limit_rate=0.5, seed=seed)
+        results = []
+        for _ in range(20):
+            try:
+                client.chat.completions.create(model="o3-mini", messages=[{"role": "user", "content": "hi"}])
+                results.append("ok")
+            except openai.RateLimitError as e:
+                assert e.response.headers["retry-after"] == "1"
+                results.append("429")
+        return results
+
+    first = outcomes(seed=7)
+    assert first == outcomes(seed=7)
+    assert "ok" in first and "429" in first
+
+def test_repeated_prefix_reports_cached_tokens():
+    """Test that a long shared first message is reported as cached on reuse."""
+    client = fake_client(completion_tokens=10)
+    prefix = {"role": "developer", "content": "Instructions. " * 800}
+
+    first = client.chat.completions.create(model="o3-mini", messages=[prefix, {"role": "user", "content": "a"}])
+    second = client.chat.completions.create(model="o3-mini", messages=[prefix, {"role": "user", "content": "b"}])
+
+    assert first.usage.prompt_tokens_details.cached_tokens == 0
+    assert second.usage.prompt_tokens_details.cached_tokens >= 1024
+    assert second.usage.prompt_tokens_details.cached_tokens % 128 == 0
@@ -0,0 +1,47 @@
+import json
+import re
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from app.api.v1.videos import VideoListItem, VideoResponse
+from app.models.digest import Digest as DigestModel
+from app.models.video import Video as VideoModel
+from app.services.list_projections import video_list_options
+
+def list_statement():
+    return select(VideoModel).outerjoin(
+        DigestModel, DigestModel.id == VideoModel.latest_digest_id
+    ).options(*video_list_options())
+
+def test_list_query_skips_large_columns():
+    """Test that video lists select snippets instead of descriptions, chapters and digest bodies."""
+    sql = str(list_statement().compile(dialect=postgresql.dialect()))
+    columns = sql.split("FROM videos")[0]
+    assert not re.search(r", videos\.(description|summary|chapters)[, ]", columns)
+    assert "substr(videos.description" in columns
+    assert "substr(coalesce(digests.content, videos.summary)" in columns
+
+def make_video():
+    now = datetime(2026, 10, 19)
+    video = VideoModel(
+        id=1, youtube_id="abc123", title="A talk", webpage_url="https://youtu.be/abc123", thumbnail="https://i.ytimg.com/x.jpg",
+        duration=3600, view_count=1000, upload_date="20261001", channel_id=1, processed=True,
+        processing_status="COMPLETED", created_at=now, updated_at=now,
+        description="Long description. " * 200, tags=[f"tag{i}" for i in range(15)], categories=["Education"],
+        chapters=[{"title": f"Chapter {i}", "start_time": i * 120, "end_time": (i + 1) * 120} for i in range(30)],
+        summary="Summary sentence of the whole talk. " * 150
+    )
+    video.url, video.thumbnail_url = video.webpage_url, video.thumbnail
+    return video
+
+def test_list_item_is_much_smaller_than_full_response():
+    """Test that a card with 300-character snippets is a fraction of the full video response."""
+    video = make_video()
+    full = len(json.dumps(VideoResponse.model_validate(video).model_dump(mode="json")))
+    video.description_snippet = video.description[:300] + "…"
+    video.summary_snippet = video.summary[:300] + "…"
+    video.has_digest = True
+    item = VideoListItem.model_validate(video).model_dump(mode="json")
+    assert item["description"] == video.description_snippet and item["summary"] == video.summary_snippet
+    assert "chapters" not in item and item["has_digest"] is True
+    assert len(json.dumps(item)) * 8 < full
@@ -99,3 +99,27 @@ def test_rate_limiter():
     # With 10 calls per minute (1 per 6 seconds), 3 calls should take at least 12 seconds
     assert duration >= 0.1  # At least some delay should have occurred
     assert len(limiter.calls) == 3  # Should have recorded all calls
+
+def test_prompt_prefix_is_shared_across_videos():
+    """Test that per-video context stays out of the static prefix so the provider can cache it."""
+    summarizer = OpenAISummarizer(client=object())
+    first = summarizer.build_messages("first transcript", title="First", chapters=[{"timestamp": "00:00", "title": "Intro"}])
+    second = summarizer.build_messages("second transcript", title="Second", description="Other video")
+
+    assert first[0] == second[0]
+    assert "{" not in first[0]["content"].split("<Task>")[1]
+    assert "Title: First" in first[1]["content"]
+    assert "- 00:00: Intro" in first[1]["content"]
+    assert "Chapters:\nNone" in second[1]["content"]
+
+def test_cached_tokens_are_priced_and_recorded():
+    """Test that cached prompt tokens are read from the usage details and billed at the cached rate."""
+    summarizer = OpenAISummarizer(client=object())
+    usage = Mock(prompt_tokens=2000, completion_tokens=100, total_tokens=2100,
+                 prompt_tokens_details=Mock(cached_tokens=1536))
+
+    result = summarizer._usage_from_response(usage, "o3-mini")
+
+    assert result["cached_tokens"] == 1536
+    assert result["estimated_cost_usd"] == pytest.approx(summarizer.calculate_cost(2000, 100, cached_tokens=1536))
+    assert result["estimated_cost_usd"] < summarizer.calculate_cost(2000, 100)
@@ -0,0 +1,83 @@
+import asyncio
+import random
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.database import SyncSessionAdapter
+from app.models.video import Video as VideoModel
+from app.services.pagination import (
+    VIDEO_SORT_KEYS,
+    InvalidCursorError,
+    SortKey,
+    encode_cursor,
+    fetch_page,
+    keyset_page,
+    total_count
+)
+
+Base = declarative_base()
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, nullable=False)
+    score = Column(Integer, nullable=True)
+
+SORT_KEYS = {"score": SortKey(Item.score, null_value=-1), "id": SortKey(Item.id)}
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(3)
+    session.add_all([
+        Item(id=i, group_id=i % 3, score=rng.choice([None, 1, 2, 3, rng.randint(0, 100)]))
+        for i in range(1, 201)
+    ])
+    session.commit()
+    yield SyncSessionAdapter(session)
+    session.close()
+
+def read_all(db, order, limit, criteria=()):
+    async def run():
+        rows, cursor, pages = [], None, 0
+        while True:
+            page, cursor = await fetch_page(db, select(Item).where(*criteria), Item.id, SORT_KEYS, "score", order, limit, cursor)
+            rows.extend(page)
+            pages += 1
+            if cursor is None:
+                return rows, pages
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_every_row_once_in_order(db, order):
+    """Test that following cursors returns every row exactly once, sorted with NULLs as the sentinel."""
+    rows, pages = read_all(db, order, limit=7)
+    keys = [(-1 if row.score is None else row.score, row.id) for row in rows]
+    assert len(rows) == 200 and len({row.id for row in rows}) == 200
+    assert keys == sorted(keys, reverse=(order == "desc"))
+    assert pages == 29
+
+def test_filtered_pages_and_exact_count(db):
+    """Test that criteria restrict both the pages and the total, which is exact off PostgreSQL."""
+    rows, _ = read_all(db, "asc", limit=10, criteria=[Item.group_id == 1])
+    assert {row.group_id for row in rows} == {1} and len(rows) == 67
+    assert asyncio.run(total_count(db, Item.__table__, Item.group_id == 1)) == (67, False)
+    assert asyncio.run(total_count(db, Item.__table__)) == (200, False)
+
+def test_rejects_foreign_or_malformed_cursors(db):
+    """Test that a cursor from another sort order, a broken cursor or an unknown sort key is refused."""
+    other_order = encode_cursor("score", "desc", 5, 10)
+    for sort, cursor in (("score", other_order), ("score", "not-a-cursor"), ("views", None)):
+        with pytest.raises(InvalidCursorError):
+            asyncio.run(fetch_page(db, select(Item), Item.id, SORT_KEYS, sort, "asc", 10, cursor))
+
+def test_video_sort_matches_expression_index():
+    """Test that nullable sort keys render the same inline COALESCE as their index."""
+    statement = keyset_page(select(VideoModel.id), VideoModel.id, VIDEO_SORT_KEYS["view_count"], "desc", 20, after=(5, 10))
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True}))
+    assert "coalesce(videos.view_count, -1), videos.id) < (" in sql
+    assert "ORDER BY coalesce(videos.view_count, -1) DESC, videos.id DESC" in sql
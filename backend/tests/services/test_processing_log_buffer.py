@@ -0,0 +1,139 @@
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.models.processing_log import RequestType
+import app.services.processing_log_buffer as buffer_module
+from app.services.processing_log_buffer import ProcessingLogBuffer, log_processing
+
+class RecordingBuffer(ProcessingLogBuffer):
+    """Buffer that keeps inserted batches in memory and can simulate a database outage."""
+
+    def __init__(self, **kwargs):
+        super().__init__(session_factory=None, flush_interval=3600, **kwargs)
+        self.batches = []
+        self.available = True
+        self.invalid_video_ids = set()
+
+    def _insert(self, batch):
+        if not self.available:
+            raise OperationalError("INSERT INTO processing_logs", {}, Exception("database unavailable"))
+        if any(row["video_id"] in self.invalid_video_ids for row in batch):
+            raise IntegrityError("INSERT INTO processing_logs", {}, Exception("violates foreign key constraint"))
+        self.batches.append(batch)
+
+def record(buffer, count):
+    for i in range(count):
+        buffer.record(RequestType.SUMMARIZE, datetime.utcnow(), video_id=i, usage={"total_tokens": 10, "estimated_cost_usd": 0.01})
+
+def test_rows_are_written_in_batches():
+    """Test that a flush writes pending rows in batches of batch_size."""
+    buffer = RecordingBuffer(batch_size=4)
+    record(buffer, 10)
+
+    assert buffer.flush() == 10
+    assert [len(batch) for batch in buffer.batches] == [4, 4, 2]
+    assert [row["video_id"] for batch in buffer.batches for row in batch] == list(range(10))
+    assert buffer.batches[0][0]["tokens_used"] == 10
+    assert buffer.snapshot()["pending"] == 0
+    buffer.shutdown(timeout=1)
+
+def test_failed_flush_keeps_rows_within_the_bound():
+    """Test that rows survive a failed insert up to max_pending, dropping the oldest beyond it."""
+    buffer = RecordingBuffer(batch_size=100, max_pending=5)
+    buffer.available = False
+    record(buffer, 7)
+
+    assert buffer.flush() == 0
+    snapshot = buffer.snapshot()
+    assert snapshot["pending"] == 5 and snapshot["dropped"] == 2
+
+    buffer.available = True
+    assert buffer.flush() == 5
+    assert [row["video_id"] for row in buffer.batches[0]] == [2, 3, 4, 5, 6]
+    buffer.shutdown(timeout=1)
+
+def test_shutdown_flushes_and_reports_losses():
+    """Test that shutdown writes what it can and counts the rest as lost."""
+    buffer = RecordingBuffer(batch_size=100)
+    record(buffer, 3)
+    assert buffer.shutdown(timeout=1) == 0
+    assert sum(len(batch) for batch in buffer.batches) == 3
+
+    down = RecordingBuffer(batch_size=100)
+    record(down, 3)
+    down.available = False
+    assert down.shutdown(timeout=1) == 3
+    record(down, 1)
+    assert down.snapshot() == {"pending": 0, "written": 0, "dropped": 4, "rejected": 0, "flushes": 0}
+
+def test_insert_is_one_multi_row_statement(monkeypatch):
+    """Test that a batch is written with a single INSERT ... VALUES statement and folded into the rollups."""
+    apply_to_rollups = Mock()
+    monkeypatch.setattr(buffer_module, "apply_to_rollups", apply_to_rollups)
+    session = Mock()
+    buffer = ProcessingLogBuffer(session_factory=lambda: session, flush_interval=3600)
+    record(buffer, 3)
+    buffer.flush()
+
+    statement = session.execute.call_args[0][0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO processing_logs")
+    assert sql.count("), (") == 2
+    apply_to_rollups.assert_called_once()
+    assert len(apply_to_rollups.call_args[0][1]) == 3
+    session.commit.assert_called_once()
+    buffer.shutdown(timeout=1)
+
+def test_track_records_errors():
+    """Test that tracked blocks are logged with their duration and exception."""
+    buffer = RecordingBuffer()
+    with pytest.raises(ValueError):
+        with buffer.track(RequestType.EXTRACT_TRANSCRIPT, url="https://youtu.be/x"):
+            raise ValueError("no subtitles")
+    buffer.flush()
+
+    row = buffer.batches[0][0]
+    assert row["request_type"] == RequestType.EXTRACT_TRANSCRIPT
+    assert row["error_details"] == {"message": "no subtitles"}
+    assert row["request_params"] == {"url": "https://youtu.be/x"}
+    buffer.shutdown(timeout=1)
+
+def test_rejected_rows_are_dropped_without_blocking_others():
+    """Test that a batch rejected for one bad row is written row by row and only that row is dropped."""
+    buffer = RecordingBuffer(batch_size=3)
+    buffer.invalid_video_ids = {1}
+    record(buffer, 5)
+
+    assert buffer.flush() == 4
+    assert [row["video_id"] for batch in buffer.batches for row in batch] == [0, 2, 3, 4]
+    snapshot = buffer.snapshot()
+    assert snapshot["pending"] == 0 and snapshot["dropped"] == 1 and snapshot["rejected"] == 1
+    assert buffer.flush() == 0
+    buffer.shutdown(timeout=1)
+
+def test_log_processing_records_the_url_argument(monkeypatch):
+    """Test that the decorator logs the url parameter of methods, static methods and keyword calls."""
+    buffer = RecordingBuffer(batch_size=100)
+    monkeypatch.setattr(buffer_module, "processing_log_buffer", buffer)
+
+    class Extractor:
+        @log_processing(RequestType.EXTRACT_METADATA)
+        def extract(self, url, retries=1):
+            return {}
+
+        @staticmethod
+        @log_processing(RequestType.EXTRACT_TRANSCRIPT)
+        def transcript(url, language="en"):
+            return {}
+
+    Extractor().extract("https://youtu.be/a", 3)
+    Extractor.transcript("https://youtu.be/b", "de")
+    Extractor().extract(url="https://youtu.be/c")
+
+    buffer.flush()
+    assert [row["request_params"]["url"] for row in buffer.batches[0]] == [
+        "https://youtu.be/a", "https://youtu.be/b", "https://youtu.be/c"
+    ]
+    buffer.shutdown(timeout=1)
@@ -0,0 +1,120 @@
+import asyncio
+import random
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+from sqlalchemy.orm import sessionmaker
+from app.api.v1.llms import ProcessingLogCreate, create_processing_log
+from app.models.processing_log import RequestType
+from app.models.processing_rollup import RollupGranularity
+from app.services.latency_sketch import LatencySketch
+from app.services.processing_rollups import aggregate_logs, bucket_start, merge_rollups
+
+def log_row(started_at, duration_ms, llm_id=1, video_id=10, request_type=RequestType.SUMMARIZE, error=None):
+    return {"video_id": video_id, "llm_id": llm_id, "request_type": request_type, "tokens_used": 100,
+            "input_tokens": 80, "output_tokens": 20, "cached_tokens": 0, "cost_estimate": 0.01,
+            "duration_ms": duration_ms, "started_at": started_at, "error_details": {"message": error} if error else None}
+
+def as_rollups(deltas, granularity):
+    """Turn aggregated deltas into rollup-like rows of one granularity."""
+    return [SimpleNamespace(bucket_start=key[1], llm_id=key[2], request_type=key[3], channel_id=key[4],
+                            **{k: v for k, v in delta.items() if k != "duration_sketch"},
+                            duration_sketch=delta["duration_sketch"].to_dict())
+            for key, delta in deltas.items() if key[0] == granularity]
+
+def test_sketch_quantiles_are_within_relative_accuracy():
+    """Test that sketch quantiles stay within the relative accuracy of the exact ones."""
+    rng = random.Random(7)
+    values = [rng.lognormvariate(7, 1) for _ in range(5000)]
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+
+    ordered = sorted(values)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=sketch.relative_accuracy * 1.05)
+    assert LatencySketch().quantile(0.5) is None
+
+def test_merged_sketches_equal_one_sketch_over_all_values():
+    """Test that merging sketches gives the same result as counting everything in one."""
+    first, second, combined = LatencySketch(), LatencySketch(), LatencySketch()
+    for i, value in enumerate(range(0, 3000, 7)):
+        (first if i % 2 else second).add(value)
+        combined.add(value)
+    first.merge(LatencySketch.from_dict(second.to_dict()))
+
+    assert first.to_dict() == combined.to_dict()
+    with pytest.raises(ValueError):
+        first.merge(LatencySketch(0.05))
+
+def test_logs_are_aggregated_per_bucket_and_dimension():
+    """Test that logs land in hourly and daily buckets per LLM, request type and channel."""
+    start = datetime(2026, 10, 19, 9, 15)
+    rows = [
+        log_row(start, 1000),
+        log_row(start + timedelta(minutes=30), 3000, error="timeout"),
+        log_row(start + timedelta(hours=1), 2000),
+        log_row(start, 400, llm_id=None, video_id=None, request_type=RequestType.EXTRACT_METADATA),
+    ]
+    deltas = aggregate_logs(rows, {10: 5})
+
+    hour = deltas[(RollupGranularity.HOUR, datetime(2026, 10, 19, 9, tzinfo=timezone.utc), 1, RequestType.SUMMARIZE, 5)]
+    assert hour["request_count"] == 2 and hour["error_count"] == 1
+    assert hour["duration_ms_total"] == 4000 and hour["cost_estimate"] == pytest.approx(0.02)
+
+    day = deltas[(RollupGranularity.DAY, datetime(2026, 10, 19, tzinfo=timezone.utc), 1, RequestType.SUMMARIZE, 5)]
+    assert day["request_count"] == 3 and day["tokens_used"] == 300
+    assert (RollupGranularity.DAY, datetime(2026, 10, 19, tzinfo=timezone.utc), 0, RequestType.EXTRACT_METADATA, 0) in deltas
+    assert len(deltas) == 5
+
+def test_buckets_are_absolute_utc_instants():
+    """Test that naive (UTC) and aware timestamps of the same instant share one aware UTC bucket."""
+    naive = datetime(2026, 10, 19, 23, 40)
+    aware = datetime(2026, 10, 20, 1, 40, tzinfo=timezone(timedelta(hours=2)))
+
+    for granularity in RollupGranularity:
+        assert bucket_start(naive, granularity) == bucket_start(aware, granularity)
+        assert bucket_start(aware, granularity).tzinfo == timezone.utc
+    assert bucket_start(aware, RollupGranularity.DAY) == datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+def test_merging_hourly_rollups_matches_the_daily_rollup():
+    """Test that grouping merges rollups and hourly buckets add up to the daily one."""
+    rng = random.Random(3)
+    start = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    rows = [log_row(start + timedelta(minutes=rng.randrange(24 * 60)), rng.randrange(200, 20000),
+                    llm_id=rng.choice([1, 2]), video_id=rng.choice([10, 11]))
+            for _ in range(500)]
+    deltas = aggregate_logs(rows, {10: 5, 11: 6})
+
+    by_llm = merge_rollups(as_rollups(deltas, RollupGranularity.DAY), ["llm"])
+    assert [result["llm_id"] for result in by_llm] == [1, 2]
+    assert by_llm[0]["channel_id"] is None
+    assert sum(result["request_count"] for result in by_llm) == 500
+
+    daily = merge_rollups(as_rollups(deltas, RollupGranularity.DAY))[0]
+    hourly = merge_rollups([
+        SimpleNamespace(**{**vars(rollup), "bucket_start": start}) for rollup in as_rollups(deltas, RollupGranularity.HOUR)
+    ])[0]
+    assert hourly.pop("cost_estimate") == pytest.approx(daily.pop("cost_estimate"))
+    assert hourly == daily
+    exact = sorted(row["duration_ms"] for row in rows)[int(0.95 * 499)]
+    assert daily["p95_duration_ms"] == pytest.approx(exact, rel=0.03)
+    assert daily["avg_duration_ms"] == pytest.approx(sum(row["duration_ms"] for row in rows) / 500)
+
+def test_created_log_is_stored_and_rolled_up_as_written(sqlite_engine):
+    """Test that a log created through the API keeps its cached tokens and is rolled up from the stored row."""
+    db = sessionmaker(bind=sqlite_engine)()
+    log = ProcessingLogCreate(video_id=10, llm_id=1, request_type="summarize", tokens_used=100,
+                              cost_estimate=0.01, input_tokens=80, output_tokens=20, cached_tokens=64,
+                              duration_ms=1200, started_at=datetime(2026, 1, 1, 12, 30))
+    with patch("app.api.v1.llms.apply_to_rollups") as apply_to_rollups:
+        created = asyncio.run(create_processing_log(log, db=db))
+
+    assert created.cached_tokens == 64
+    rows = apply_to_rollups.call_args[0][1]
+    assert rows[0]["id"] == created.id and rows[0]["cached_tokens"] == 64
+    assert rows[0]["request_type"] == RequestType.SUMMARIZE
+    db.close()
+
@@ -0,0 +1,51 @@
+from unittest.mock import Mock, patch
+from app.services.provider_registry import ProviderRegistry
+from app.services.summarizers import OpenAISummarizer, GoogleAISummarizer
+from app.services.video_processor import VideoProcessor
+
+def test_summarizer_is_reused():
+    """Test that the registry returns the same summarizer and client for repeated calls."""
+    registry = ProviderRegistry()
+    first = registry.get_summarizer("openai")
+    second = registry.get_summarizer("OpenAI")
+
+    assert isinstance(first, OpenAISummarizer)
+    assert first is second
+    assert first.client is registry.get_client("openai")
+
+def test_clients_are_per_model():
+    """Test that each model gets its own long-lived client."""
+    registry = ProviderRegistry()
+    default_summarizer = registry.get_summarizer("openai")
+    other_summarizer = registry.get_summarizer("openai", "gpt-4o-mini")
+
+    assert default_summarizer is not other_summarizer
+    assert other_summarizer.model == "gpt-4o-mini"
+    assert registry.get_client("openai") is not registry.get_client("openai", "gpt-4o-mini")
+
+def test_google_summarizer_is_cached():
+    """Test that non-client providers are cached as well."""
+    registry = ProviderRegistry()
+    assert isinstance(registry.get_summarizer("google"), GoogleAISummarizer)
+    assert registry.get_summarizer("google") is registry.get_summarizer("google")
+
+def test_shutdown_closes_clients():
+    """Test that shutdown closes clients and later calls build fresh ones."""
+    registry = ProviderRegistry()
+    client = Mock()
+    with patch.object(registry, "_build_openai_client", return_value=client):
+        summarizer = registry.get_summarizer("openai")
+        registry.shutdown()
+
+    client.close.assert_called_once()
+    assert registry.get_summarizer("openai") is not summarizer
+
+def test_video_processor_builds_summarizer_lazily():
+    """Test that metadata-only paths never construct a summarizer."""
+    with patch("app.services.video_processor.provider_registry") as mock_registry:
+        processor = VideoProcessor()
+        mock_registry.get_summarizer.assert_not_called()
+
+        summarizer = processor.summarizer
+        assert summarizer is processor.summarizer
+        mock_registry.get_summarizer.assert_called_once_with("openai")
@@ -0,0 +1,164 @@
+import logging
+import time
+import pytest
+from unittest.mock import Mock
+from app.services.provider_router import ProviderRouter, LatencyTracker, parse_backends, should_fail_over
+from app.services.summarizers import SummaryGenerationError
+
+class FakeSummarizer:
+    """Summarizer that sleeps, then answers or fails."""
+
+    def __init__(self, name, delay=0.0, fail=False, error=None):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.error = error
+        self.calls = 0
+
+    def generate(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return {"summary": self.name, "usage": {"total_tokens": 10, "estimated_cost_usd": 0.01}}
+
+@pytest.fixture(autouse=True)
+def log_buffer(monkeypatch):
+    log_buffer = Mock()
+    monkeypatch.setattr("app.services.provider_router.processing_log_buffer", log_buffer)
+    return log_buffer
+
+def make_router(summarizers, **kwargs):
+    backends = [(name, None) for name in summarizers]
+    return ProviderRouter(backends, summarizer_for=lambda provider, model: summarizers[provider], **kwargs)
+
+def test_parse_backends():
+    assert parse_backends("openai:o3-mini, Google ,") == [("openai", "o3-mini"), ("google", None)]
+
+def test_latency_percentiles():
+    """Test rolling percentiles and error rate."""
+    tracker = LatencyTracker()
+    for seconds in [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]:
+        tracker.record(seconds, ok=True)
+    tracker.record(30, ok=False)
+
+    assert tracker.percentile(0.5) == 6
+    assert tracker.percentile(0.95) == 10
+    assert tracker.error_rate == pytest.approx(1 / 11)
+
+def test_prefers_faster_backend():
+    """Test that the backend with the lower p95 is ranked first once it is measured."""
+    router = make_router({"slow": FakeSummarizer("slow"), "fast": FakeSummarizer("fast")})
+    for _ in range(5):
+        router.record(("slow", None), 3.0, ok=True)
+        router.record(("fast", None), 1.0, ok=True)
+
+    assert router.ranked()[0] == ("fast", None)
+    # A preferred provider leads while it is healthy
+    assert router.ranked(preferred="slow")[0] == ("slow", None)
+
+def test_fails_over_and_demotes_unhealthy_backend():
+    """Test that failures fall through to the next backend and mark the failing one unhealthy."""
+    broken = FakeSummarizer("openai", fail=True)
+    backup = FakeSummarizer("google")
+    router = make_router({"openai": broken, "google": backup})
+
+    for _ in range(5):
+        result, backend = router.generate(preferred="openai")
+        assert result["summary"] == "google"
+
+    assert not router.is_healthy(("openai", None))
+    assert router.ranked(preferred="openai")[0] == ("google", None)
+
+    router.generate(preferred="openai")
+    assert broken.calls == 5
+
+def test_hedged_request_takes_first_answer():
+    """Test that a request slower than the primary's p95 is hedged to another backend."""
+    slow = FakeSummarizer("slow", delay=0.5)
+    fast = FakeSummarizer("fast")
+    router = make_router({"slow": slow, "fast": fast}, hedging=True)
+    for _ in range(5):
+        router.record(("slow", None), 0.05, ok=True)
+        router.record(("fast", None), 0.1, ok=True)
+
+    start = time.monotonic()
+    result, backend = router.generate()
+    elapsed = time.monotonic() - start
+    router.shutdown()
+
+    assert backend == ("fast", None)
+    assert result["summary"] == "fast"
+    assert elapsed < 0.4
+
+def test_all_backends_failing_raises():
+    router = make_router({"a": FakeSummarizer("a", fail=True), "b": FakeSummarizer("b", fail=True)}, hedging=True)
+    with pytest.raises(SummaryGenerationError):
+        router.generate()
+    router.shutdown()
+
+def test_fails_over_only_on_provider_errors():
+    """Test that errors caused by the request are raised instead of being sent to every backend."""
+    try:
+        try:
+            raise ConnectionError("reset")
+        except ConnectionError:
+            raise SummaryGenerationError("Failed to generate summary: reset")
+    except SummaryGenerationError as wrapped:
+        assert should_fail_over(wrapped)
+    assert not should_fail_over(SummaryGenerationError("Invalid input: empty transcript"))
+
+    bad_request = FakeSummarizer("openai", error=SummaryGenerationError("Invalid input: empty transcript"))
+    backup = FakeSummarizer("google")
+    router = make_router({"openai": bad_request, "google": backup})
+    with pytest.raises(SummaryGenerationError, match="Invalid input"):
+        router.generate(preferred="openai")
+    assert backup.calls == 0
+
+def test_request_errors_do_not_mark_backend_unhealthy():
+    """Test that errors caused by the request leave the backend's health stats untouched."""
+    bad_request = FakeSummarizer("openai", error=SummaryGenerationError("Invalid input: empty transcript"))
+    router = make_router({"openai": bad_request})
+    for _ in range(5):
+        with pytest.raises(SummaryGenerationError):
+            router.generate(preferred="openai")
+
+    tracker = router.trackers[("openai", None)]
+    assert tracker.sample_count == 0
+    assert router.is_healthy(("openai", None))
+
+def test_single_backend_is_not_hedged():
+    """Test that hedging never sends a second request to the only backend."""
+    only = FakeSummarizer("only", delay=0.2)
+    router = make_router({"only": only}, hedging=True)
+    for _ in range(5):
+        router.record(("only", None), 0.01, ok=True)
+
+    result, backend = router.generate()
+    router.shutdown()
+    assert result["summary"] == "only" and only.calls == 1
+
+def test_losing_hedge_usage_is_logged(caplog, log_buffer):
+    """Test that the usage of a hedged request that lost the race is logged when it finishes."""
+    slow = FakeSummarizer("slow", delay=0.3)
+    router = make_router({"slow": slow, "fast": FakeSummarizer("fast")}, hedging=True)
+    for _ in range(5):
+        router.record(("slow", None), 0.05, ok=True)
+        router.record(("fast", None), 0.1, ok=True)
+
+    with caplog.at_level(logging.INFO, logger="app.services.provider_router"):
+        result, backend = router.generate(video_id=3, digest_id=7)
+        assert backend == ("fast", None)
+        router.executor.shutdown(wait=True)
+    assert "Discarded hedged answer from slow: 10 tokens" in caplog.text
+
+    # The losing call was billed, so it gets its own processing log row
+    rows = [call.kwargs for call in log_buffer.record.call_args_list if call.kwargs["video_id"] == 3]
+    assert len(rows) == 1
+    kwargs = rows[0]
+    assert kwargs["video_id"] == 3
+    assert kwargs["usage"]["total_tokens"] == 10
+    assert kwargs["request_params"] == {"digest_id": 7, "backend": "slow", "hedge": "discarded"}
+
@@ -0,0 +1,96 @@
+import httpx
+import openai
+import pytest
+from unittest.mock import MagicMock, Mock, patch
+from app.services.summarizers import OpenAISummarizer, CircuitOpenError, SummaryGenerationError
+from app.services.summarizers.resilience import CircuitBreaker, RetryBudget, is_retryable
+
+def status_error(cls, status_code):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return cls("error", response=httpx.Response(status_code, request=request), body=None)
+
+def test_error_classification():
+    """Test that transient provider errors are retryable and request errors are not."""
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    assert is_retryable(openai.APITimeoutError(request=request))
+    assert is_retryable(status_error(openai.RateLimitError, 429))
+    assert is_retryable(status_error(openai.InternalServerError, 503))
+    assert not is_retryable(status_error(openai.BadRequestError, 400))
+    assert not is_retryable(status_error(openai.AuthenticationError, 401))
+    assert not is_retryable(ValueError("bad input"))
+
+def test_retry_budget_limits_retries():
+    """Test that retries are capped at a fraction of requests."""
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, max_tokens=1.0)
+    # Starts empty: no retries until requests have paid for them
+    assert not budget.try_spend()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    for _ in range(10):
+        budget.record_request()
+    assert budget.snapshot()["available"] == 1.0
+    assert budget.snapshot()["rejected"] == 2
+
+def test_circuit_opens_and_recovers():
+    """Test closed -> open -> half-open -> closed transitions."""
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.0)
+    failure = status_error(openai.InternalServerError, 500)
+
+    breaker.record_failure(status_error(openai.BadRequestError, 400))
+    breaker.record_failure(failure)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(failure)
+    assert breaker.snapshot()["times_opened"] == 1
+
+    # Zero reset timeout: the next check is half-open and admits one trial call
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_permanent_errors_are_not_retried():
+    """Test that a bad request is attempted once, with no backoff."""
+    client = Mock()
+    client.chat.completions.create.side_effect = status_error(openai.BadRequestError, 400)
+    summarizer = OpenAISummarizer(client=client)
+
+    with patch("app.services.summarizers.openai_summarizer.get_circuit_breaker", return_value=CircuitBreaker("test")):
+        with pytest.raises(openai.BadRequestError):
+            summarizer._call_openai_api([{"role": "user", "content": "hi"}])
+    assert client.chat.completions.create.call_count == 1
+
+def test_open_circuit_fails_fast():
+    """Test that an open circuit rejects calls without reaching the provider."""
+    client = Mock()
+    summarizer = OpenAISummarizer(client=client)
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure(status_error(openai.InternalServerError, 500))
+
+    with patch("app.services.summarizers.openai_summarizer.get_circuit_breaker", return_value=breaker), \
+         patch("app.services.summarizers.openai_summarizer.settings") as mock_settings:
+        mock_settings.OPENAI_API_KEY = "test_key"
+        mock_settings.TRANSCRIPT_TOKEN_BUDGET = 4000
+        with pytest.raises(CircuitOpenError) as error:
+            summarizer.generate("A transcript")
+    assert error.value.retry_after > 0
+    client.chat.completions.create.assert_not_called()
+
+def test_retries_are_rate_limited():
+    """Test that each attempt, retries included, goes through the rate limiter."""
+    client = Mock()
+    client.chat.completions.create.side_effect = [status_error(openai.InternalServerError, 500), Mock(model="o3-mini")]
+    summarizer = OpenAISummarizer(client=client)
+    summarizer.rate_limiter = MagicMock()
+    budget = RetryBudget(ratio=1.0, min_per_second=0.0)
+
+    with patch("app.services.summarizers.openai_summarizer.get_circuit_breaker", return_value=CircuitBreaker("test")), \
+         patch("app.services.summarizers.resilience.retry_budget", budget), \
+         patch("app.services.summarizers.openai_summarizer.retry_budget", budget), \
+         patch("tenacity.nap.time.sleep"):
+        summarizer._call_openai_api([{"role": "user", "content": "hi"}])
+    assert client.chat.completions.create.call_count == 2
+    assert summarizer.rate_limiter.__enter__.call_count == 2
+
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+from app.core.config import settings
+from app.models import Digest, Transcript, Video
+from app.services.search import SEARCH_SOURCES, search_statement, source_hits, parse_query
+
+def compile_sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+def test_search_vectors_are_generated_and_never_loaded():
+    """Test that the search vectors are database-generated columns left out of the ORM mappings."""
+    for model in (Video, Transcript, Digest):
+        column = model.__table__.c.search_vector
+        assert column.computed is not None and column.computed.persisted
+        assert "search_vector" not in inspect(model).columns
+        assert any(index.columns.contains_column(column) and index.dialect_options["postgresql"]["using"] == "gin"
+                   for index in model.__table__.indexes)
+
+def test_video_vector_weighs_title_above_description():
+    """Test that video titles are indexed with weight A and descriptions with weight B."""
+    expression = str(Video.__table__.c.search_vector.computed.sqltext)
+    assert "coalesce(title, '')), 'A')" in expression
+    assert "coalesce(description, '')), 'B')" in expression
+
+def test_search_restricted_to_sources():
+    """Test that only the requested sources are queried, through their vector's match operator."""
+    sql = compile_sql(search_statement("python", sources=["digests"]))
+    assert "digests.search_vector @@ websearch_to_tsquery" in sql
+    assert "transcripts" not in sql and "videos.search_vector" not in sql
+
+    sql = compile_sql(search_statement("python"))
+    for name in SEARCH_SOURCES:
+        assert f"{name}.search_vector @@ websearch_to_tsquery" in sql
+
+def test_unknown_source_is_rejected():
+    """Test that an unknown source raises ValueError."""
+    with pytest.raises(ValueError, match="Unknown search source"):
+        search_statement("python", sources=["comments"])
+
+def test_candidates_are_the_best_ranked_matches():
+    """Test that the capped candidates are chosen by ts_rank and re-ranked with ts_rank_cd."""
+    statement = source_hits("transcripts", parse_query("python"), limit=5, candidates=100)
+    assert statement._limit == 5
+    assert "ts_rank_cd" in compile_sql(statement) and "ts_headline" not in compile_sql(statement)
+    matches = statement.get_final_froms()[0].element
+    assert matches._limit == 100
+    assert compile_sql(matches).split("ORDER BY")[1].lstrip().startswith("ts_rank(transcripts.search_vector")
+
+def test_headlines_are_cut_for_the_returned_page_only():
+    """Test that headlines are computed after the final limit, from a bounded prefix of each text."""
+    statement = search_statement("python", limit=5)
+    hits = statement.get_final_froms()[0].left.element
+    assert hits._limit == 5
+    assert "ts_headline" not in compile_sql(hits)
+
+    sql = compile_sql(statement)
+    assert sql.count("ts_headline(") == 3
+    assert "substr(transcripts.content" in sql
+    assert settings.SEARCH_HEADLINE_CHARS in statement.compile(dialect=postgresql.dialect()).params.values()
+    assert "LIMIT" not in sql.rsplit("AS anon_1", 1)[1]
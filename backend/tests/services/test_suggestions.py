@@ -0,0 +1,44 @@
+from sqlalchemy.dialects import postgresql
+from app.services.suggestions import escape_like, source_suggestions, suggest_statement
+
+def compiled(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+def match_pattern(statement):
+    return next(value for key, value in compiled(statement).params.items()
+                if key.startswith(("title_", "name_")) and isinstance(value, str))
+
+def test_wildcards_in_input_match_literally():
+    """Test that LIKE wildcards typed by the user are escaped."""
+    assert escape_like("100%_off\\") == "100\\%\\_off\\\\"
+    assert match_pattern(source_suggestions("titles", "50%", 5, 100)) == "%50\\%%"
+
+def test_short_input_matches_prefixes_only():
+    """Test that input under three characters is matched as a prefix, longer input anywhere."""
+    assert match_pattern(source_suggestions("channels", "py", 5, 100)) == "py%"
+    assert match_pattern(source_suggestions("channels", "pyt", 5, 100)) == "%pyt%"
+
+def test_suggestions_are_bounded_per_kind():
+    """Test that each kind orders a capped set of matches and returns at most limit of them."""
+    sql = str(compiled(source_suggestions("tags", "python", 7, 150)))
+    assert "tags.name ILIKE" in sql and "tags.video_count >" in sql
+    params = compiled(source_suggestions("tags", "python", 7, 150)).params
+    assert 150 in params.values() and 7 in params.values()
+    assert "similarity(" in sql and "DESC NULLS LAST" in sql
+
+def test_all_kinds_in_one_statement():
+    """Test that titles, channels and tags are looked up in one round trip, in order per kind."""
+    sql = str(compiled(suggest_statement("  python  ")))
+    assert sql.count("UNION ALL") == 2
+    assert "videos.title ILIKE" in sql and "channels.name ILIKE" in sql
+    assert sql.rstrip().endswith("ORDER BY anon_1.source, anon_1.position")
+    assert "python" in compiled(suggest_statement("  python  ")).params.values()
+
+def test_prefix_and_popular_matches_are_kept_as_candidates():
+    """Test that matches are ordered prefix first, then by popularity, before they are capped."""
+    matches = source_suggestions("titles", "python", 5, 100).get_final_froms()[0].element.get_final_froms()[0].element
+    assert matches._limit == 100
+    order_by = str(compiled(matches)).split("ORDER BY")[1]
+    assert order_by.index("videos.title ILIKE") < order_by.index("videos.view_count DESC NULLS LAST")
+    assert "python%" in compiled(matches).params.values()
+
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import patch
+from app.services.tokenizer import Tokenizer
+from app.services.summarizers import OpenAISummarizer
+
+@pytest.fixture
+def approx_tokenizer():
+    """Tokenizer forced onto the offline approximation."""
+    tokenizer = Tokenizer()
+    tokenizer._loaded = True
+    tokenizer._encoding = None
+    return tokenizer
+
+def test_count_tokens(approx_tokenizer):
+    """Test that counting is deterministic and handles empty input."""
+    assert approx_tokenizer.count("") == 0
+    assert approx_tokenizer.count(None) == 0
+    assert approx_tokenizer.count("hello, world") == approx_tokenizer.count("hello, world")
+    assert approx_tokenizer.count("one two six") == 3
+
+def test_truncate_respects_budget(approx_tokenizer):
+    """Test that truncation keeps a prefix within the token budget."""
+    text = " ".join(f"word{i}" for i in range(100))
+    truncated = approx_tokenizer.truncate(text, 10)
+
+    assert text.startswith(truncated)
+    assert approx_tokenizer.count(truncated) == 10
+    assert approx_tokenizer.truncate(text, 10_000) == text
+    assert approx_tokenizer.truncate(text, 0) == ""
+
+def test_chunk_keeps_words_whole(approx_tokenizer):
+    """Test that chunks stay within the budget, split only at whitespace and cover the whole text."""
+    text = " ".join(f"word{i}" for i in range(100)) + " " + "x" * 40
+    chunks = approx_tokenizer.chunk(text, 10)
+
+    assert " ".join(chunks) == text
+    assert all(approx_tokenizer.count(chunk) <= 10 for chunk in chunks[:-1])
+    assert chunks[-1] == "x" * 40
+    assert approx_tokenizer.chunk("", 10) == []
+    with pytest.raises(ValueError):
+        approx_tokenizer.chunk(text, 0)
+
+@patch('app.services.summarizers.openai_summarizer.settings')
+def test_build_messages_packs_transcript(mock_settings):
+    """Test that the transcript sent to the model fits the configured token budget."""
+    mock_settings.TRANSCRIPT_TOKEN_BUDGET = 50
+    summarizer = OpenAISummarizer(client=object())
+    transcript = " ".join(f"word{i}" for i in range(1000))
+
+    messages = summarizer.build_messages(transcript, title="Title")
+    packed = messages[-1]["content"].split("**Transcript:**\n", 1)[1]
+
+    assert transcript.startswith(packed)
+    assert len(packed) < len(transcript)
+
+    # A stored count within budget skips re-encoding and keeps the full text
+    short = "a short transcript"
+    assert summarizer.build_messages(short, transcript_tokens=3)[-1]["content"].endswith("**Transcript:**\n" + short)
+
+def test_estimate_usage():
+    """Test that the dry-run estimate prices the prompt and the completion reservation."""
+    summarizer = OpenAISummarizer(client=object())
+    estimate = summarizer.estimate_usage("some transcript text", title="Title")
+
+    assert estimate["prompt_tokens"] > estimate["transcript_tokens"]
+    assert estimate["max_completion_tokens"] == summarizer.MAX_COMPLETION_TOKENS
+    assert estimate["max_cost_usd"] > estimate["prompt_cost_usd"] > 0
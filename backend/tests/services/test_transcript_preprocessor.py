@@ -0,0 +1,45 @@
+import time
+from app.services.transcript_preprocessor import TranscriptPreprocessor
+
+def test_strips_markers_and_whitespace():
+    """Test that non-speech markers and timing-only newlines are removed."""
+    text, stats = TranscriptPreprocessor().process("[Music]  welcome \n back \n\n >> to the show ♪♪ (applause)")
+
+    assert text == "welcome back to the show"
+    assert stats["markers_removed"] == 4
+
+def test_collapses_rolling_duplicates():
+    """Test that caption lines restating the previous line's tail are collapsed."""
+    text, stats = TranscriptPreprocessor().process(
+        "so today we are going to we are going to talk about talk about the plan"
+    )
+
+    assert text == "so today we are going to talk about the plan"
+    assert stats["repeated_words_removed"] == 6
+
+def test_keeps_single_word_repeats_and_placeholders():
+    """Test that short repeats stay unless disfluency removal is on, and placeholders pass through."""
+    preprocessor = TranscriptPreprocessor()
+    assert preprocessor.process("it was very very good")[0] == "it was very very good"
+    assert preprocessor.process("[No transcript available for this video]")[0] == "[No transcript available for this video]"
+
+    text, stats = TranscriptPreprocessor(drop_disfluencies=True).process("so um I I think uh, it works")
+    assert text == "so I think it works"
+    assert stats["disfluencies_removed"] == 3
+
+def test_long_transcript_is_fast():
+    """Test that a three-hour caption track is processed well under a second."""
+    lines = []
+    previous = []
+    for i in range(5000):
+        line = previous[-3:] + [f"word{(i * 7 + j) % 2000}" for j in range(6)]
+        lines.append(" ".join(line) + " \n [Music]")
+        previous = line
+
+    start = time.perf_counter()
+    text, stats = TranscriptPreprocessor().process(" ".join(lines))
+    elapsed = time.perf_counter() - start
+
+    assert stats["repeated_words_removed"] >= 14000
+    assert len(text.split()) == 5000 * 6
+    assert elapsed < 1.0
@@ -0,0 +1,118 @@
+import random
+import pytest
+from types import SimpleNamespace
+from sqlalchemy.orm import sessionmaker
+from app.models import Transcript, TranscriptStatus
+from app.models.digest import DigestType
+from app.services.digest_reuse import clone_digest
+from app.services.transcript_similarity import (
+    COMPACT_EVERY,
+    TranscriptSimilarityIndex,
+    estimated_similarity,
+    minhash_signature,
+    transcript_signature
+)
+
+WORDS = ("design system token component primitive layout spacing color theme accessibility contrast "
+         "motion typography grid figma variant state review library release adoption team product").split()
+
+def talk(seed, length=3000):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+def reedit(text, seed, changed=0.02):
+    """Drop and replace a small share of words, like a re-edited upload with fresh captions."""
+    rng = random.Random(seed)
+    words = [word for word in text.split() if rng.random() > changed / 2]
+    return " ".join("hmm" if rng.random() < changed / 2 else word for word in words)
+
+def test_signature_estimates_similarity():
+    """Test that near-identical transcripts have close signatures and unrelated ones do not."""
+    original = talk(1)
+    assert transcript_signature(original) == transcript_signature(original)
+    assert estimated_similarity(minhash_signature(original), minhash_signature(reedit(original, 2))) > 0.8
+    assert estimated_similarity(minhash_signature(original), minhash_signature(talk(3))) < 0.1
+    assert minhash_signature("") is None
+    assert minhash_signature("Short") is not None
+
+def test_index_finds_near_duplicates_of_other_videos():
+    """Test that lookups return re-edited copies from other videos, most similar first."""
+    index = TranscriptSimilarityIndex()
+    original = talk(1)
+    index.add(1, 100, transcript_signature(original))
+    index.add(2, 200, transcript_signature(reedit(original, 5, changed=0.01)))
+    for i in range(3, 60):
+        index.add(i, i * 100, transcript_signature(talk(i, length=400)))
+
+    matches = index.query(transcript_signature(reedit(original, 7, changed=0.01)), threshold=0.7)
+    assert [video_id for video_id, _, _ in matches] == [100, 200]
+    assert matches[0][2] > matches[1][2] > 0.7
+
+    assert [video_id for video_id, _, _ in index.query(transcript_signature(original), 0.7, exclude_video_id=100)] == [200]
+    assert index.query(transcript_signature(talk(999)), threshold=0.7) == []
+    assert index.query(None, threshold=0.7) == []
+
+def test_index_lookups_survive_compaction():
+    """Test that entries stay findable once pending entries are merged into the band arrays."""
+    index = TranscriptSimilarityIndex()
+    signatures = {i: transcript_signature(talk(i, length=200)) for i in range(COMPACT_EVERY + 10)}
+    for i, signature in signatures.items():
+        index.add(i, i, signature)
+
+    assert len(index) == COMPACT_EVERY + 10
+    for i in (0, COMPACT_EVERY - 1, COMPACT_EVERY + 5):
+        assert index.query(signatures[i], threshold=0.99)[0][:2] == (i, i)
+    assert index.add(0, 0, signatures[0]) and len(index) == COMPACT_EVERY + 10
+
+def test_changed_signature_replaces_the_indexed_one():
+    """Test that re-adding a transcript with a new signature stops matches on the old one."""
+    index = TranscriptSimilarityIndex()
+    first, second = transcript_signature(talk(1)), transcript_signature(talk(2))
+    index.add(1, 100, first)
+    index.add(1, 100, second)
+
+    assert len(index) == 1
+    assert index.query(first, threshold=0.7) == []
+    assert index.query(second, threshold=0.99)[0][:2] == (100, 1)
+
+def test_refresh_loads_updated_transcripts(sqlite_engine):
+    """Test that a refresh indexes new transcripts and re-indexes ones whose signature was updated."""
+    db = sessionmaker(bind=sqlite_engine)()
+    for transcript_id in (1, 2):
+        db.add(Transcript(id=transcript_id, video_id=transcript_id * 100, source_url="https://youtu.be/x",
+                          status=TranscriptStatus.PROCESSED, minhash_signature=transcript_signature(talk(transcript_id))))
+    db.commit()
+    index = TranscriptSimilarityIndex()
+
+    assert index.refresh(db, force=True) == 2
+    assert index.refresh(db, force=True) == 0
+
+    updated = transcript_signature(talk(3))
+    db.get(Transcript, 1).minhash_signature = updated
+    db.commit()
+    assert index.refresh(db, force=True) == 1
+    assert index.query(updated, threshold=0.99)[0][:2] == (100, 1)
+    assert index.query(transcript_signature(talk(1)), threshold=0.7) == []
+    db.close()
+
+def test_cloned_digest_is_marked_for_adaptation():
+    """Test that a clone copies content at no cost and lists sections that do not fit the new video."""
+    content = ("## Concise Summary\nA talk.\n\n## Target Audience & Value\nEngineers.\n\n## Key Takeaways\n- One\n\n"
+               "## Chapter Breakdown\n**[00:00](t=0) | Introduction**\n\n## Video Highlights\n* Figma")
+    source = SimpleNamespace(id=7, digest_type=DigestType.DETAILED, content=content, model_version="o3-mini",
+                             prompt_version=2, llm_id=1, extra_data={"provider": "openai", "summary_format": "detailed"})
+    same_chapters = SimpleNamespace(id=2, chapters=[{"timestamp": "00:00", "title": "Introduction"}])
+    digest = SimpleNamespace(digest_type=DigestType.DETAILED, llm_id=None)
+
+    assert clone_digest(digest, source, same_chapters, 0.97) == []
+    assert digest.content == content and digest.cost == 0.0
+    assert digest.extra_data == {"cloned_from": 7, "similarity": 0.97, "provider": "openai", "summary_format": "detailed"}
+
+    new_chapters = SimpleNamespace(id=3, chapters=[{"timestamp": "00:00", "title": "Welcome"}])
+    digest = SimpleNamespace(digest_type=DigestType.DETAILED, llm_id=None)
+    assert clone_digest(digest, source, new_chapters, 0.9) == ["Chapter Breakdown"]
+    assert digest.extra_data["adapt_sections"] == ["Chapter Breakdown"]
+
+    highlights = SimpleNamespace(digest_type=DigestType.HIGHLIGHTS, llm_id=None)
+    assert clone_digest(highlights, source, same_chapters, 0.97) == []
+    assert "## Video Highlights" in highlights.content and "## Key Takeaways" not in highlights.content
@@ -0,0 +1,50 @@
+from datetime import date
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from app.models.video import Video as VideoModel
+from app.services.video_filters import video_criteria
+
+def compile_where(criteria):
+    statement = select(VideoModel.id).where(*criteria)
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+def test_no_filters_means_no_criteria():
+    """Test that unset filters and the 'all' time range add nothing to the query."""
+    assert video_criteria() == []
+    assert video_criteria(time_range="all") == []
+
+def test_time_range_filters_on_published_date():
+    """Test that a time range becomes a lower bound on the indexed published_on date."""
+    sql = compile_where(video_criteria(time_range="week", today=date(2026, 10, 19)))
+    assert "videos.published_on >= '2026-10-12'" in sql
+
+def test_has_digest_uses_exists():
+    """Test that has_digest is an EXISTS subquery on digests and its negation NOT EXISTS."""
+    assert "EXISTS (SELECT digests.id" in compile_where(video_criteria(has_digest=True))
+    assert "NOT (EXISTS (SELECT digests.id" in compile_where(video_criteria(has_digest=False))
+
+def test_category_uses_jsonb_containment():
+    """Test that the category filter is a containment test the GIN index can answer."""
+    criterion, = video_criteria(category="Music")
+    compiled = criterion.compile(dialect=postgresql.dialect())
+    assert str(compiled).startswith("videos.categories @> ")
+    assert list(compiled.params.values()) == [["Music"]]
+
+def test_unknown_time_range_is_rejected():
+    """Test that an unknown time range raises ValueError."""
+    with pytest.raises(ValueError):
+        video_criteria(time_range="decade")
+
+def test_published_on_follows_upload_date():
+    """Test that setting upload_date keeps published_on in sync, clearing it for malformed dates."""
+    video = VideoModel(upload_date="20240131")
+    assert video.published_on == date(2024, 1, 31)
+    video.upload_date = None
+    assert video.published_on is None
+
+def test_processing_status_filter():
+    """Test that processing_status filters on the state, case-insensitively, and rejects unknown states."""
+    assert "videos.processing_status = 'FAILED'" in compile_where(video_criteria(processing_status="failed"))
+    with pytest.raises(ValueError):
+        video_criteria(processing_status="stuck")
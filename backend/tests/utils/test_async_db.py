@@ -0,0 +1,42 @@
+import asyncio
+from sqlalchemy import Column, Integer, String, create_engine, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db import database
+from app.db.database import SyncSessionAdapter, async_database_url
+
+Base = declarative_base()
+
+class Item(Base):
+    __tablename__ = "items"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+def test_async_database_url_uses_asyncpg(monkeypatch):
+    """Test that PostgreSQL URLs are rewritten for asyncpg and other databases get no async URL."""
+    monkeypatch.setattr(database.settings, "ASYNC_DATABASE_URL", "")
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("sqlite:///app.db") is None
+
+    monkeypatch.setattr(database.settings, "ASYNC_DATABASE_URL", "postgresql+asyncpg://replica/app")
+    assert async_database_url("postgresql://u:p@db/app") == "postgresql+asyncpg://replica/app"
+
+def test_sync_session_adapter_awaits_queries():
+    """Test that the adapter runs session calls in the thread pool and returns their results."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Item(id=1, name="first"), Item(id=2, name="second")])
+    session.commit()
+
+    async def run():
+        db = SyncSessionAdapter(session)
+        result = await db.execute(select(Item).where(Item.id > 1))
+        names = [item.name for item in result.scalars().all()]
+        item = await db.get(Item, 1)
+        count = await db.scalar(select(Item.id).order_by(Item.id.desc()))
+        await db.close()
+        return names, item.name, count
+
+    assert asyncio.run(run()) == (["second"], "first", 2)
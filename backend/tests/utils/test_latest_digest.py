@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.models import Digest, Video
+from app.models.digest import DigestType
+
+@pytest.fixture
+def db(sqlite_engine):
+    # SQLite does not enforce foreign keys, so channels, users and llms can stay empty
+    session = sessionmaker(bind=sqlite_engine)()
+    session.add_all([
+        Video(id=video_id, youtube_id=f"vid{video_id}", title=f"Video {video_id}", webpage_url="https://youtu.be/x", channel_id=1)
+        for video_id in (1, 2)
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+def add_digest(db, video_id, generated_at, content="summary"):
+    digest = Digest(video_id=video_id, user_id=1, llm_id=1, content=content, digest_type=DigestType.SUMMARY,
+                    tokens_used=0, cost=0.0, model_version="test", generated_at=generated_at)
+    db.add(digest)
+    db.flush()
+    return digest
+
+def test_pointer_follows_latest_generated_digest(db):
+    """Test that latest_digest_id tracks the newest digest through inserts, regeneration and deletes."""
+    now = datetime(2026, 10, 19, 12, 0)
+    first = add_digest(db, 1, now)
+    second = add_digest(db, 1, now - timedelta(hours=1))
+    db.commit()
+    video = db.get(Video, 1)
+    assert video.latest_digest_id == first.id and video.latest_digest.content == "summary"
+
+    second.generated_at = now + timedelta(hours=1)
+    db.commit()
+    assert db.get(Video, 1).latest_digest_id == second.id
+
+    db.delete(second)
+    db.commit()
+    assert db.get(Video, 1).latest_digest_id == first.id
+    assert db.get(Video, 2).latest_digest_id is None
+
+def test_pointer_rolls_back_with_digest(db):
+    """Test that the pointer is written in the digest's transaction and undone with it."""
+    add_digest(db, 2, datetime(2026, 10, 19))
+    assert db.get(Video, 2).latest_digest_id is not None
+    db.rollback()
+    assert db.get(Video, 2).latest_digest_id is None
+
+def test_unrelated_digest_edits_do_not_touch_videos(db):
+    """Test that editing digest content without regenerating it leaves the video alone."""
+    digest = add_digest(db, 1, datetime(2026, 10, 19))
+    db.commit()
+    updated_at = db.get(Video, 1).updated_at
+    digest.content = "edited"
+    db.flush()
+    assert "latest_digest_videos" not in db.info
+    assert db.get(Video, 1).updated_at == updated_at
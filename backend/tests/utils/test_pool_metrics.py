@@ -0,0 +1,47 @@
+import sqlite3
+import threading
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.db.pool_metrics import InstrumentedQueuePool, pool_snapshot
+
+def make_pool(pool_size=1, max_overflow=0, timeout=0.05):
+    return InstrumentedQueuePool(
+        lambda: sqlite3.connect(":memory:", check_same_thread=False),
+        pool_size=pool_size, max_overflow=max_overflow, timeout=timeout
+    )
+
+def test_snapshot_reports_connections_in_use():
+    """Test that the snapshot counts checked-out and idle connections."""
+    pool = make_pool(pool_size=2, max_overflow=1)
+    first, second = pool.connect(), pool.connect()
+    snapshot = pool_snapshot(pool)
+    assert snapshot["size"] == 2 and snapshot["in_use"] == 2 and snapshot["checkouts"] == 2
+
+    first.close()
+    second.close()
+    snapshot = pool_snapshot(pool)
+    assert snapshot["in_use"] == 0 and snapshot["idle"] == 2
+    assert snapshot["wait_p50_ms"] is not None
+
+def test_exhausted_pool_records_waits_and_timeouts():
+    """Test that a checkout waiting for a returned connection is timed and a timed-out one counted."""
+    pool = make_pool(timeout=2.0)
+    held = pool.connect()
+    threading.Timer(0.1, held.close).start()
+    waited = pool.connect()
+    assert pool.stats.wait_percentile(1.0) >= 0.09
+
+    pool._timeout = 0.05
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    waited.close()
+
+    snapshot = pool_snapshot(pool)
+    assert snapshot["timeouts"] == 1 and snapshot["checkouts"] == 2
+    assert snapshot["wait_max_ms"] >= 90
+
+def test_stats_survive_recreate():
+    """Test that disposing the engine keeps the pool's statistics."""
+    pool = make_pool()
+    pool.connect().close()
+    assert pool.recreate().stats.checkouts == 1
@@ -0,0 +1,85 @@
+"""
+Query-plan regression tests for the pipeline's hot lookups.
+
+Each query is EXPLAINed against the test database with sequential scans
+disabled, so on small test tables the planner still shows which index it
+can use. A query that stops matching its index (a changed filter, a dropped
+index) then fails here instead of turning into a table scan in production.
+"""
+from typing import Any, Iterator, List
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+
+from app.models import Base, Digest, Transcript, TranscriptStatus, Video
+from app.models.digest import DigestType
+from app.services.video_filters import video_criteria
+from app.services.pagination import VIDEO_SORT_KEYS, keyset_page
+from app.services.search import SEARCH_SOURCES, parse_query
+from app.services.suggestions import SUGGEST_SOURCES
+
+HOT_QUERIES = [
+    (
+        "processed transcript of a video",
+        select(Transcript).where(Transcript.video_id == 1, Transcript.status == TranscriptStatus.PROCESSED),
+        "ix_transcripts_video_processed"
+    ),
+    (
+        "digest of a video by type",
+        select(Digest).where(Digest.video_id == 1, Digest.digest_type == DigestType.SUMMARY),
+        "ix_digests_video_type"
+    ),
+    (
+        "latest digest of a video",
+        select(Digest).where(Digest.video_id == 1).order_by(Digest.generated_at.desc(), Digest.id.desc()).limit(1),
+        "ix_digests_video_generated_at_id"
+    ),
+    (
+        "unfinished videos for reprocessing",
+        keyset_page(select(Video).where(*video_criteria(processing_status="PROCESSING")),
+                    Video.id, VIDEO_SORT_KEYS["created_at"], "desc", 500),
+        "ix_videos_unfinished_status"
+    )
+] + [
+    (
+        f"{name} matching a search",
+        select(source.model.id).where(source.vector.bool_op("@@")(parse_query("python tutorial"))),
+        f"ix_{name}_search_vector"
+    )
+    for name, source in SEARCH_SOURCES.items()
+] + [
+    (
+        f"{name} suggested for typed input",
+        select(source.id_column).where(source.label.ilike("%pyth%")),
+        index
+    )
+    for (name, source), index in zip(SUGGEST_SOURCES.items(),
+                                     ["ix_videos_title_trgm", "ix_channels_name_trgm", "ix_tags_name_trgm"])
+]
+
+@pytest.fixture(scope="module")
+def connection(db_engine) -> Iterator[Any]:
+    try:
+        connection = db_engine.connect()
+    except OperationalError:
+        pytest.skip("PostgreSQL test database is not available")
+    Base.metadata.create_all(bind=connection)
+    connection.commit()
+    yield connection
+    connection.close()
+
+def index_names(plan: Any) -> List[str]:
+    names = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", []):
+        names.extend(index_names(child))
+    return names
+
+@pytest.mark.parametrize("description, statement, index", HOT_QUERIES, ids=[query[0] for query in HOT_QUERIES])
+def test_hot_query_uses_index(connection, description, statement, index):
+    """Test that each hot pipeline query is planned with its composite or partial index."""
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={"render_postcompile": True})
+    with connection.begin():
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()[0]["Plan"]
+    assert index in index_names(plan), f"{description} does not use {index}: {plan}"
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from app.models import Tag, Video
+from app.models.tag import rebuild_tag_dictionary, tag_names
+
+@pytest.fixture
+def db(sqlite_engine):
+    session = sessionmaker(bind=sqlite_engine)()
+    yield session
+    session.close()
+
+def add_video(db, video_id, tags):
+    video = Video(id=video_id, youtube_id=f"vid{video_id}", title=f"Video {video_id}",
+                  webpage_url="https://youtu.be/x", channel_id=1, tags=tags)
+    db.add(video)
+    db.flush()
+    return video
+
+def counts(db):
+    return dict(db.execute(select(Tag.name, Tag.video_count)).all())
+
+def test_tag_names_are_normalized_and_deduplicated():
+    """Test that tags are trimmed, lowercased and counted once per video."""
+    assert tag_names([" Python", "python", "PYTHON ", "", "  ", 3, "Web Dev"]) == {"python", "web dev"}
+    assert tag_names(None) == set() and tag_names("python") == set()
+
+def test_counts_follow_video_writes(db):
+    """Test that adding, retagging and deleting videos keeps the tag counts in step."""
+    first = add_video(db, 1, ["Python", "Tutorial"])
+    add_video(db, 2, ["python", "Music"])
+    assert counts(db) == {"python": 2, "tutorial": 1, "music": 1}
+
+    first.tags = ["Python", "Beginners"]
+    db.flush()
+    assert counts(db) == {"python": 2, "tutorial": 0, "music": 1, "beginners": 1}
+
+    db.delete(first)
+    db.flush()
+    assert counts(db) == {"python": 1, "tutorial": 0, "music": 1, "beginners": 0}
+
+def test_counts_roll_back_with_videos(db):
+    """Test that tag counts are written in the flush's transaction."""
+    add_video(db, 1, ["python"])
+    db.commit()
+    add_video(db, 2, ["python", "music"])
+    db.rollback()
+    assert counts(db) == {"python": 1}
+
+def test_retag_of_unloaded_video_uses_previous_tags(db):
+    """Test that replacing the tags of an expired video still takes the old ones out."""
+    add_video(db, 1, ["python"])
+    db.commit()
+    video = db.get(Video, 1)
+    db.expire(video)
+    video.tags = ["rust"]
+    db.commit()
+    assert counts(db) == {"python": 0, "rust": 1}
+
+def test_rebuild_recounts_from_videos(db):
+    """Test that a rebuild drops stale counts and recounts every video's tags."""
+    add_video(db, 1, ["Python", "Tutorial"])
+    add_video(db, 2, ["python"])
+    db.commit()
+    # A delete bypassing the ORM leaves the dictionary behind
+    db.execute(Video.__table__.delete().where(Video.id == 1))
+    db.commit()
+    assert counts(db)["tutorial"] == 1
+
+    assert rebuild_tag_dictionary(db) == 1
+    assert counts(db) == {"python": 1}
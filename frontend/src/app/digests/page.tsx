@@ -8,7 +8,7 @@ import EmptyState from '@/components/common/EmptyState';
 import ErrorDisplay from '@/components/common/ErrorDisplay';
 import KeyboardShortcutsHelp from '@/components/common/KeyboardShortcutsHelp';
 import { api } from '@/services/api';
-import type { Video, Channel } from '@/types/video';
+import type { Video, VideoListItem, Channel } from '@/types/video';
 import { ArrowLeftIcon } from '@heroicons/react/24/outline';
 import { DocumentTextIcon } from '@heroicons/react/24/outline';
 import { marked } from 'marked';
@@ -120,8 +120,8 @@ function DigestsPageImpl({ searchParamsObj }: { searchParamsObj: URLSearchParams
   const urlParam = searchParams.get('url');
 
   const [isLoading, setIsLoading] = useState(true);
-  const [videos, setVideos] = useState<Video[]>([]);
-  const [allVideos, setAllVideos] = useState<Video[]>([]);
+  const [videos, setVideos] = useState<VideoListItem[]>([]);
+  const [allVideos, setAllVideos] = useState<VideoListItem[]>([]);
   const [selectedVideo, setSelectedVideo] = useState<Video | null>(null);
   const [url, setUrl] = useState('');
   const [error, setError] = useState<string | null>(null);
@@ -261,13 +261,9 @@ function DigestsPageImpl({ searchParamsObj }: { searchParamsObj: URLSearchParams
           }
         } catch (error) {
           console.error('  Error fetching video by ID:', error);
-          
-          // Fallback to local cache only if API call fails
-          const selectedVid = videos.find(v => v.id === videoId);
-          if (selectedVid) {
-            console.log('  Falling back to cached video data:', selectedVid);
-            setSelectedVideo(selectedVid);
-          }
+          // List items only carry snippets, so there is no usable fallback; allow a retry
+          lastFetchedVideoIdRef.current = null;
+          setError('Failed to load video');
         }
       };
       fetchVideo();
@@ -312,7 +308,7 @@ function DigestsPageImpl({ searchParamsObj }: { searchParamsObj: URLSearchParams
         if (videos.length > 0 && selectedVideo) {
           const currentIndex = videos.findIndex(v => v.id === selectedVideo.id);
           if (currentIndex > 0) {
-            setSelectedVideo(videos[currentIndex - 1]);
+            handleVideoSelect(videos[currentIndex - 1]);
           }
         }
       },
@@ -320,7 +316,7 @@ function DigestsPageImpl({ searchParamsObj }: { searchParamsObj: URLSearchParams
         if (videos.length > 0 && selectedVideo) {
           const currentIndex = videos.findIndex(v => v.id === selectedVideo.id);
           if (currentIndex < videos.length - 1) {
-            setSelectedVideo(videos[currentIndex + 1]);
+            handleVideoSelect(videos[currentIndex + 1]);
           }
         }
       },
@@ -456,7 +452,8 @@ function DigestsPageImpl({ searchParamsObj }: { searchParamsObj: URLSearchParams
     }
   };
 
-  const handleVideoSelect = (video: Video) => {
+  // Selection goes through the URL, whose effect loads the full record with api.getVideo()
+  const handleVideoSelect = (video: VideoListItem) => {
     console.log('[DigestsPageImpl] handleVideoSelect called with video:', video.id, 'Title:', video.title);
     
     // Use Next.js router for navigation (as confirmed in library page)
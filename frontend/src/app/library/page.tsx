@@ -129,21 +129,9 @@ function LibraryPageImpl({ searchParamsObj }: { searchParamsObj: URLSearchParams
           api.getChannels()
         ]);
         
-        // Check videos for digests
-        const videosWithDigests = await Promise.all(
-          videosData.map(async (video) => {
-            try {
-              const digest = await api.getVideoDigest(video.id);
-              return { ...video, has_digest: !!digest };
-            } catch (err) {
-              console.error(`Error checking digest for video ${video.id}:`, err);
-              return { ...video, has_digest: false };
-            }
-          })
-        );
-        
-        setVideos(videosWithDigests);
-        setFilteredVideos(videosWithDigests);
+        // Videos come with has_digest, so no per-video digest lookups are needed
+        setVideos(videosData);
+        setFilteredVideos(videosData);
         setChannels(channelsData);
       } catch (err) {
         console.error('Error fetching data:', err);
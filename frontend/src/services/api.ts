@@ -1,10 +1,10 @@
-import type { Video, VideoFilterOptions } from '@/types/video';
+import type { Video, VideoFilterOptions, VideoListItem } from '@/types/video';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 const API_VERSION = '/api/v1';
 
 export const api = {
-  async fetchVideos(filters: VideoFilterOptions): Promise<Video[]> {
+  async fetchVideos(filters: VideoFilterOptions): Promise<VideoListItem[]> {
     const queryParams = new URLSearchParams();
     
     if (filters.sortBy) {
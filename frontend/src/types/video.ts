@@ -35,6 +35,11 @@ export interface Video {
   error_message?: string;
 }
 
+// Card-sized video returned by list endpoints: description and summary are
+// short snippets and chapters are left out. Load the full Video with
+// api.getVideo() before showing a video's details.
+export type VideoListItem = Omit<Video, 'chapters' | 'transcript'>;
+
 export interface VideoChapter {
   start_time: number;
   end_time?: number;